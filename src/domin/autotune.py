@@ -0,0 +1,254 @@
+# Copyright 2026 Nimit Shah. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Throughput autotuner for `num_envs` and the image writer concurrency.
+
+Each candidate setting is measured by a short calibration run (a "workload") that reports its recording
+throughput, image writer backlog, save latency and peak memory, from the telemetry of `DatasetRecord`. Env counts
+are tried in increasing order, with every image writer setting for each. The search stops growing the env count
+once throughput saturates or a candidate goes over the memory limit. The chosen setting is written as a JSON
+config overlay (see `load_overlay`) for `domin-gen --config_overlay`.
+
+`synthetic_workload` records random frames through the real writer path with a simulated per-step cost, so the
+search can run on a CPU-only machine. `domin-gen --autotune` measures actual Isaac Sim runs instead.
+"""
+
+import json
+import tempfile
+import time
+from collections.abc import Callable
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+import torch
+
+# (num_image_writer_processes, num_image_writer_threads_per_camera) tried for every env count
+DEFAULT_WRITER_OPTIONS = [(0, 2), (0, 4), (0, 8), (1, 4), (2, 4)]
+DEFAULT_NUM_ENVS_OPTIONS = [1, 2, 4, 8, 16, 32, 64, 128]
+
+
+@dataclass(frozen=True)
+class TuneCandidate:
+    num_envs: int
+    num_image_writer_processes: int
+    num_image_writer_threads_per_camera: int
+
+    def as_overlay(self) -> dict:
+        return asdict(self)
+
+
+@dataclass
+class Calibration:
+    candidate: TuneCandidate
+    # Recorded frames (over all envs) per second of wall time
+    frames_per_s: float = 0.0
+    # Largest number of images waiting in the image writer queue
+    max_queue_size: float = 0.0
+    # Median time to save an episode (wait for images, parquet, stats, video encoding)
+    save_p50_s: float | None = None
+    # Peak memory used by the run, in bytes
+    peak_memory_bytes: int = 0
+    # Whether `peak_memory_bytes` is estimated from the frame sizes instead of measured (see `synthetic_workload`)
+    peak_memory_estimated: bool = False
+    # Why the run failed, if it did
+    error: str | None = None
+
+    @classmethod
+    def from_telemetry(cls, candidate: TuneCandidate, summary: dict, **kwargs) -> "Calibration":
+        """Build a calibration from a `Telemetry.summary()` taken at the end of the run."""
+        histograms = summary["histograms"]
+        frames = summary["counters"].get("frames", 0)
+        return cls(
+            candidate=candidate,
+            frames_per_s=frames / max(summary["elapsed_s"], 1e-9),
+            max_queue_size=histograms.get("image_writer.queue_size", {}).get("max", 0.0),
+            save_p50_s=histograms.get("save_episode", {}).get("p50"),
+            **kwargs,
+        )
+
+
+@dataclass
+class AutotuneResult:
+    best: TuneCandidate | None
+    calibrations: list[Calibration] = field(default_factory=list)
+
+
+class Autotuner:
+    def __init__(
+        self,
+        workload: Callable[[TuneCandidate], Calibration],
+        num_envs_options: list[int] | None = None,
+        writer_options: list[tuple[int, int]] | None = None,
+        memory_limit_bytes: int | None = None,
+        images_per_frame: int = 1,
+        max_backlog_s: float = 1.0,
+        min_gain: float = 0.05,
+    ):
+        """
+        Args:
+            workload: Runs a short calibration with the given candidate setting.
+            num_envs_options: Env counts to try, in increasing order. Defaults to `DEFAULT_NUM_ENVS_OPTIONS`.
+            writer_options: (num_image_writer_processes, num_image_writer_threads_per_camera) to try. Defaults to
+                `DEFAULT_WRITER_OPTIONS`.
+            memory_limit_bytes: Candidates whose peak memory goes over this are rejected, and larger env
+                counts are not tried. None: no limit.
+            images_per_frame: Images written per recorded frame (number of cameras), to size the backlog.
+            max_backlog_s: A candidate is rejected when the image writer queue held more than this many seconds
+                of images: the writer doesn't keep up and the queue would keep growing in a long run.
+            min_gain: Stop trying larger env counts when the best throughput improves by less than this
+                fraction.
+        """
+        self.workload = workload
+        self.num_envs_options = sorted(num_envs_options or DEFAULT_NUM_ENVS_OPTIONS)
+        self.writer_options = list(writer_options or DEFAULT_WRITER_OPTIONS)
+        self.memory_limit_bytes = memory_limit_bytes
+        self.images_per_frame = images_per_frame
+        self.max_backlog_s = max_backlog_s
+        self.min_gain = min_gain
+
+    def rejection(self, calibration: Calibration) -> str | None:
+        """Why a calibrated candidate can't be used, or None if it can."""
+        if calibration.error is not None:
+            return calibration.error
+        if self.memory_limit_bytes is not None and calibration.peak_memory_bytes > self.memory_limit_bytes:
+            estimated = "estimated " if calibration.peak_memory_estimated else ""
+            return f"{estimated}peak memory {calibration.peak_memory_bytes / 2**30:.2f} GiB over the limit"
+        max_backlog = self.max_backlog_s * calibration.frames_per_s * self.images_per_frame
+        if self.images_per_frame and calibration.max_queue_size > max_backlog:
+            return f"image writer backlog of {calibration.max_queue_size:.0f} images"
+        return None
+
+    def run(self) -> AutotuneResult:
+        result = AutotuneResult(best=None)
+        best_frames_per_s = 0.0
+        for num_envs in self.num_envs_options:
+            level_best = None
+            over_memory = False
+            # Without cameras, the image writer settings make no difference
+            writer_options = self.writer_options if self.images_per_frame else self.writer_options[:1]
+            for processes, threads in writer_options:
+                candidate = TuneCandidate(num_envs, processes, threads)
+                calibration = self.workload(candidate)
+                result.calibrations.append(calibration)
+                reason = self.rejection(calibration)
+                over_memory |= (
+                    self.memory_limit_bytes is not None
+                    and calibration.peak_memory_bytes > self.memory_limit_bytes
+                )
+                print(
+                    f"Autotune {candidate}: {calibration.frames_per_s:.1f} frames/s, "
+                    f"queue max {calibration.max_queue_size:.0f}"
+                    + (f" (rejected: {reason})" if reason else "")
+                )
+                if reason is None and (level_best is None or calibration.frames_per_s > level_best.frames_per_s):
+                    level_best = calibration
+
+            if level_best is not None and level_best.frames_per_s > best_frames_per_s:
+                gain = level_best.frames_per_s / best_frames_per_s - 1 if best_frames_per_s else float("inf")
+                result.best = level_best.candidate
+                best_frames_per_s = level_best.frames_per_s
+                if gain < self.min_gain:
+                    break
+            elif result.best is not None:
+                # More envs didn't help (or no setting could keep up)
+                break
+            if over_memory:
+                break
+        return result
+
+
+def synthetic_workload(
+    cameras: dict[str, tuple[int, int]],
+    num_joints: int = 7,
+    fps: int = 30,
+    num_stories: int = 2,
+    steps_per_story: int = 30,
+    step_cost_s: float = 1e-3,
+    env_step_cost_s: float = 1e-4,
+    video: bool = False,
+) -> Callable[[TuneCandidate], Calibration]:
+    """
+    Workload recording random frames through `DatasetRecord` into a temporary dataset, on CPU.
+
+    Each step sleeps `step_cost_s + num_envs * env_step_cost_s` to stand in for the simulation: a fixed cost
+    per step (batched over the envs) and a cost per env. The peak memory isn't measured (the image writers run
+    in this process or its children): it is estimated as the frames of one batch plus the image writer backlog,
+    and flagged with `peak_memory_estimated`.
+    """
+    from domin.dataset_builder import DatasetRecord, DatasetRecordConfig
+
+    frame_bytes = sum(width * height * 3 for width, height in cameras.values())
+    image_bytes = max(frame_bytes // max(len(cameras), 1), 1)
+
+    def workload(candidate: TuneCandidate) -> Calibration:
+        num_envs = candidate.num_envs
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cfg = DatasetRecordConfig(
+                repo_id="autotune/synthetic",
+                root=str(Path(tmp_dir) / "dataset"),
+                default_task="calibration",
+                joint_names=[f"joint{i}" for i in range(num_joints)],
+                robot_type="synthetic",
+                cameras=cameras,
+                fps=fps,
+                num_episodes=num_stories * num_envs,
+                video=video,
+                num_image_writer_processes=candidate.num_image_writer_processes,
+                num_image_writer_threads_per_camera=candidate.num_image_writer_threads_per_camera,
+                num_envs=num_envs,
+                progress_interval_s=float("inf"),
+            )
+            cam_obs = {
+                cam: torch.randint(0, 256, (num_envs, height, width, 3), dtype=torch.uint8)
+                for cam, (width, height) in cameras.items()
+            }
+            try:
+                with DatasetRecord(cfg) as recorder:
+                    for _ in range(num_stories):
+                        recorder.new_story()
+                        for _ in range(steps_per_story):
+                            time.sleep(step_cost_s + num_envs * env_step_cost_s)
+                            state = torch.randn(num_envs, num_joints)
+                            recorder.step(state, state, cam_obs)
+                        recorder.finish_episodes(recorder.active_env_ids)
+                    summary = recorder.telemetry.summary()
+                recorder.dataset.stop_image_writer()
+            except (MemoryError, OSError, RuntimeError, ValueError) as e:
+                return Calibration(candidate, error=f"{type(e).__name__}: {e}")
+
+        calibration = Calibration.from_telemetry(candidate, summary)
+        calibration.peak_memory_bytes = int(num_envs * frame_bytes + calibration.max_queue_size * image_bytes)
+        calibration.peak_memory_estimated = True
+        return calibration
+
+    return workload
+
+
+def write_overlay(candidate: TuneCandidate, path: str | Path, calibrations: list[Calibration] = ()):
+    """Write the chosen setting as a config overlay, with the calibrations it was chosen from."""
+    overlay = candidate.as_overlay()
+    overlay["_autotune"] = [
+        {**asdict(c.candidate), **{k: v for k, v in asdict(c).items() if k != "candidate"}} for c in calibrations
+    ]
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(overlay, f, indent=4)
+
+
+def load_overlay(path: str | Path) -> dict:
+    """Config fields of an overlay, to pass as keyword arguments to the config class (keys starting with
+    '_' are informative only)."""
+    with open(path) as f:
+        overlay = json.load(f)
+    return {k: v for k, v in overlay.items() if not k.startswith("_")}
@@ -19,8 +19,7 @@ import csv
 import json
 import os
 from abc import ABC, abstractmethod
-from dataclasses import dataclass, field
-from datetime import datetime
+from dataclasses import dataclass, field, fields
 from typing import Any, Dict, List, Optional, Tuple
 
 import numpy as np
@@ -29,16 +28,11 @@ from isaaclab.assets import (Articulation, ArticulationCfg, RigidObject,
                              RigidObjectCfg)
 from isaaclab.scene import InteractiveSceneCfg
 
+from .dataset_builder.dataset_record import DatasetRecordConfig
+from .fingerprint import canonical, config_fingerprint, qualified_name
 from .sim_state import SimProps, SimState
 from .utils import sample_from_ellipsoid, will_overlap
 
-# TODO:
-# Add versioning based on random ranges of objects
-# keep history of all generated datasets (random_ranges = list[tuple[float, float]])
-# add suffix to dataset path (if random_obj: dataset_path+f'r{len(random_ranges)}')
-# same for other randomizations
-
-
 # TODO:
 # Encode the whole config in a config file and add it to the dataset
 # create config from file should also be an option
@@ -60,6 +54,8 @@ class BaseDatasetConfig(ABC):
     eval_mode: bool = False
 
     # General settings
+    # Defaults to a path keyed by the config fingerprint (see `fingerprint`), so that a later run of the same
+    # config tops the dataset up to `num_episodes` instead of starting a new one.
     dataset_path: str = ""
 
     # Path to CSV file with start poses
@@ -68,6 +64,9 @@ class BaseDatasetConfig(ABC):
     hf_repo_id: str = ""
     num_envs: int = 1
     version: int = 0
+    # Global index of the first episode of this dataset, used to look up (and save) start poses.
+    # Set by the sharded launcher so that shards generated in parallel use disjoint episode ranges.
+    episode_offset: int = 0
 
     # Robot specific configuration
     ee_body_name: str = "ee_link"
@@ -83,35 +82,152 @@ class BaseDatasetConfig(ABC):
     # Dataset recording settings
     default_task: str
     robot_type: str = "franka_panda"
-    fps: int = 60
+    # Record rate: must divide the physics rate (1 / physics_dt)
+    fps: int = 50
+    # Record rate of each camera (camera name -> frames per second). Cameras not listed here are recorded at
+    # the rate their sensor updates at (`1 / update_period`), or at every frame if it updates every step.
+    camera_fps: Dict[str, int] = field(default_factory=dict)
+    # Depth and segmentation channels recorded for some cameras (camera name -> ["depth", "segmentation"]).
+    # The camera config must output "distance_to_image_plane" and/or "instance_id_segmentation_fast"
+    # (with `colorize_instance_id_segmentation=False`). They are stored losslessly as 16-bit images/FFV1 videos.
+    camera_channels: Dict[str, List[str]] = field(default_factory=dict)
+    # Depth encoding: "uint16" (units of `depth_scale` metres) or "float16" (metres)
+    depth_encoding: str = "uint16"
+    depth_scale: float = 0.001
+
+    # Simulation rates
+    # Physics step size in seconds. Cameras are only rendered on steps that are recorded (every
+    # `record_decimation` physics steps), so it can be lowered for accuracy without increasing rendering and I/O.
+    physics_dt: float = 0.01
+    # Number of physics steps per control step (targets and IK). Must divide `record_decimation`.
+    control_decimation: int = 1
+    # After a reset, the scene is stepped until the velocities of the robot and all objects (in every env) fall
+    # below these thresholds, before the episode starts
+    settle_lin_vel_threshold: float = 0.01  # m/s, root linear velocity
+    settle_ang_vel_threshold: float = 0.05  # rad/s, root angular velocity
+    settle_joint_vel_threshold: float = 0.05  # rad/s (or m/s for prismatic joints)
+    # Maximum seconds of simulation given to the scene to settle after a reset
+    settle_time_s: float = 0.5
     episode_time_s: float = 60.0
     reset_time_s: float = 60.0
     num_episodes: int = 50
     video: bool = True
+    # Record joint states, actions and the sim state of every frame, without rendering cameras. Cameras are rendered
+    # afterwards, only for the kept episodes, by replaying the dataset (`domin-gen --replay`, see dataset_builder.replay)
+    state_only: bool = False
+    # Compact parquet storage of numeric features, e.g. {"action": {"dtype": "float16"}} (see dataset_builder.quantization)
+    feature_storage: Dict[str, Dict[str, Any]] = field(default_factory=dict)
     push_to_hub: bool = False
     tags: List[str] = field(default_factory=list)
     num_image_writer_processes: int = 0
     num_image_writer_threads_per_camera: int = 4
+    # Cap (in bytes) of the memory used by in-flight episode buffers, above which the oldest are spilled to disk
+    max_buffer_bytes: int | None = None
+    # Directory where saved episodes are packed into WebDataset-style tar shards in the background. None: don't export
+    webdataset_dir: str | None = None
+    # Target size (in bytes) of a tar shard
+    webdataset_shard_bytes: int = 1 << 30
+    # Number of processes writing tar shards
+    webdataset_num_workers: int = 2
+    # Directory where per-phase timings are exported (JSON lines and Prometheus text). None: don't export
+    telemetry_dir: str | None = None
+    # Seconds between two progress summaries printed while recording
+    progress_interval_s: float = 10.0
+    # Validate the shapes and dtypes of every Nth recorded batch (the schema is fixed by the scene)
+    validate_every: int = DatasetRecordConfig.validate_every
+    # `encode_video_frames` arguments of the camera videos, e.g. the preset recommended by
+    # dataset_builder.video_benchmark. None: the preset in the dataset's info.json, or the defaults
+    video_encoding: Dict[str, Any] | None = None
 
     # camera_eye: torch.tensor
 
+    # Fields left out of the fingerprint: where and how fast a dataset is generated, not what its episodes contain.
+    # Every other (public) field, including the ones of subclasses, has to match for a run to extend a dataset
+    fingerprint_excluded_fields = (
+        "dataset_path",
+        "hf_repo_id",
+        "num_envs",
+        "episode_offset",
+        "num_episodes",
+        "reset_time_s",
+        "push_to_hub",
+        "tags",
+        "num_image_writer_processes",
+        "num_image_writer_threads_per_camera",
+        "max_buffer_bytes",
+        "webdataset_dir",
+        "webdataset_shard_bytes",
+        "webdataset_num_workers",
+        "telemetry_dir",
+        "progress_interval_s",
+        "validate_every",
+        "video_encoding",
+    )
+    # Fields of `scene_cfg` left out of the fingerprint: they set how many envs are simulated and how they are laid
+    # out, not what an episode contains, so runs with another --num_envs (or shards) extend the same dataset
+    scene_runtime_fields = ("num_envs", "env_spacing", "lazy_sensor_update", "replicate_physics")
+
     def __post_init__(self):
         """
         Post-initialization processing.
-        Generates a timestamp-based dataset path if not specified.
+        Generates a dataset path keyed by the config fingerprint if not specified.
         """
         if self.default_task is None:
             raise ValueError("default_task must be provided in config")
 
-        if not self.dataset_path:
-            # Generate a unique name based on current timestamp
-            # timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-            timestamp = datetime.now().isoformat(timespec="seconds")
-            self.dataset_path = f"datasets/{self.__class__.__name__}_{timestamp}_v{self.version}"
-
         self.scene_cfg.robot = self.robot_cfg.replace(prim_path="{ENV_REGEX_NS}/Robot")  # type: ignore
 
+        if not self.dataset_path:
+            self.dataset_path = f"datasets/{self.__class__.__name__}_{self.fingerprint()}_v{self.version}"
+
+        physics_steps_per_frame = 1 / (self.fps * self.physics_dt)
+        if self.record_decimation < 1 or abs(physics_steps_per_frame - self.record_decimation) > 1e-6:
+            raise ValueError(
+                f"fps ({self.fps}) must divide the physics rate (1 / physics_dt = {1 / self.physics_dt:g} Hz)."
+            )
+        if self.record_decimation % self.control_decimation:
+            raise ValueError(
+                f"control_decimation ({self.control_decimation}) must divide the record decimation "
+                f"({self.record_decimation} physics steps per recorded frame)."
+            )
+
+    def fingerprint(self) -> str:
+        """
+        Stable hash of the config class and of its fields (scene with its robot and cameras, randomization, task,
+        rates, storage and the fields of the subclass), stored in info.json. A run only extends an existing dataset
+        with the same fingerprint. `fingerprint_excluded_fields` and private fields (e.g. per-env state) are left out.
+        """
+        values = {
+            f.name: getattr(self, f.name)
+            for f in fields(self)
+            if not f.name.startswith("_") and f.name not in self.fingerprint_excluded_fields
+        }
+        if "scene_cfg" in values:
+            scene = canonical(values["scene_cfg"])
+            values["scene_cfg"] = {key: item for key, item in scene.items() if key not in self.scene_runtime_fields}
+        return config_fingerprint({"config_class": qualified_name(type(self)), **values})
+
+    @property
+    def record_decimation(self) -> int:
+        """
+        Number of physics steps per recorded frame, derived from `fps` and `physics_dt`.
+        """
+        return round(1 / (self.fps * self.physics_dt))
+
+    @property
+    def max_episode_steps(self) -> int:
+        """
+        Budget of control steps of each episode, derived from `episode_time_s`. Envs that haven't succeeded
+        by then are rerecorded.
+        """
+        return round(self.episode_time_s / (self.physics_dt * self.control_decimation))
 
+    @property
+    def max_settle_steps(self) -> int:
+        """
+        Maximum number of physics steps run after a reset to let the scene settle.
+        """
+        return round(self.settle_time_s / self.physics_dt)
 
     def eval(self) -> "BaseDatasetConfig":
         """
@@ -267,3 +383,34 @@ class BaseDatasetConfig(ABC):
         """
 
         raise NotImplementedError("is_success must be implemented by subclass")
+
+    def get_tasks(self, start: SimState) -> List[Optional[str]] | None:
+        """
+        Optional per-env task assignment, evaluated once per story right after the envs were reset.
+        Lets a single run record several tasks (e.g. a target object picked per env from the layout).
+
+        Args:
+            start: SimState containing start positions of all rigid objects and the robot.
+
+        Returns:
+            List of shape: (num_envs, ) with the task of each env (None for `default_task`), or None to
+            record `default_task` in every env
+        """
+        return None
+
+    def is_failure(
+        self, start: SimState, current: SimState
+    ) -> np.ndarray[tuple[int], np.dtype[np.bool_]] | torch.Tensor | None:
+        """
+        Optional early-abort check, evaluated for all envs at every control step.
+        Envs flagged here can no longer succeed (e.g. the object fell off the table): they are stopped
+        immediately and scheduled for rerecord instead of running until the step budget.
+
+        Args:
+            start: SimState at the start of the episode
+            current: SimState after the current control step
+
+        Returns:
+            1D bool array or tensor of shape: (num_envs, ) denoting failure, or None to never abort early
+        """
+        return None
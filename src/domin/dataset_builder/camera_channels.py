@@ -0,0 +1,127 @@
+# Copyright 2026 Nimit Shah. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Depth and segmentation camera channels, recorded next to the RGB frames of a camera.
+
+A channel is a single-channel camera feature (`observation.depth.{camera}` or `observation.segmentation.{camera}`)
+whose spec has a `channel` entry describing its encoding. Every channel is stored losslessly as 16-bit values:
+16-bit grayscale PNG images, or FFV1 (gray16le) videos.
+
+- depth, "uint16" encoding: distance to the image plane in units of `scale` metres (millimetres by default),
+  0 where it is unknown and clipped to 65535.
+- depth, "float16" encoding: half-precision metres, stored as their raw bits.
+- segmentation: instance ids (which must fit in uint16).
+
+Channels are encoded when a frame is added to the dataset and decoded on read (to float32 metres for depth and
+int64 ids for segmentation). Their stats are computed from the decoded values.
+
+In `step` observations, a channel of camera `cam` is passed as `{cam}.{channel}` (e.g. "front.depth").
+"""
+
+import numpy as np
+import PIL.Image
+import torch
+
+# Isaac Lab camera data type of each channel
+CHANNEL_DATA_TYPES = {"depth": "distance_to_image_plane", "segmentation": "instance_id_segmentation_fast"}
+DEPTH_ENCODINGS = ["uint16", "float16"]
+UINT16_MAX = np.iinfo(np.uint16).max
+# Lossless video encoding of channels
+CHANNEL_VCODEC = "ffv1"
+CHANNEL_PIX_FMT = "gray16le"
+
+
+def channel_feature(
+    channel: str,
+    shape: tuple[int, int],
+    use_video: bool = True,
+    depth_encoding: str = "uint16",
+    depth_scale: float = 0.001,
+) -> dict:
+    """
+    Dataset feature of a camera channel.
+
+    Args:
+        channel: "depth" or "segmentation".
+        shape: (height, width) of the camera.
+        use_video: Store the channel as (lossless) videos instead of images.
+        depth_encoding: "uint16" (scaled integers) or "float16".
+        depth_scale: Metres per unit of the "uint16" depth encoding.
+    """
+    if channel not in CHANNEL_DATA_TYPES:
+        raise ValueError(f"Unknown camera channel '{channel}', expected one of {list(CHANNEL_DATA_TYPES)}.")
+    spec = {"type": channel}
+    if channel == "depth":
+        if depth_encoding not in DEPTH_ENCODINGS:
+            raise ValueError(f"Unknown depth encoding '{depth_encoding}', expected one of {DEPTH_ENCODINGS}.")
+        spec["encoding"] = depth_encoding
+        if depth_encoding == "uint16":
+            spec["scale"] = depth_scale
+    return {
+        "dtype": "video" if use_video else "image",
+        "shape": (*shape, 1),
+        "names": ["height", "width", "channels"],
+        "channel": spec,
+    }
+
+
+def channel_specs(features: dict[str, dict]) -> dict[str, dict]:
+    """Channel spec of the camera channel features."""
+    return {key: ft["channel"] for key, ft in features.items() if "channel" in ft}
+
+
+def camera_feature_key(name: str, prefix: str = "observation") -> str:
+    """Feature of a camera observation: "front" -> observation.images.front, "front.depth" -> observation.depth.front."""
+    camera, _, channel = name.rpartition(".")
+    if camera and channel in CHANNEL_DATA_TYPES:
+        return f"{prefix}.{channel}.{camera}"
+    return f"{prefix}.images.{name}"
+
+
+def camera_observation_name(feature_key: str, prefix: str = "observation") -> str:
+    """Inverse of `camera_feature_key`."""
+    kind, _, camera = feature_key.removeprefix(f"{prefix}.").partition(".")
+    return camera if kind == "images" else f"{camera}.{kind}"
+
+
+def encode_channel(values: np.ndarray, channel: dict) -> np.ndarray:
+    """Encode a (H, W, 1), (1, H, W) or (H, W) frame of a channel into a (H, W) uint16 image."""
+    values = np.asarray(values).squeeze()
+    if channel["type"] == "segmentation":
+        if values.size and (values.min() < 0 or values.max() > UINT16_MAX):
+            raise ValueError(f"Segmentation ids must be in [0, {UINT16_MAX}], got [{values.min()}, {values.max()}].")
+        return values.astype(np.uint16)
+    if channel["encoding"] == "float16":
+        return values.astype(np.float16).view(np.uint16)
+    # Unknown depth (nan) is 0, out of range depth (including inf) is clipped
+    scaled = np.nan_to_num(values.astype(np.float32) / channel["scale"], nan=0.0, posinf=UINT16_MAX)
+    return np.rint(scaled).clip(0, UINT16_MAX).astype(np.uint16)
+
+
+def decode_channel(values: np.ndarray | torch.Tensor, channel: dict) -> np.ndarray | torch.Tensor:
+    """Decode stored 16-bit values (of any integer dtype) to float32 metres (depth) or int64 ids (segmentation)."""
+    if isinstance(values, torch.Tensor):
+        return torch.from_numpy(decode_channel(values.numpy(), channel))
+    if channel["type"] == "segmentation":
+        return values.astype(np.int64)
+    if channel["encoding"] == "float16":
+        return values.astype(np.uint16).view(np.float16).astype(np.float32)
+    return values.astype(np.float32) * np.float32(channel["scale"])
+
+
+def load_channel_image(fpath, channel: dict) -> np.ndarray:
+    """Load and decode a 16-bit channel image as a (1, H, W) array."""
+    with PIL.Image.open(fpath) as img:
+        values = np.array(img).astype(np.int32)
+    return decode_channel(values[None], channel)
@@ -15,6 +15,7 @@
 # limitations under the License.
 import numpy as np
 
+from .camera_channels import load_channel_image
 from .utils import load_image_as_numpy
 
 
@@ -72,6 +73,15 @@ def sample_images(image_paths: list[str]) -> np.ndarray:
     return images
 
 
+def sample_channel_images(image_paths: list[str], channel: dict) -> np.ndarray:
+    """Sample the 16-bit images of a depth or segmentation channel, decoded (see `camera_channels`)."""
+    images = [
+        auto_downsample_height_width(load_channel_image(image_paths[idx], channel))
+        for idx in sample_indices(len(image_paths))
+    ]
+    return np.stack(images)
+
+
 def get_feature_stats(array: np.ndarray, axis: tuple, keepdims: bool) -> dict[str, np.ndarray]:
     return {
         "min": np.min(array, axis=axis, keepdims=keepdims),
@@ -89,6 +99,11 @@ def compute_episode_stats(episode_data: dict[str, list[str] | np.ndarray], featu
             continue
         if features[key]["dtype"] == "string":
             continue  # HACK: we should receive np.arrays of strings
+        elif "channel" in features[key]:
+            # Depth (metres) and segmentation ids are not normalized like colors
+            ep_ft_array = sample_channel_images(data, features[key]["channel"])
+            axes_to_reduce = (0, 2, 3)
+            keepdims = True
         elif features[key]["dtype"] in ["image", "video"]:
             ep_ft_array = sample_images(data)  # data is a list of image paths
             axes_to_reduce = (0, 2, 3)  # keep channel dim
@@ -101,7 +116,11 @@ def compute_episode_stats(episode_data: dict[str, list[str] | np.ndarray], featu
         ep_stats[key] = get_feature_stats(ep_ft_array, axis=axes_to_reduce, keepdims=keepdims)
 
         # finally, we normalize and remove batch dim for images
-        if features[key]["dtype"] in ["image", "video"]:
+        if "channel" in features[key]:
+            ep_stats[key] = {
+                k: v if k == "count" else np.squeeze(v, axis=0).astype(np.float64) for k, v in ep_stats[key].items()
+            }
+        elif features[key]["dtype"] in ["image", "video"]:
             ep_stats[key] = {
                 k: v if k == "count" else np.squeeze(v / 255.0, axis=0) for k, v in ep_stats[key].items()
             }
@@ -17,12 +17,23 @@ from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any
 
+import numpy as np
 import torch
+import torch.nn.functional as F
 
+from .camera_channels import CHANNEL_DATA_TYPES, camera_feature_key, camera_observation_name, channel_feature
 from .control_utils import sanity_check_dataset_resume
+from .export_webdataset import WebDatasetSink
+from .frame_schema import FrameSchema
 from .image_writer import safe_stop_image_writer
 from .lerobot_dataset import LeRobotDataset
-from .utils import build_dataset_frame, hw_to_dataset_features
+from .online_buffer import OnlineBuffer
+from .telemetry import Telemetry
+from .utils import build_dataset_frame, hw_to_dataset_features, is_camera_frame_due
+from .video_utils import VIDEO_ENCODING_KEY
+
+# Feature of the packed sim state (see `SimStateBuffer`) the cameras of a frame are rendered at
+SIM_STATE_KEY = "observation.sim_state"
 
 
 @dataclass
@@ -36,6 +47,19 @@ class DatasetRecordConfig:
     robot_type: str
     # A name and camera resolution in (width, height) tuple
     cameras: dict[str, tuple[int, int]] = field(default_factory=dict)
+    # Record rate of cameras that render slower than `fps` (e.g. a sensor with `update_period=0.1` -> 10).
+    # Only their fresh frames are written and encoded. Cameras not listed here are recorded at every frame.
+    camera_fps: dict[str, int] = field(default_factory=dict)
+    # Extra channels recorded for some cameras ("depth", "segmentation"), stored losslessly as 16-bit images or
+    # FFV1 videos (see `camera_channels`). They are passed to `step` as `{camera}.{channel}` observations.
+    camera_channels: dict[str, list[str]] = field(default_factory=dict)
+    # Depth encoding: "uint16" (units of `depth_scale` metres, millimetres by default) or "float16" (metres).
+    depth_encoding: str = "uint16"
+    depth_scale: float = 0.001
+    # Names of the packed sim state columns (see `SimStateBuffer.names`) recorded with every frame as
+    # `observation.sim_state`, so that cameras can be rendered afterwards by a replay (see `replay`).
+    # Set to None to not record the sim state.
+    sim_state_names: list[str] | None = None
     # Root directory where the dataset will be stored (e.g. 'dataset/path').
     root: str | None = None
     # Limit the frames per second.
@@ -48,6 +72,10 @@ class DatasetRecordConfig:
     num_episodes: int = 50
     # Encode frames in the dataset into video
     video: bool = True
+    # Compact storage of numeric features in the parquet files, by feature name, e.g.
+    # {"observation.state": {"dtype": "float16"}, "action": int16_storage(-3.2, 3.2)}. See `quantization`.
+    # Stats are still computed in full precision, and values are decoded back to float32 on read.
+    feature_storage: dict[str, dict] = field(default_factory=dict)
     # Upload dataset to Hugging Face hub.
     push_to_hub: bool = False
     # Upload on private repository on the Hugging Face hub.
@@ -58,6 +86,7 @@ class DatasetRecordConfig:
     # set to ≥1 to use subprocesses, each using threads to write images. The best number of processes
     # and threads depends on your system. We recommend 4 threads per camera with 0 processes.
     # If fps is unstable, adjust the thread count. If still unstable, try using 1 or more subprocesses.
+    # `domin.autotune` can search for them (together with `num_envs`) on the actual workload.
     num_image_writer_processes: int = 0
     # Number of threads writing the frames as png images on disk, per camera.
     # Too many threads might cause unstable
@@ -67,12 +96,64 @@ class DatasetRecordConfig:
 
     num_envs: int = 1
 
+    # Directory of an `OnlineBuffer` that every completed episode is also appended to, so that a separate
+    # training process can tail it while generation is still running. Set to None to disable streaming.
+    online_buffer_dir: str | None = None
+    # Maximum number of frames kept in the online buffer (oldest episodes are overwritten first).
+    online_buffer_capacity: int = 100_000
+    # Camera frames are downscaled to this (width, height) resolution before being streamed.
+    online_buffer_image_size: tuple[int, int] = (96, 96)
+
+    # Cap (in bytes) of the memory used by the buffers of in-flight episodes. Above it, the numeric features of
+    # the oldest buffers are spilled to memory-mapped files in `buffer_spill_dir` (a temporary directory if None).
+    max_buffer_bytes: int | None = None
+    buffer_spill_dir: str | None = None
+
+    # Directory where saved episodes are also packed into WebDataset-style tar shards by background processes,
+    # so they are ready when recording ends. Set to None to disable the export.
+    webdataset_dir: str | None = None
+    # Target size (in bytes) of a tar shard.
+    webdataset_shard_bytes: int = 1 << 30
+    # Number of processes writing tar shards.
+    webdataset_num_workers: int = 2
+
+    # Directory where phase timings, counters and gauges are exported (`telemetry.jsonl` and `telemetry.prom`).
+    # Set to None to only use them for the progress summary.
+    telemetry_dir: str | None = None
+    # Minimum number of seconds between two telemetry exports.
+    telemetry_export_interval_s: float = 10.0
+    # Minimum number of seconds between two progress summaries printed while recording.
+    progress_interval_s: float = 10.0
+    # Check the shapes and dtypes of every Nth batch passed to `step` against the features (1 checks all of them).
+    # The batches in between are trusted, which saves validating every frame when the schema is fixed.
+    validate_every: int = 10
+    # `encode_video_frames` arguments (vcodec, g, crf, fast_decode) of the camera videos, saved in info.json as
+    # `video_encoding` (see `video_benchmark`). None keeps the preset already in info.json, or the defaults.
+    video_encoding: dict | None = None
+
     def __post_init__(self):
         if self.default_task is None:
             raise ValueError(
                 "You need to provide a task as argument in `default_task`."
             )
 
+        for cam, channels in self.camera_channels.items():
+            if cam not in self.cameras:
+                raise ValueError(f"`camera_channels` has channels for unknown camera '{cam}'.")
+            for channel in channels:
+                if channel not in CHANNEL_DATA_TYPES:
+                    raise ValueError(
+                        f"Unknown channel '{channel}' for camera '{cam}', expected one of {list(CHANNEL_DATA_TYPES)}."
+                    )
+
+        for cam, cam_fps in self.camera_fps.items():
+            if cam not in self.cameras:
+                raise ValueError(f"`camera_fps` has a rate for unknown camera '{cam}'.")
+            if not 0 < cam_fps <= self.fps:
+                raise ValueError(
+                    f"The rate of camera '{cam}' ({cam_fps}) must be in (0, fps={self.fps}]."
+                )
+
 
 class DatasetRecord:
     def __init__(self, cfg: DatasetRecordConfig):
@@ -86,21 +167,42 @@ class DatasetRecord:
         self.action_features = {**self.motor_features}
         self.features = {
             **hw_to_dataset_features(
-                self.observation_features, "observation", cfg.video
+                self.observation_features, "observation", cfg.video, cfg.feature_storage
             ),
-            **hw_to_dataset_features(self.action_features, "action", cfg.video),  # type: ignore
+            **hw_to_dataset_features(self.action_features, "action", cfg.video, cfg.feature_storage),  # type: ignore
         }
+        for cam, channels in cfg.camera_channels.items():
+            width, height = cfg.cameras[cam]
+            for channel in channels:
+                self.features[camera_feature_key(f"{cam}.{channel}")] = channel_feature(
+                    channel, (height, width), cfg.video, cfg.depth_encoding, cfg.depth_scale
+                )
+        if cfg.sim_state_names is not None:
+            self.features[SIM_STATE_KEY] = {
+                "dtype": "float32",
+                "shape": (len(cfg.sim_state_names),),
+                "names": list(cfg.sim_state_names),
+            }
+        for cam, cam_fps in cfg.camera_fps.items():
+            if cam_fps < cfg.fps:
+                self.features[f"observation.images.{cam}"]["fps"] = cam_fps
+                for channel in cfg.camera_channels.get(cam, []):
+                    self.features[camera_feature_key(f"{cam}.{channel}")]["fps"] = cam_fps
 
         self.current_task = None
+        self.current_tasks = None
+        self.current_task_ids = None
 
         if cfg.resume_recording and os.path.exists(cfg.root):
-            self.dataset = LeRobotDataset(cfg.repo_id, root=cfg.root)
-            if cfg.cameras:
-                self.dataset.start_image_writer(
-                    num_processes=cfg.num_image_writer_processes,
-                    num_threads=cfg.num_image_writer_threads_per_camera
-                    * len(cfg.cameras),
-                )
+            self.dataset = LeRobotDataset.resume(
+                cfg.repo_id,
+                root=cfg.root,
+                image_writer_processes=cfg.num_image_writer_processes,
+                image_writer_threads=cfg.num_image_writer_threads_per_camera
+                * len(cfg.cameras)
+                if cfg.cameras
+                else 0,
+            )
             sanity_check_dataset_resume(
                 self.dataset, cfg.robot_type, cfg.fps, self.features
             )
@@ -123,10 +225,53 @@ class DatasetRecord:
         self.active_episodes = {}  # env_idx -> episode_index
         self.pending_rerecords = {}  # env_idx -> episode_index (to be retried in next story)
         self.episode_counter = 0
-        self.total_rerecords = 0
+        # Totals carry over the previous runs of a resumed dataset
+        self.total_rerecords = self.dataset.meta.info.get("total_rerecords", 0)
+        self.previous_time_s = self.dataset.meta.info.get("total_time_s", 0.0)
         self.recording_start_time = time.time()
         self.steps_in_story = 0
 
+        if cfg.video_encoding is not None:
+            self.dataset.save_metadata(VIDEO_ENCODING_KEY, dict(cfg.video_encoding))
+
+        self.frame_schema = FrameSchema(self.dataset.features, validate_every=cfg.validate_every)
+        self.telemetry = Telemetry(cfg.telemetry_dir, export_interval_s=cfg.telemetry_export_interval_s)
+        self.dataset.telemetry = self.telemetry
+        self.dataset.max_buffer_bytes = cfg.max_buffer_bytes
+        self.dataset.spill_dir = cfg.buffer_spill_dir
+        self.last_progress_time = time.perf_counter()
+
+        self.online_buffer = None
+        self.stream_buffers = {}  # episode_index -> {key: list of per-frame arrays}
+        self.stream_frames = {}  # (camera, env_idx) -> last fresh downscaled frame
+        if cfg.online_buffer_dir is not None:
+            self.online_buffer = OnlineBuffer(
+                cfg.online_buffer_dir,
+                data_spec=self._online_buffer_spec(),
+                buffer_capacity=cfg.online_buffer_capacity,
+                fps=cfg.fps,
+            )
+
+        self.webdataset_sink = None
+        if cfg.webdataset_dir is not None:
+            self.webdataset_sink = WebDatasetSink(
+                self.dataset.meta,
+                cfg.webdataset_dir,
+                max_shard_bytes=cfg.webdataset_shard_bytes,
+                num_workers=cfg.webdataset_num_workers,
+            )
+
+    def _online_buffer_spec(self) -> dict[str, dict]:
+        width, height = self.cfg.online_buffer_image_size
+        num_joints = len(self.cfg.joint_names)
+        spec = {
+            "observation.state": {"shape": (num_joints,), "dtype": np.dtype("float32")},
+            "action": {"shape": (num_joints,), "dtype": np.dtype("float32")},
+        }
+        for cam in self.cfg.cameras:
+            spec[f"observation.images.{cam}"] = {"shape": (height, width, 3), "dtype": np.dtype("uint8")}
+        return spec
+
     def __enter__(self):
         print("Started Recording")
         if self.cfg.resume_recording:
@@ -138,9 +283,14 @@ class DatasetRecord:
         self.finish_episodes(list(self.active_episodes.keys()))
 
         # Save metrics
-        total_time = time.time() - self.recording_start_time
+        total_time = self.previous_time_s + time.time() - self.recording_start_time
         self.save_metadata("total_time_s", total_time)
         self.save_metadata("total_rerecords", self.total_rerecords)
+        if self.webdataset_sink is not None:
+            with self.telemetry.timer("webdataset.close"):
+                self.webdataset_sink.close()
+        self.report_progress(force=True)
+        self.telemetry.export()
 
         if exc_type:
             print(f"Exception: {exc_type}, {exc_value}")
@@ -148,25 +298,64 @@ class DatasetRecord:
 
         return False
 
-    def new_story(self, tasks: list[str] | None = None):
-        self.current_tasks = tasks  # env_idx -> task str
-
+    def new_story(
+        self,
+        tasks: list[str] | None = None,
+        episode_indices: list[int] | None = None,
+        episode_limit: int | None = None,
+    ):
+        """
+        Start a new batch of episodes, one per env.
+
+        Args:
+            tasks: Task of each env (see `set_tasks`).
+            episode_indices: Episode index of each env, instead of the pending rerecords and next free indices
+                (e.g. to replay the episodes of another dataset). Envs past the end of the list stay idle.
+            episode_limit: New episode indices are only handed out below it, so that exactly this many episodes
+                are recorded. Envs without a pending re-record then stay idle.
+        """
         # Finish any remaining active episodes from previous story
         if self.steps_in_story and self.active_episodes:
             self.finish_episodes(list(self.active_episodes.keys()))
-
-        print(f"Starting new story with {self.cfg.num_envs} episodes")
+        self.set_tasks(tasks)
+
+        self.telemetry.count("stories")
+        if episode_indices is not None:
+            if len(episode_indices) > self.cfg.num_envs:
+                raise ValueError(f"Got {len(episode_indices)} episode indices for {self.cfg.num_envs} envs.")
+            self.active_episodes.update(enumerate(episode_indices))
+            self.episode_counter = max([self.episode_counter, *(i + 1 for i in episode_indices)])
+            return
         for env_idx in range(self.cfg.num_envs):
             # Check if this env has a pending re-record
             if env_idx in self.pending_rerecords:
                 episode_index = self.pending_rerecords.pop(env_idx)
-                print(f"Env {env_idx}: Retrying episode {episode_index}")
+                self.telemetry.count("retries")
+            elif episode_limit is not None and self.episode_counter >= episode_limit:
+                continue
             else:
                 episode_index = self.episode_counter
                 self.episode_counter += 1
 
             self.active_episodes[env_idx] = episode_index
 
+    def set_tasks(self, tasks: list[str | None] | None = None):
+        """
+        Set the task of each env for the frames recorded from now on (usually right after the envs are reset).
+        Tasks are interned to their task_index once here, so frames only carry an integer id.
+
+        Args:
+            tasks: Task of each env. Envs without a task (None, or missing from a shorter list) record
+                `current_task`, or `default_task` if it isn't set.
+        """
+        self.current_tasks = tasks  # env_idx -> task str
+        fallback = self.current_task if self.current_task is not None else self.cfg.default_task
+        tasks = list(tasks or [])
+        tasks += [None] * (self.cfg.num_envs - len(tasks))
+        self.current_task_ids = [  # env_idx -> task_index
+            self.dataset.intern_task(fallback if task is None else task) for task in tasks
+        ]
+
     def finish_episodes(self, env_idxs: int | list[int] | torch.Tensor):
         if isinstance(env_idxs, int):
             env_idxs = [env_idxs]
@@ -178,10 +367,32 @@ class DatasetRecord:
                 continue
 
             episode_index = self.active_episodes[env_idx]
-            print(f"Saving episode {episode_index} (env {env_idx})")
             # TODO: DELETE IMAGES?
-            self.dataset.save_episode(episode_index)
+            with self.telemetry.timer("save_episode"):
+                self.dataset.save_episode(episode_index)
+            self._stream_episode(episode_index)
+            if self.webdataset_sink is not None:
+                self.webdataset_sink.add_episode(episode_index)
             del self.active_episodes[env_idx]
+            self.telemetry.count("episodes_saved")
+
+        self.report_progress()
+
+    def _stream_episode(self, episode_index: int):
+        """Append a completed episode to the online buffer (if streaming is enabled)."""
+        stream_buffer = self.stream_buffers.pop(episode_index, None)
+        if self.online_buffer is None or not stream_buffer:
+            return
+
+        length = len(stream_buffer["action"])
+        frame_index = np.arange(length)
+        data = {key: np.stack(frames) for key, frames in stream_buffer.items()}
+        # `add_data` expects indices starting from 0 and shifts them to follow the data already buffered.
+        data[OnlineBuffer.INDEX_KEY] = frame_index.copy()
+        data[OnlineBuffer.EPISODE_INDEX_KEY] = np.zeros(length, dtype=np.int64)
+        data[OnlineBuffer.FRAME_INDEX_KEY] = frame_index
+        data[OnlineBuffer.TIMESTAMP_KEY] = frame_index / self.cfg.fps
+        self.online_buffer.add_data(data)
 
     def rerecord(self, env_idxs: int | list[int] | torch.Tensor):
         if isinstance(env_idxs, int):
@@ -198,6 +409,7 @@ class DatasetRecord:
                 self.dataset.image_writer.wait_until_done()
 
             self.dataset.clear_episode_buffer(episode_index)
+            self.stream_buffers.pop(episode_index, None)
 
             # Schedule for next story
             self.pending_rerecords[env_idx] = episode_index
@@ -206,70 +418,228 @@ class DatasetRecord:
             del self.active_episodes[env_idx]
 
             self.total_rerecords += 1
-            print(
-                f"Rerecording env {env_idx}: scheduled retry of ep={episode_index} in next story"
-            )
+            self.telemetry.count("rerecords")
+
+        self.report_progress()
+
+    def report_progress(self, force: bool = False):
+        """
+        Print a one-line summary of the recording, at most every `progress_interval_s` seconds (unless
+        `force`), and export the telemetry when it is due.
+        """
+        self.telemetry.maybe_export()
+        now = time.perf_counter()
+        if not force and now - self.last_progress_time < self.cfg.progress_interval_s:
+            return
+        self.last_progress_time = now
+
+        elapsed = time.time() - self.recording_start_time
+        save_time = self.telemetry.histograms.get("save_episode")
+        line = (
+            f"[{elapsed:.0f}s] {self.dataset.num_episodes}/{self.cfg.num_episodes} episodes, "
+            f"{self.total_rerecords} rerecords, {self.telemetry.counters['frames'] / max(elapsed, 1e-9):.1f} frames/s"
+        )
+        if save_time is not None:
+            line += f", save p50 {save_time.summary()['p50']:.2f}s"
+        queue_size = self.telemetry.histograms.get("image_writer.queue_size")
+        if queue_size is not None:
+            line += f", image queue max {queue_size.summary()['max']:.0f}"
+        print(line)
 
     def save_metadata(self, key: str, value: Any):
         self.dataset.save_metadata(key, value)
+
+    def _next_frame_index(self, episode_index: int) -> int:
+        episode_buffer = self.dataset.episode_buffers.get(episode_index)
+        return 0 if episode_buffer is None else episode_buffer["size"]
+
+    def _camera_due(self, cam: str, frame_index: int) -> bool:
+        # The channels of a camera ("cam.depth") are rendered with its frames
+        cam_fps = self.dataset.features[camera_feature_key(cam)].get("fps")
+        return is_camera_frame_due(frame_index, self.cfg.fps, cam_fps)
+
+    def cameras_due(self) -> list[str]:
+        """
+        Cameras with a fresh frame to record at the next `step`, for at least one active env.
+        Observations of the other cameras don't need to be read (or passed to `step`).
+        """
+        frame_indices = {self._next_frame_index(ep) for ep in self.active_episodes.values()}
+        return [
+            cam
+            for cam in self.cfg.cameras
+            if any(self._camera_due(cam, frame_index) for frame_index in frame_indices)
+        ]
     
+    @property
+    def active_env_ids(self) -> list[int]:
+        """
+        Sorted indices of the envs whose episode is still being recorded.
+        """
+        return sorted(self.active_episodes)
+
     @safe_stop_image_writer
     def step(
         self,
         motor_obs: torch.Tensor,
         action: torch.Tensor,
         cam_obs: dict[str, torch.Tensor] = {},
+        env_ids: list[int] | torch.Tensor | None = None,
+        sim_state: torch.Tensor | None = None,
     ):
-        joint_names = self.cfg.joint_names
+        """
+        Record one frame for every active env of the batch.
+
+        Args:
+            motor_obs: (B, num_joints) joint observations.
+            action: (B, num_joints) actions.
+            cam_obs: Camera name -> (B, H, W, C) frames, and `{camera}.{channel}` -> (B, H, W, 1) depth (metres)
+                or segmentation ids for the `camera_channels`. Cameras without a fresh frame (see `cameras_due`)
+                can be left out.
+            env_ids: Env index of each of the B rows. Defaults to all `num_envs` envs. Passing only the rows of
+                `active_env_ids` avoids slicing the full batch here.
+            sim_state: (B, D) packed sim states (see `SimStateBuffer`), required with `sim_state_names`.
+        """
         num_envs = self.cfg.num_envs
 
-        # Validate shapes
-        if motor_obs.shape[0] != num_envs:
-            # Try to unsqueeze if num_envs is 1 and input is not batched
-            if num_envs == 1 and motor_obs.ndim == 1:
-                motor_obs = motor_obs.unsqueeze(0)
-                action = action.unsqueeze(0)
-                cam_obs = {k: v.unsqueeze(0) for k, v in cam_obs.items()}
-            else:
+        if env_ids is None:
+            # Validate shapes
+            if motor_obs.shape[0] != num_envs:
+                # Try to unsqueeze if num_envs is 1 and input is not batched
+                if num_envs == 1 and motor_obs.ndim == 1:
+                    motor_obs = motor_obs.unsqueeze(0)
+                    action = action.unsqueeze(0)
+                    if sim_state is not None:
+                        sim_state = sim_state.unsqueeze(0)
+                    cam_obs = {k: v.unsqueeze(0) for k, v in cam_obs.items()}
+                else:
+                    raise ValueError(
+                        f"Expected batch size {num_envs}, got {motor_obs.shape[0]}"
+                    )
+            env_ids = list(range(num_envs))
+        else:
+            env_ids = env_ids.tolist() if isinstance(env_ids, torch.Tensor) else list(env_ids)
+            if motor_obs.shape[0] != len(env_ids):
                 raise ValueError(
-                    f"Expected batch size {num_envs}, got {motor_obs.shape[0]}"
+                    f"Expected batch size {len(env_ids)} (len(env_ids)), got {motor_obs.shape[0]}"
                 )
 
-        for env_idx in range(num_envs):
-            if env_idx not in self.active_episodes:
+        # Keep the rows of active envs only, and slice on device before anything is transferred to the host
+        rows = [row for row, env_idx in enumerate(env_ids) if env_idx in self.active_episodes]
+        if not rows:
+            return
+        with self.telemetry.timer("dataset.step"):
+            self._step_rows(motor_obs, action, cam_obs, env_ids, rows, sim_state)
+
+        self.telemetry.count("frames", len(rows))
+        if self.dataset.image_writer is not None:
+            queue_size = self.dataset.image_writer.queue_size()
+            if queue_size is not None:
+                self.telemetry.observe("image_writer.queue_size", queue_size)
+        self.telemetry.maybe_export()
+
+    def _step_rows(
+        self,
+        motor_obs: torch.Tensor,
+        action: torch.Tensor,
+        cam_obs: dict[str, torch.Tensor],
+        env_ids: list[int],
+        rows: list[int],
+        sim_state: torch.Tensor | None = None,
+    ):
+        """Record the given rows of a batch (see `step`), whose env indices are `env_ids`."""
+        joint_names = self.cfg.joint_names
+        env_ids = [env_ids[row] for row in rows]
+        frame_indices = [self._next_frame_index(self.active_episodes[env_idx]) for env_idx in env_ids]
+        motor_obs = _select_rows(motor_obs, rows).cpu().numpy().astype(np.float32, copy=False)
+        action = _select_rows(action, rows).cpu().numpy().astype(np.float32, copy=False)
+        batch = {
+            key: value
+            for key, value in [("observation.state", motor_obs), ("action", action)]
+            if key in self.features
+        }
+        if sim_state is not None and SIM_STATE_KEY in self.features:
+            batch[SIM_STATE_KEY] = _select_rows(sim_state, rows).cpu().numpy().astype(np.float32, copy=False)
+
+        # Stale frames of rate-decoupled cameras are neither transferred nor recorded
+        cam_rows = {}  # camera -> {row: frame}
+        stream_cam_obs = {}
+        for k, v in cam_obs.items():
+            due_rows = [
+                i for i, frame_index in enumerate(frame_indices) if self._camera_due(k, frame_index)
+            ]
+            if not due_rows:
                 continue
+            frames = _select_rows(v, [rows[i] for i in due_rows])
+            batch[camera_feature_key(k)] = frames.cpu().numpy()
+            cam_rows[k] = dict(zip(due_rows, batch[camera_feature_key(k)]))
+            if self.online_buffer is not None and k in self.cfg.cameras:
+                width, height = self.cfg.online_buffer_image_size
+                stream_cam_obs[k] = dict(
+                    zip(due_rows, _downscale_frames(frames, height, width).cpu().numpy())
+                )
+
+        # The frames built from a validated (or trusted) batch aren't validated again one by one
+        if self.frame_schema.sample():
+            self.frame_schema.validate_batch(batch)
 
+        for i, env_idx in enumerate(env_ids):
             episode_index = self.active_episodes[env_idx]
 
             # Extract single env data
-            env_motor_obs = motor_obs[env_idx].cpu().numpy()
-            env_action = action[env_idx].cpu().numpy()
-            env_cam_obs = {k: v[env_idx].cpu().numpy() for k, v in cam_obs.items()}
+            env_motor_obs = motor_obs[i]
+            env_action = action[i]
+            env_cam_obs = {k: frames[i] for k, frames in cam_rows.items() if i in frames}
 
             observation = {
                 **{x[0]: x[1] for x in zip(joint_names, env_motor_obs)},
                 **env_cam_obs,
             }
+            observation_features = {
+                key: ft
+                for key, ft in self.features.items()
+                if key != SIM_STATE_KEY
+                and (ft["dtype"] not in ["image", "video"] or camera_observation_name(key) in env_cam_obs)
+            }
             action_dict = {x[0]: x[1] for x in zip(joint_names, env_action)}
 
             observation_frame = build_dataset_frame(
-                self.features, observation, prefix="observation"
+                observation_features, observation, prefix="observation"
             )
             action_frame = build_dataset_frame(
                 self.features, action_dict, prefix="action"
             )
             frame = {**observation_frame, **action_frame}
+            if SIM_STATE_KEY in batch:
+                frame[SIM_STATE_KEY] = batch[SIM_STATE_KEY][i]
 
-            # Determine task
-            task = self.cfg.default_task
-            if (
-                hasattr(self, "current_tasks")
-                and self.current_tasks
-                and env_idx < len(self.current_tasks)
-            ):
-                task = self.current_tasks[env_idx]
-            elif self.current_task is not None:
-                task = self.current_task
-
-            self.dataset.add_frame(frame, task=task, episode_index=episode_index)
+            self.dataset.add_frame(
+                frame, task=self.current_task_ids[env_idx], episode_index=episode_index, validate=False
+            )
+
+            if self.online_buffer is not None:
+                stream_buffer = self.stream_buffers.setdefault(episode_index, {})
+                stream_buffer.setdefault("observation.state", []).append(env_motor_obs.astype(np.float32))
+                stream_buffer.setdefault("action", []).append(env_action.astype(np.float32))
+                # The buffer holds an image per frame: stale cameras repeat their last fresh image.
+                for k in self.cfg.cameras:
+                    if k in env_cam_obs:
+                        self.stream_frames[k, env_idx] = stream_cam_obs[k][i].copy()
+                    stream_buffer.setdefault(f"observation.images.{k}", []).append(
+                        self.stream_frames[k, env_idx]
+                    )
         self.steps_in_story = 0
+
+
+def _select_rows(batch: torch.Tensor, rows: list[int]) -> torch.Tensor:
+    """Rows of a batch, gathered on its device (no copy if all the rows are selected in order)."""
+    if rows == list(range(batch.shape[0])):
+        return batch
+    return batch[torch.as_tensor(rows, device=batch.device)]
+
+
+def _downscale_frames(frames: torch.Tensor, height: int, width: int) -> torch.Tensor:
+    """Downscale a batch of (N, H, W, C) uint8 frames on their current device."""
+    if frames.shape[1:3] == (height, width):
+        return frames
+    resized = F.interpolate(frames.permute(0, 3, 1, 2).float(), size=(height, width), mode="area")
+    return resized.round().clamp(0, 255).to(torch.uint8).permute(0, 2, 3, 1)
@@ -0,0 +1,108 @@
+# Copyright 2026 Nimit Shah. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Memory accounting and spill-to-disk storage of in-flight episode buffers.
+
+Numeric features of an episode buffer are lists with one small array (or scalar) per frame. When the buffers of
+all in-flight episodes use more than a cap, the lists of the oldest ones are replaced with `SpilledColumn`s:
+list-like columns backed by a memory-mapped temporary file, that later frames are appended to directly.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Features computed when an episode is saved, never buffered per frame
+SAVE_TIME_KEYS = ("index", "episode_index", "task_index")
+
+
+class SpilledColumn:
+    """
+    Per-frame values of a numeric feature, stored in a memory-mapped file that grows (doubling its capacity)
+    as frames are appended.
+    """
+
+    def __init__(self, path: str | Path, values: list, dtype: str):
+        if not values:
+            raise ValueError("Only columns with at least one value can be spilled.")
+        self.path = Path(path)
+        self.dtype = np.dtype(dtype)
+        # Shape of a single frame's value, as `np.stack` would see it
+        self.shape = np.shape(values[0])
+        self.size = 0
+        self.capacity = 0
+        self._data = None
+        self._reserve(max(2 * len(values), 64))
+        for value in values:
+            self.append(value)
+
+    def _reserve(self, capacity: int):
+        if self._data is not None:
+            self._data.flush()
+            del self._data
+        row_bytes = self.dtype.itemsize * int(np.prod(self.shape, dtype=np.int64))
+        with open(self.path, "ab") as f:
+            f.truncate(capacity * row_bytes)
+        self._data = np.memmap(self.path, dtype=self.dtype, mode="r+", shape=(capacity, *self.shape))
+        self.capacity = capacity
+
+    def append(self, value):
+        if self.size == self.capacity:
+            self._reserve(2 * self.capacity)
+        self._data[self.size] = value
+        self.size += 1
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __getitem__(self, idx):
+        return self._data[: self.size][idx]
+
+    def __iter__(self):
+        return iter(self._data[: self.size])
+
+    def __array__(self, dtype=None, copy=None):
+        # Read back into memory (e.g. to save the episode)
+        return np.array(self._data[: self.size], dtype=dtype)
+
+    def close(self):
+        """Delete the backing file."""
+        if self._data is not None:
+            del self._data
+            self._data = None
+        if self.path.exists():
+            os.remove(self.path)
+
+
+def spillable_keys(features: dict) -> list[str]:
+    """Numeric features buffered per frame, which can be spilled to disk."""
+    return [
+        key
+        for key, ft in features.items()
+        if key not in SAVE_TIME_KEYS and ft["dtype"] not in ["image", "video"]
+    ]
+
+
+def value_nbytes(value) -> int:
+    """Memory held by one buffered value, including the Python object and list slot overheads."""
+    return sys.getsizeof(value) + 8
+
+
+def stack_frames(values) -> np.ndarray:
+    """Stack the buffered values of a feature into a single array."""
+    if isinstance(values, SpilledColumn):
+        return np.asarray(values)
+    return np.stack(values)
@@ -0,0 +1,276 @@
+# Copyright 2026 Nimit Shah. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Export a LeRobot dataset to WebDataset-style tar shards, for trainers that stream from object stores.
+
+Each shard holds whole episodes. An episode is stored as consecutive members sharing the `episode_XXXXXX` key:
+its parquet file (frames, with images embedded when the dataset doesn't use videos), one mp4 per video key and
+a JSON file with its metadata (tasks, length, stats, fps...). Shards are filled up to `max_shard_bytes` and written
+by a process pool; `index.json` lists the episodes and frames of each shard.
+
+The same `WebDatasetSink` runs in the background while recording (see `webdataset_dir` in `DatasetRecordConfig`),
+so the shards are ready when generation ends.
+
+```
+python -m domin.dataset_builder.export_webdataset \
+    --repo-id nimit/dexterous \
+    --root datasets/dexterous \
+    --output-dir datasets/dexterous_wds \
+    --max-shard-mb 1024
+```
+
+Exports are incremental: episodes already listed in the index of `output_dir` are skipped.
+"""
+
+import argparse
+import io
+import json
+import multiprocessing as mp
+import os
+import tarfile
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+
+from .lerobot_dataset import LeRobotDatasetMetadata
+from .utils import serialize_dict
+
+INDEX_NAME = "index.json"
+SHARD_NAME = "shard-{shard_index:06d}.tar"
+TAR_BLOCK_SIZE = 512
+
+
+def episode_key(episode_index: int) -> str:
+    return f"episode_{episode_index:06d}"
+
+
+def _member_size(num_bytes: int) -> int:
+    # One header block, then the data padded to a whole number of blocks
+    return TAR_BLOCK_SIZE + -(-num_bytes // TAR_BLOCK_SIZE) * TAR_BLOCK_SIZE
+
+
+def episode_members(meta: LeRobotDatasetMetadata, episode_index: int) -> tuple[list[tuple[str, str]], bytes]:
+    """
+    List the files of an episode and build its metadata JSON.
+
+    Args:
+        meta: Metadata of the dataset the episode was saved to.
+        episode_index: Index of the episode.
+
+    Returns:
+        A tuple of the (name in the shard, path on disk) of the episode files, and the encoded JSON metadata.
+    """
+    key = episode_key(episode_index)
+    files = [(f"{key}.parquet", str(meta.root / meta.get_data_file_path(episode_index)))]
+    for vid_key in meta.video_keys:
+        files.append((f"{key}.{vid_key}.mp4", str(meta.root / meta.get_video_file_path(episode_index, vid_key))))
+
+    metadata = {
+        **meta.episodes[episode_index],
+        "fps": meta.fps,
+        "stats": serialize_dict(meta.episodes_stats[episode_index]),
+    }
+    return files, json.dumps(metadata).encode()
+
+
+def write_shard(path: str, episodes: list[tuple[str, list[tuple[str, str]], bytes]]) -> int:
+    """
+    Write a tar shard. It is written next to `path` then renamed, so readers never see a partial shard.
+
+    Args:
+        path: Path of the shard.
+        episodes: (key, files, JSON metadata) of each episode, as returned by `episode_members`.
+
+    Returns:
+        The size of the shard in bytes.
+    """
+    tmp_path = f"{path}.tmp"
+    with tarfile.open(tmp_path, "w", format=tarfile.USTAR_FORMAT) as tar:
+        for key, files, metadata in episodes:
+            for arcname, src in files:
+                tar.add(src, arcname=arcname, recursive=False)
+            info = tarfile.TarInfo(f"{key}.json")
+            info.size = len(metadata)
+            tar.addfile(info, io.BytesIO(metadata))
+    os.replace(tmp_path, path)
+    return os.path.getsize(path)
+
+
+class WebDatasetSink:
+    """
+    Pack saved episodes into size-bounded tar shards, written in the background by a process pool.
+
+    Episodes are added as they are saved. Once the pending ones reach `max_shard_bytes`, they are handed to a
+    worker as one shard. `close` writes the last (smaller) shard, waits for the workers and writes the index.
+    """
+
+    def __init__(
+        self,
+        meta: LeRobotDatasetMetadata,
+        output_dir: str | Path,
+        max_shard_bytes: int = 1 << 30,
+        num_workers: int = 4,
+        mp_context: str = "spawn",
+    ):
+        """
+        Args:
+            meta: Metadata of the dataset being exported.
+            output_dir: Directory of the shards and their index. Episodes already in its index are skipped.
+            max_shard_bytes: Shards are closed once they reach this size. An episode is never split, so a single
+                episode bigger than this gets a shard of its own.
+            num_workers: Number of processes writing shards.
+            mp_context: Multiprocessing start method of the workers. Isaac Sim requires "spawn".
+        """
+        self.meta = meta
+        self.output_dir = Path(output_dir)
+        self.max_shard_bytes = max_shard_bytes
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+
+        self.shards = []
+        index_path = self.output_dir / INDEX_NAME
+        if index_path.exists():
+            self.shards = json.loads(index_path.read_text())["shards"]
+        self.exported = {ep_idx for shard in self.shards for ep_idx in shard["episodes"]}
+
+        self.pending = []  # (key, files, metadata) of the episodes of the next shard
+        self.pending_bytes = 0
+        self.futures: list[tuple[dict, Future]] = []
+        self.index = None
+        self.executor = ProcessPoolExecutor(max_workers=num_workers, mp_context=mp.get_context(mp_context))
+
+    def add_episode(self, episode_index: int) -> None:
+        if episode_index in self.exported:
+            return
+
+        files, metadata = episode_members(self.meta, episode_index)
+        num_bytes = sum(_member_size(os.path.getsize(src)) for _, src in files) + _member_size(len(metadata))
+        if self.pending and self.pending_bytes + num_bytes > self.max_shard_bytes:
+            self.flush()
+
+        self.pending.append((episode_key(episode_index), files, metadata))
+        self.pending_bytes += num_bytes
+        self.exported.add(episode_index)
+        if self.pending_bytes >= self.max_shard_bytes:
+            self.flush()
+
+    def flush(self) -> None:
+        """Hand the pending episodes to a worker as one shard."""
+        if not self.pending:
+            return
+
+        name = SHARD_NAME.format(shard_index=len(self.shards) + len(self.futures))
+        episodes = [int(key.removeprefix("episode_")) for key, _, _ in self.pending]
+        shard = {
+            "name": name,
+            "episodes": episodes,
+            "num_frames": sum(self.meta.episodes[ep_idx]["length"] for ep_idx in episodes),
+        }
+        future = self.executor.submit(write_shard, str(self.output_dir / name), self.pending)
+        self.futures.append((shard, future))
+        self.pending = []
+        self.pending_bytes = 0
+
+    def close(self) -> dict:
+        """
+        Write the remaining episodes, wait for the workers and write the index.
+
+        Returns:
+            The index: dataset info (fps, features, tasks) and the name, episodes, frames and size of each shard.
+        """
+        self.flush()
+        try:
+            for shard, future in self.futures:
+                shard["num_bytes"] = future.result()
+                self.shards.append(shard)
+        finally:
+            self.futures = []
+            self.executor.shutdown()
+
+        index = {
+            "codebase_version": self.meta.info["codebase_version"],
+            "fps": self.meta.fps,
+            "features": self.meta.features,
+            "tasks": self.meta.tasks,
+            "total_episodes": sum(len(shard["episodes"]) for shard in self.shards),
+            "total_frames": sum(shard["num_frames"] for shard in self.shards),
+            "shards": self.shards,
+        }
+        tmp_path = self.output_dir / f"{INDEX_NAME}.tmp"
+        tmp_path.write_text(json.dumps(index, indent=4))
+        os.replace(tmp_path, self.output_dir / INDEX_NAME)
+        self.index = index
+        return index
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+
+def export_webdataset(
+    meta: LeRobotDatasetMetadata,
+    output_dir: str | Path,
+    max_shard_bytes: int = 1 << 30,
+    num_workers: int = 4,
+    episodes: list[int] | None = None,
+) -> dict:
+    """
+    Export the episodes of a dataset to tar shards.
+
+    Args:
+        meta: Metadata of the dataset.
+        output_dir: Directory of the shards and their index.
+        max_shard_bytes: Target size of a shard.
+        num_workers: Number of processes writing shards.
+        episodes: Episodes to export (all of them if None).
+
+    Returns:
+        The shard index.
+    """
+    episodes = sorted(meta.episodes) if episodes is None else episodes
+    with WebDatasetSink(meta, output_dir, max_shard_bytes, num_workers) as sink:
+        for episode_index in episodes:
+            sink.add_episode(episode_index)
+    return sink.index
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repo-id", type=str, required=True, help="Name of the dataset.")
+    parser.add_argument("--root", type=Path, default=None, help="Local directory of the dataset.")
+    parser.add_argument("--output-dir", type=Path, required=True, help="Directory of the tar shards.")
+    parser.add_argument("--max-shard-mb", type=float, default=1024, help="Target size of a shard, in MB.")
+    parser.add_argument("--num-workers", type=int, default=4, help="Number of processes writing shards.")
+    parser.add_argument(
+        "--episodes", type=int, nargs="*", default=None, help="Episodes to export (all of them by default)."
+    )
+    args = parser.parse_args()
+
+    meta = LeRobotDatasetMetadata(args.repo_id, root=args.root)
+    index = export_webdataset(
+        meta,
+        args.output_dir,
+        max_shard_bytes=int(args.max_shard_mb * 1024 * 1024),
+        num_workers=args.num_workers,
+        episodes=args.episodes,
+    )
+    print(
+        f"Exported {index['total_episodes']} episodes ({index['total_frames']} frames) "
+        f"to {len(index['shards'])} shards in {args.output_dir}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# Copyright 2026 Nimit Shah. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Frame validation compiled once from the dataset features.
+
+`validate_frame` rebuilds feature sets and compares dtype strings for every frame. `FrameSchema` resolves the
+expected keys, dtypes and shapes once, so that checking a frame (or a whole batch of frames) is a few set and
+tuple comparisons. Detailed error messages are only built once a check has failed.
+"""
+
+import numpy as np
+import PIL.Image
+
+from .utils import DEFAULT_FEATURES, validate_frame
+
+
+class FrameSchema:
+    def __init__(self, features: dict[str, dict], validate_every: int = 1):
+        """
+        Args:
+            features: Dataset features.
+            validate_every: `sample` is True for every Nth batch. 1 validates all of them (the default, and what
+                tests should use); with a larger value, the batches in between are trusted.
+        """
+        if validate_every < 1:
+            raise ValueError(f"`validate_every` must be >= 1, got {validate_every}.")
+        self.features = features
+        self.validate_every = validate_every
+        self.num_batches = 0
+
+        self.keys = frozenset(features) - frozenset(DEFAULT_FEATURES)
+        # Rate-decoupled cameras are absent from the frames in between two of their fresh images
+        self.required = frozenset(key for key in self.keys if "fps" not in features[key])
+        self.arrays = {}  # key -> (dtype, shape)
+        self.cameras = {}  # key -> accepted (channel last, channel first) shapes
+        self.strings = set()
+        for key in self.keys:
+            ft = features[key]
+            if ft["dtype"] in ["image", "video"]:
+                h, w, c = ft["shape"]
+                self.cameras[key] = ((h, w, c), (c, h, w))
+            elif ft["dtype"] == "string":
+                self.strings.add(key)
+            else:
+                self.arrays[key] = (np.dtype(ft["dtype"]), tuple(ft["shape"]))
+
+    def sample(self) -> bool:
+        """Whether the next batch should be validated (every `validate_every` batches, starting with the first)."""
+        validate = self.num_batches % self.validate_every == 0
+        self.num_batches += 1
+        return validate
+
+    def _is_valid(self, key: str, value) -> bool:
+        if key in self.arrays:
+            dtype, shape = self.arrays[key]
+            return isinstance(value, np.ndarray) and value.dtype == dtype and value.shape == shape
+        if key in self.cameras:
+            return isinstance(value, PIL.Image.Image) or (
+                isinstance(value, np.ndarray) and value.shape in self.cameras[key]
+            )
+        return isinstance(value, str)
+
+    def _raise(self, frame: dict) -> None:
+        # Build the detailed error message of the failed check
+        validate_frame(frame, {key: ft for key, ft in self.features.items() if key in frame or key in self.required})
+        # The legacy checks are looser (e.g. on camera shapes): the compiled one still rejected the frame
+        invalid = sorted(key for key in frame.keys() & self.keys if not self._is_valid(key, frame[key]))
+        raise ValueError(f"Invalid features in `frame`: {invalid}.")
+
+    def validate_frame(self, frame: dict) -> None:
+        keys = frame.keys() - {"task"}
+        if not (self.required <= keys <= self.keys) or not all(self._is_valid(key, frame[key]) for key in keys):
+            self._raise(frame)
+
+    def validate_batch(self, batch: dict[str, np.ndarray]) -> None:
+        """
+        Validate a batch of frames at once: each value is an array of frames along its first dimension.
+        Rate-decoupled cameras (which can be absent) may only hold the rows of the frames they are due in.
+        """
+        keys = set(batch)
+        errors = []
+        if not self.required <= keys <= self.keys:
+            errors.append(f"Missing features: {set(self.required - keys)}, extra features: {set(keys - self.keys)}.")
+        for key in keys & self.keys:
+            value = batch[key]
+            if not isinstance(value, np.ndarray):
+                errors.append(f"The feature '{key}' is not a batch of frames ('np.ndarray'), but '{type(value)}'.")
+            elif key in self.arrays:
+                dtype, shape = self.arrays[key]
+                if value.dtype != dtype or value.shape[1:] != shape:
+                    errors.append(
+                        f"The feature '{key}' of dtype '{value.dtype}' and frame shape '{value.shape[1:]}' does not "
+                        f"have the expected dtype '{dtype}' and shape '{shape}'."
+                    )
+            elif key in self.cameras and value.shape[1:] not in self.cameras[key]:
+                errors.append(
+                    f"The feature '{key}' of frame shape '{value.shape[1:]}' does not have the expected shape "
+                    f"'{self.cameras[key][0]}' or '{self.cameras[key][1]}'."
+                )
+        if errors:
+            raise ValueError("\n".join(errors))
@@ -39,18 +39,26 @@ def safe_stop_image_writer(func):
 
 
 def image_array_to_pil_image(image_array: np.ndarray, range_check: bool = True) -> PIL.Image.Image:
-    # TODO(aliberts): handle 1 channel and 4 for depth images
+    if image_array.ndim == 2:
+        # Single channel. uint16 arrays (e.g. encoded depth, see `camera_channels`) become 16-bit images.
+        if image_array.dtype == np.uint16:
+            return PIL.Image.fromarray(image_array)
+        image_array = image_array[..., None]
     if image_array.ndim != 3:
-        raise ValueError(f"The array has {image_array.ndim} dimensions, but 3 is expected for an image.")
+        raise ValueError(f"The array has {image_array.ndim} dimensions, but 2 or 3 are expected for an image.")
 
-    if image_array.shape[0] == 3:
+    if image_array.shape[0] in (1, 3, 4) and image_array.shape[-1] not in (1, 3, 4):
         # Transpose from pytorch convention (C, H, W) to (H, W, C)
         image_array = image_array.transpose(1, 2, 0)
 
-    elif image_array.shape[-1] != 3:
+    if image_array.shape[-1] not in (1, 3, 4):
         raise NotImplementedError(
-            f"The image has {image_array.shape[-1]} channels, but 3 is required for now."
+            f"The image has {image_array.shape[-1]} channels, but 1, 3 or 4 are supported."
         )
+    if image_array.shape[-1] == 1:
+        if image_array.dtype == np.uint16:
+            return PIL.Image.fromarray(image_array[..., 0])
+        image_array = image_array[..., 0]
 
     if image_array.dtype != np.uint8:
         if range_check:
@@ -155,6 +163,14 @@ class AsyncImageWriter:
     def wait_until_done(self):
         self.queue.join()
 
+    def queue_size(self) -> int | None:
+        """Approximate number of images waiting to be written (None where the platform can't tell)."""
+        try:
+            return self.queue.qsize()
+        except NotImplementedError:
+            # multiprocessing queues on macOS
+            return None
+
     def stop(self):
         if self._stopped:
             return
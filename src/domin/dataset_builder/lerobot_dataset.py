@@ -14,9 +14,12 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import bisect
 import contextlib
+import functools
 import logging
 import shutil
+import tempfile
 from pathlib import Path
 from typing import Callable, Any
 
@@ -31,8 +34,13 @@ from huggingface_hub import HfApi, snapshot_download
 from huggingface_hub.constants import REPOCARD_NAME, HF_HOME
 from huggingface_hub.errors import RevisionNotFoundError
 
+from .camera_channels import CHANNEL_PIX_FMT, CHANNEL_VCODEC, channel_specs, decode_channel, encode_channel
 from .compute_stats import aggregate_stats, compute_episode_stats
+from .episode_buffer import SpilledColumn, spillable_keys, stack_frames, value_nbytes
+from .frame_schema import FrameSchema
 from .image_writer import AsyncImageWriter, write_image
+from .quantization import encode_storage, storage_specs
+from .telemetry import Telemetry
 from .utils import (
     DEFAULT_FEATURES,
     DEFAULT_IMAGE_PATH,
@@ -50,6 +58,7 @@ from .utils import (
     get_delta_indices,
     get_episode_data_index,
     get_hf_features_from_features,
+    get_nearest_camera_frames,
     # get_safe_version,
     hf_transform_to_torch,
     is_valid_version,
@@ -59,7 +68,6 @@ from .utils import (
     load_stats,
     load_tasks,
     validate_episode_buffer,
-    validate_frame,
     write_episode,
     write_episode_stats,
     write_info,
@@ -67,8 +75,10 @@ from .utils import (
     write_modality,
 )
 from .video_utils import (
+    VIDEO_ENCODING_KEY,
     VideoFrame,
     decode_video_frames,
+    decode_video_frames_gray16,
     encode_video_frames,
     get_safe_default_codec,
     get_video_info,
@@ -272,6 +282,7 @@ class LeRobotDatasetMetadata:
         episode_length: int,
         episode_tasks: list[str],
         episode_stats: dict[str, dict],
+        camera_timestamps: dict[str, list[float]] | None = None,
     ) -> None:
         self.info["total_episodes"] += 1
         self.info["total_frames"] += episode_length
@@ -292,6 +303,9 @@ class LeRobotDatasetMetadata:
             "tasks": episode_tasks,
             "length": episode_length,
         }
+        if camera_timestamps:
+            # Capture timestamps of the rate-decoupled cameras, used to look up their frames on read
+            episode_dict["camera_timestamps"] = camera_timestamps
         self.episodes[episode_index] = episode_dict
         write_episode(episode_dict, self.root)
 
@@ -314,6 +328,8 @@ class LeRobotDatasetMetadata:
                     ep_index=0, vid_key=key
                 )
                 self.info["features"][key]["info"] = get_video_info(video_path)
+                if self.features[key].get("channel", {}).get("type") == "depth":
+                    self.info["features"][key]["info"]["video.is_depth_map"] = True
 
     def __repr__(self):
         feature_keys = list(self.features)
@@ -510,6 +526,8 @@ class LeRobotDataset(torch.utils.data.Dataset):
         # Unused attributes
         self.image_writer = None
         self.episode_buffers = {}
+        self._init_buffer_accounting()
+        self.telemetry = Telemetry(enabled=False)
 
         self.root.mkdir(exist_ok=True, parents=True)
 
@@ -664,6 +682,12 @@ class LeRobotDataset(torch.utils.data.Dataset):
 
         return fpaths
 
+    def _hf_transform(self) -> Callable:
+        """Transform of the hf_dataset: convert to torch and decode compactly stored features and channels."""
+        return functools.partial(
+            hf_transform_to_torch, storage=storage_specs(self.features), channels=channel_specs(self.features)
+        )
+
     def load_hf_dataset(self) -> datasets.Dataset:
         """hf_dataset contains all the observations, states, actions, rewards, etc."""
         if self.episodes is None:
@@ -677,7 +701,7 @@ class LeRobotDataset(torch.utils.data.Dataset):
             hf_dataset = load_dataset("parquet", data_files=files, split="train")
 
         # TODO(aliberts): hf_dataset.set_format("torch")
-        hf_dataset.set_transform(hf_transform_to_torch)
+        hf_dataset.set_transform(self._hf_transform())
         return hf_dataset
 
     def create_hf_dataset(self) -> datasets.Dataset:
@@ -688,7 +712,7 @@ class LeRobotDataset(torch.utils.data.Dataset):
         )
 
         # TODO(aliberts): hf_dataset.set_format("torch")
-        hf_dataset.set_transform(hf_transform_to_torch)
+        hf_dataset.set_transform(self._hf_transform())
         return hf_dataset
 
     @property
@@ -753,6 +777,7 @@ class LeRobotDataset(torch.utils.data.Dataset):
         self,
         current_ts: float,
         query_indices: dict[str, list[int]] | None = None,
+        ep_idx: int | None = None,
     ) -> dict[str, list[float]]:
         query_timestamps = {}
         for key in self.meta.video_keys:
@@ -762,8 +787,23 @@ class LeRobotDataset(torch.utils.data.Dataset):
             else:
                 query_timestamps[key] = [current_ts]
 
+            if ep_idx is not None and "fps" in self.features[key]:
+                query_timestamps[key] = self._get_camera_timestamps(
+                    ep_idx, key, query_timestamps[key]
+                )
+
         return query_timestamps
 
+    def _get_camera_timestamps(
+        self, ep_idx: int, key: str, query_ts: list[float]
+    ) -> list[float]:
+        """Map timestamps of the episode to the video timestamps of the nearest fresh frames of a
+        rate-decoupled camera. Its video only holds the fresh frames, encoded at the camera's own fps.
+        """
+        camera_ts = self.meta.episodes[ep_idx]["camera_timestamps"][key]
+        frame_indices = get_nearest_camera_frames(camera_ts, query_ts)
+        return (frame_indices / self.features[key]["fps"]).tolist()
+
     def _query_hf_dataset(self, query_indices: dict[str, list[int]]) -> dict:
         return {
             key: torch.stack(self.hf_dataset.select(q_idx)[key])
@@ -782,9 +822,14 @@ class LeRobotDataset(torch.utils.data.Dataset):
         item = {}
         for vid_key, query_ts in query_timestamps.items():
             video_path = self.root / self.meta.get_video_file_path(ep_idx, vid_key)
-            frames = decode_video_frames(
-                video_path, query_ts, self.tolerance_s, self.video_backend
-            )
+            channel = self.features[vid_key].get("channel")
+            if channel is not None:
+                frames = decode_video_frames_gray16(video_path, query_ts, self.tolerance_s)
+                frames = decode_channel(frames, channel)
+            else:
+                frames = decode_video_frames(
+                    video_path, query_ts, self.tolerance_s, self.video_backend
+                )
             item[vid_key] = frames.squeeze(0)
 
         return item
@@ -811,7 +856,9 @@ class LeRobotDataset(torch.utils.data.Dataset):
 
         if len(self.meta.video_keys) > 0:
             current_ts = item["timestamp"].item()
-            query_timestamps = self._get_query_timestamps(current_ts, query_indices)
+            query_timestamps = self._get_query_timestamps(
+                current_ts, query_indices, ep_idx
+            )
             video_frames = self._query_videos(query_timestamps, ep_idx)
             item = {**video_frames, **item}
 
@@ -849,15 +896,82 @@ class LeRobotDataset(torch.utils.data.Dataset):
             self.meta.total_episodes if episode_index is None else episode_index
         )
         ep_buffer = {}
-        # size and task are special cases that are not in self.features
+        # size, task_segments and camera_timestamps are special cases that are not in self.features
         ep_buffer["size"] = 0
-        ep_buffer["task"] = []
+        # [frame_index, task_index] of the first frame of each run of frames sharing a task
+        ep_buffer["task_segments"] = []
+        ep_buffer["camera_timestamps"] = {
+            key: [] for key, ft in self.features.items() if "fps" in ft
+        }
         for key in self.features:
             ep_buffer[key] = current_ep_idx if key == "episode_index" else []
 
         self.episode_buffers[current_ep_idx] = ep_buffer
         return ep_buffer
 
+    def _init_buffer_accounting(self) -> None:
+        # Cap (in bytes) of the memory used by all in-flight episode buffers. Above it, the numeric features of
+        # the oldest buffers are spilled to memory-mapped files in `spill_dir` (a temporary directory if None).
+        self.max_buffer_bytes = None
+        self.spill_dir = None
+        # episode_index -> [bytes of numeric features held in memory, bytes of the other buffered values]
+        self._buffer_bytes = {}
+        self._spilled_episodes = set()
+        self.buffered_bytes = 0
+
+    @functools.cached_property
+    def _spillable_keys(self) -> list[str]:
+        return spillable_keys(self.features)
+
+    def _account_frame(self, episode_index: int, image_paths: list[str]) -> None:
+        """Add the memory of the frame just appended to an episode buffer, and spill buffers over the cap."""
+        episode_buffer = self.episode_buffers[episode_index]
+        numeric = 0
+        if episode_index not in self._spilled_episodes:
+            numeric = sum(value_nbytes(episode_buffer[key][-1]) for key in self._spillable_keys)
+        # Tasks are stored once per segment, not per frame
+        other = sum(value_nbytes(path) for path in image_paths)
+
+        sizes = self._buffer_bytes.setdefault(episode_index, [0, 0])
+        sizes[0] += numeric
+        sizes[1] += other
+        self.buffered_bytes += numeric + other
+        if self.max_buffer_bytes is not None and self.buffered_bytes > self.max_buffer_bytes:
+            self._spill_buffers()
+        self.telemetry.gauge("episode_buffers.bytes", self.buffered_bytes)
+
+    def _spill_buffers(self) -> None:
+        """Spill the numeric features of the oldest in-flight buffers until the total is under the cap."""
+        for episode_index, episode_buffer in self.episode_buffers.items():
+            if self.buffered_bytes <= self.max_buffer_bytes:
+                break
+            if episode_index in self._spilled_episodes or episode_buffer["size"] == 0:
+                continue
+
+            if self.spill_dir is None:
+                self.spill_dir = tempfile.mkdtemp(prefix="domin-episode-buffers-")
+            Path(self.spill_dir).mkdir(parents=True, exist_ok=True)
+            for key in self._spillable_keys:
+                path = Path(self.spill_dir) / f"episode_{episode_index:06d}_{key}.bin"
+                episode_buffer[key] = SpilledColumn(path, episode_buffer[key], self.features[key]["dtype"])
+
+            sizes = self._buffer_bytes[episode_index]
+            self.buffered_bytes -= sizes[0]
+            sizes[0] = 0
+            self._spilled_episodes.add(episode_index)
+            self.telemetry.count("episode_buffers.spills")
+
+    def _release_episode_buffer(self, episode_index: int) -> None:
+        """Free the buffer of an episode (and the files of its spilled features)."""
+        episode_buffer = self.episode_buffers.pop(episode_index, None)
+        if episode_buffer is not None:
+            for value in episode_buffer.values():
+                if isinstance(value, SpilledColumn):
+                    value.close()
+        self.buffered_bytes -= sum(self._buffer_bytes.pop(episode_index, (0, 0)))
+        self._spilled_episodes.discard(episode_index)
+        self.telemetry.gauge("episode_buffers.bytes", self.buffered_bytes)
+
     def _get_image_file_path(
         self, episode_index: int, image_key: str, frame_index: int
     ) -> Path:
@@ -876,26 +990,50 @@ class LeRobotDataset(torch.utils.data.Dataset):
         else:
             self.image_writer.save_image(image=image, fpath=fpath)
 
+    def intern_task(self, task: str) -> int:
+        """Return the task_index of a task, adding the task to the dataset if it is new."""
+        task_index = self.meta.get_task_index(task)
+        if task_index is None:
+            self.meta.add_task(task)
+            task_index = self.meta.get_task_index(task)
+        return task_index
+
+    @functools.cached_property
+    def frame_schema(self) -> FrameSchema:
+        return FrameSchema(self.features)
+
     def add_frame(
-        self, frame: dict, task: str, episode_index: int, timestamp: float | None = None
+        self,
+        frame: dict,
+        task: str | int,
+        episode_index: int,
+        timestamp: float | None = None,
+        validate: bool = True,
     ) -> None:
         """
         Add a frame to the episode buffer for the specified episode index.
         Images are written to a temporary directory.
         Nothing is written to the final dataset files until 'save_episode()' is called.
 
+        Cameras whose feature has its own (lower) "fps" only need to be present in the frames where they
+        produced a fresh image (see `is_camera_frame_due`). Only those frames are written (and encoded), and
+        their timestamps are kept in the episode metadata.
+
         Args:
             frame (dict): Dictionary containing frame data (observations, actions).
-            task (str): Task description.
+            task (str | int): Task description, or its task_index (see `intern_task`) to skip the lookup.
             episode_index (int): Index of the episode this frame belongs to.
             timestamp (float | None, optional): Timestamp of the frame. Defaults to None (calculated from fps).
+            validate (bool, optional): Check the frame against the features. Callers that already validated
+                the batch it comes from (see `FrameSchema.validate_batch`) can skip it. Defaults to True.
         """
         # Convert torch to numpy if needed
         for name in frame:
             if isinstance(frame[name], torch.Tensor):
                 frame[name] = frame[name].numpy()
 
-        validate_frame(frame, self.features)
+        if validate:
+            self.frame_schema.validate_frame(frame)
 
         if episode_index not in self.episode_buffers:
             self.create_episode_buffer(episode_index)
@@ -909,9 +1047,24 @@ class LeRobotDataset(torch.utils.data.Dataset):
             timestamp = frame_index / self.fps
         episode_buffer["frame_index"].append(frame_index)
         episode_buffer["timestamp"].append(timestamp)
-        episode_buffer["task"].append(task)
+        task_index = self.intern_task(task) if isinstance(task, str) else task
+        task_segments = episode_buffer["task_segments"]
+        if not task_segments or task_segments[-1][1] != task_index:
+            task_segments.append([frame_index, task_index])
+
+        for key, ft in self.features.items():
+            if "fps" not in ft:
+                continue
+            if key in frame:
+                episode_buffer["camera_timestamps"][key].append(timestamp)
+            elif frame_index == 0:
+                raise ValueError(f"The first frame of an episode must contain '{key}'.")
+            elif ft["dtype"] == "image":
+                # Image datasets store one image per row, so the last fresh image is referenced again.
+                episode_buffer[key].append(episode_buffer[key][-1])
 
         # Add frame features to episode_buffer
+        image_paths = []
         for key in frame:
             if key not in self.features:
                 raise ValueError(
@@ -919,6 +1072,9 @@ class LeRobotDataset(torch.utils.data.Dataset):
                 )
 
             if self.features[key]["dtype"] in ["image", "video"]:
+                if "channel" in self.features[key]:
+                    # Depth and segmentation are written as 16-bit images
+                    frame[key] = encode_channel(frame[key], self.features[key]["channel"])
                 img_path = self._get_image_file_path(
                     episode_index=episode_buffer["episode_index"],
                     image_key=key,
@@ -927,11 +1083,13 @@ class LeRobotDataset(torch.utils.data.Dataset):
                 if frame_index == 0:
                     img_path.parent.mkdir(parents=True, exist_ok=True)
                 self._save_image(frame[key], img_path)
-                episode_buffer[key].append(str(img_path))
+                image_paths.append(str(img_path))
+                episode_buffer[key].append(image_paths[-1])
             else:
                 episode_buffer[key].append(frame[key])
 
         episode_buffer["size"] += 1
+        self._account_frame(episode_index, image_paths)
 
     def save_episode(
         self, episode_index: int, episode_data: dict | None = None
@@ -951,16 +1109,15 @@ class LeRobotDataset(torch.utils.data.Dataset):
             episode_buffer = self.episode_buffers[episode_index]
 
         # Wait for asynchronous image writer to finish before saving
-        self._wait_image_writer()
+        with self.telemetry.timer("save_episode.wait_images"):
+            self._wait_image_writer()
 
         validate_episode_buffer(episode_buffer, self.meta.total_episodes, self.features)
 
-        # size and task are special cases that won't be added to hf_dataset
-        # episode_length = episode_buffer.pop("size")
-        # tasks = episode_buffer.pop("task")
+        # size and task_segments are special cases that won't be added to hf_dataset
         episode_length = episode_buffer["size"]
-        tasks = episode_buffer["task"]
-        episode_tasks = list(set(tasks))
+        segment_starts, segment_tasks = zip(*episode_buffer["task_segments"])
+        episode_tasks = [self.meta.tasks[task_index] for task_index in dict.fromkeys(segment_tasks)]
         # episode_index is already in the buffer, but we can verify it matches
         assert episode_buffer["episode_index"] == episode_index
 
@@ -973,15 +1130,10 @@ class LeRobotDataset(torch.utils.data.Dataset):
         )
         save_buffer["episode_index"] = np.full((episode_length,), episode_index)
 
-        # Add new tasks to the tasks dictionary
-        for task in episode_tasks:
-            task_index = self.meta.get_task_index(task)
-            if task_index is None:
-                self.meta.add_task(task)
-
-        # Given tasks in natural language, find their corresponding task indices
-        save_buffer["task_index"] = np.array(
-            [self.meta.get_task_index(task) for task in tasks]
+        # Tasks were interned when their frames were added: each segment is filled with its task_index
+        save_buffer["task_index"] = np.repeat(
+            np.array(segment_tasks, dtype=np.int64),
+            np.diff([*segment_starts, episode_length]),
         )
 
         for key, ft in self.features.items():
@@ -992,19 +1144,29 @@ class LeRobotDataset(torch.utils.data.Dataset):
                 "video",
             ]:
                 continue
-            save_buffer[key] = np.stack(save_buffer[key])
+            save_buffer[key] = stack_frames(save_buffer[key])
 
         self._wait_image_writer()
-        self._save_episode_table(save_buffer, episode_index)
-        ep_stats = compute_episode_stats(save_buffer, self.features)
+        with self.telemetry.timer("save_episode.parquet"):
+            self._save_episode_table(save_buffer, episode_index)
+        with self.telemetry.timer("save_episode.stats"):
+            ep_stats = compute_episode_stats(save_buffer, self.features)
 
         if len(self.meta.video_keys) > 0:
-            video_paths = self.encode_episode_videos(episode_index)
+            with self.telemetry.timer("save_episode.videos"):
+                video_paths = self.encode_episode_videos(episode_index)
             for key in self.meta.video_keys:
                 save_buffer[key] = video_paths[key]
 
         # `meta.save_episode` be executed after encoding the videos
-        self.meta.save_episode(episode_index, episode_length, episode_tasks, ep_stats)
+        with self.telemetry.timer("save_episode.metadata"):
+            self.meta.save_episode(
+                episode_index,
+                episode_length,
+                episode_tasks,
+                ep_stats,
+                camera_timestamps=episode_buffer["camera_timestamps"] or None,
+            )
 
         ep_data_index = get_episode_data_index(self.meta.episodes, [episode_index])
         ep_data_index_np = {k: t.numpy() for k, t in ep_data_index.items()}
@@ -1016,6 +1178,9 @@ class LeRobotDataset(torch.utils.data.Dataset):
             self.tolerance_s,
         )
 
+        # The episode is on disk: free its buffer
+        self._release_episode_buffer(episode_index)
+
         # TODO: breaks when dealing with multiple envs... fix?
 
         # video_files = list(self.root.rglob("*.mp4"))
@@ -1028,17 +1193,18 @@ class LeRobotDataset(torch.utils.data.Dataset):
         # if img_dir.is_dir():
         #     shutil.rmtree(self.root / "images")
 
-        # if not episode_data:  # Remove from buffers
-        #     del self.episode_buffers[episode_index]
-
     def _save_episode_table(self, episode_buffer: dict, episode_index: int) -> None:
-        episode_dict = {key: episode_buffer[key] for key in self.hf_features}
+        storage = storage_specs(self.features)
+        episode_dict = {
+            key: encode_storage(episode_buffer[key], storage[key]) if key in storage else episode_buffer[key]
+            for key in self.hf_features
+        }
         ep_dataset = datasets.Dataset.from_dict(
             episode_dict, features=self.hf_features, split="train"
         )
         ep_dataset = embed_images(ep_dataset)
         self.hf_dataset = concatenate_datasets([self.hf_dataset, ep_dataset])
-        self.hf_dataset.set_transform(hf_transform_to_torch)
+        self.hf_dataset.set_transform(self._hf_transform())
         ep_data_path = self.root / self.meta.get_data_file_path(ep_index=episode_index)
         ep_data_path.parent.mkdir(parents=True, exist_ok=True)
         ep_dataset.to_parquet(ep_data_path)
@@ -1065,7 +1231,7 @@ class LeRobotDataset(torch.utils.data.Dataset):
                     shutil.rmtree(img_dir)
 
         # Remove the buffer
-        del self.episode_buffers[episode_index]
+        self._release_episode_buffer(episode_index)
 
     def start_image_writer(self, num_processes: int = 0, num_threads: int = 4) -> None:
         if isinstance(self.image_writer, AsyncImageWriter):
@@ -1117,7 +1283,17 @@ class LeRobotDataset(torch.utils.data.Dataset):
             img_dir = self._get_image_file_path(
                 episode_index=episode_index, image_key=key, frame_index=0
             ).parent
-            encode_video_frames(img_dir, video_path, self.fps, overwrite=True)
+            fps = self.features[key].get("fps", self.fps)
+            if "channel" in self.features[key]:
+                # Lossless encoding of depth and segmentation
+                encode_video_frames(
+                    img_dir, video_path, fps, vcodec=CHANNEL_VCODEC, pix_fmt=CHANNEL_PIX_FMT, g=None, crf=None,
+                    overwrite=True,
+                )
+            else:
+                encode_video_frames(
+                    img_dir, video_path, fps, overwrite=True, **self.meta.info.get(VIDEO_ENCODING_KEY, {})
+                )
 
         return video_paths
 
@@ -1145,28 +1321,60 @@ class LeRobotDataset(torch.utils.data.Dataset):
             root=root,
             use_videos=use_videos,
         )
-        obj.repo_id = obj.meta.repo_id
-        obj.root = obj.meta.root
-        obj.revision = None
-        obj.tolerance_s = tolerance_s
-        obj.image_writer = None
+        obj._init_recording(tolerance_s, image_writer_processes, image_writer_threads, video_backend)
+        return obj
+
+    @classmethod
+    def resume(
+        cls,
+        repo_id: str,
+        root: str | Path | None = None,
+        tolerance_s: float = 1e-4,
+        image_writer_processes: int = 0,
+        image_writer_threads: int = 0,
+        video_backend: str | None = None,
+    ) -> "LeRobotDataset":
+        """
+        Open an existing LeRobot Dataset in order to record more episodes. Only its metadata is loaded: the frames
+        already recorded are neither read nor checked, so resuming doesn't get slower as the dataset grows.
+        """
+        obj = cls.__new__(cls)
+        obj.meta = LeRobotDatasetMetadata(repo_id, root=root)
+        obj._init_recording(tolerance_s, image_writer_processes, image_writer_threads, video_backend)
+        return obj
+
+    def _init_recording(
+        self,
+        tolerance_s: float,
+        image_writer_processes: int,
+        image_writer_threads: int,
+        video_backend: str | None,
+    ) -> None:
+        self.repo_id = self.meta.repo_id
+        self.root = self.meta.root
+        self.revision = None
+        self.tolerance_s = tolerance_s
+        self.image_writer = None
+        # Replaced by the recorder's telemetry to time the stages of `save_episode`
+        self.telemetry = Telemetry(enabled=False)
 
         if image_writer_processes or image_writer_threads:
-            obj.start_image_writer(image_writer_processes, image_writer_threads)
+            self.start_image_writer(image_writer_processes, image_writer_threads)
 
         # TODO(aliberts, rcadene, alexander-soare): Merge this with OnlineBuffer/DataBuffer
-        obj.episode_buffers = {}
-
-        obj.episodes = None
-        obj.hf_dataset = obj.create_hf_dataset()
-        obj.image_transforms = None
-        obj.delta_timestamps = None
-        obj.delta_indices = None
-        obj.episode_data_index = None
-        obj.video_backend = (
+        self.episode_buffers = {}
+        self._init_buffer_accounting()
+
+        # Only holds the episodes recorded from now on
+        self.episodes = None
+        self.hf_dataset = self.create_hf_dataset()
+        self.image_transforms = None
+        self.delta_timestamps = None
+        self.delta_indices = None
+        self.episode_data_index = None
+        self.video_backend = (
             video_backend if video_backend is not None else get_safe_default_codec()
         )
-        return obj
 
 
 class MultiLeRobotDataset(torch.utils.data.Dataset):
@@ -1174,6 +1382,10 @@ class MultiLeRobotDataset(torch.utils.data.Dataset):
 
     The underlying `LeRobotDataset`s are effectively concatenated, and this class adopts much of the API
     structure of `LeRobotDataset`.
+
+    Global indices are resolved to (dataset, local index) with a binary search over the cumulative sizes of
+    the underlying datasets, and `__getitems__` routes a whole batch of indices at once. `sampling_weights`
+    controls how the datasets are mixed when sampling with `make_weighted_sampler`.
     """
 
     def __init__(
@@ -1186,7 +1398,15 @@ class MultiLeRobotDataset(torch.utils.data.Dataset):
         tolerances_s: dict | None = None,
         download_videos: bool = True,
         video_backend: str | None = None,
+        sampling_weights: dict[str, float] | None = None,
     ):
+        """
+        Args:
+            sampling_weights (dict[str, float] | None, optional): Relative probability mass of each dataset
+                (by repo_id) when sampling with `make_weighted_sampler`. Frames are sampled uniformly within a
+                dataset. Missing repo_ids get a weight of 0. Defaults to None, which samples all frames
+                uniformly (i.e. each dataset is weighted by its number of frames).
+        """
         super().__init__()
         self.repo_ids = repo_ids
         self.root = Path(root) if root else HF_LEROBOT_HOME
@@ -1236,6 +1456,15 @@ class MultiLeRobotDataset(torch.utils.data.Dataset):
         # per robot.
         self.stats = aggregate_stats([dataset.meta.stats for dataset in self._datasets])
 
+        # Cumulative offsets of the underlying datasets in the global index space.
+        self._dataset_sizes = np.array([d.num_frames for d in self._datasets], dtype=np.int64)
+        self._dataset_ends = np.cumsum(self._dataset_sizes)
+        self._dataset_starts = self._dataset_ends - self._dataset_sizes
+
+        if sampling_weights is not None and (unknown := set(sampling_weights) - set(repo_ids)):
+            raise ValueError(f"sampling_weights contains unknown repo_ids: {unknown}")
+        self.sampling_weights = sampling_weights
+
     @property
     def repo_id_to_index(self):
         """Return a mapping from dataset repo_id to a dataset index automatically created by this class.
@@ -1323,32 +1552,90 @@ class MultiLeRobotDataset(torch.utils.data.Dataset):
         return 1 / self.fps - 1e-4
 
     def __len__(self):
-        return self.num_frames
+        return int(self._dataset_ends[-1]) if len(self._dataset_ends) else 0
 
-    def __getitem__(self, idx: int) -> dict[str, torch.Tensor]:
+    def _locate(self, idx: int) -> tuple[int, int]:
+        """Map a global index to (dataset index, index within that dataset)."""
         if idx >= len(self):
             raise IndexError(f"Index {idx} out of bounds.")
-        # Determine which dataset to get an item from based on the index.
-        start_idx = 0
-        dataset_idx = 0
-        for dataset in self._datasets:
-            if idx >= start_idx + dataset.num_frames:
-                start_idx += dataset.num_frames
-                dataset_idx += 1
-                continue
-            break
-        else:
-            raise AssertionError(
-                "We expect the loop to break out as long as the index is within bounds."
-            )
-        item = self._datasets[dataset_idx][idx - start_idx]
+        dataset_idx = bisect.bisect_right(self._dataset_ends, idx)
+        return dataset_idx, idx - int(self._dataset_starts[dataset_idx])
+
+    def _finalize_item(self, item: dict, dataset_idx: int) -> dict:
         item["dataset_index"] = torch.tensor(dataset_idx)
         for data_key in self.disabled_features:
             if data_key in item:
                 del item[data_key]
-
         return item
 
+    def __getitem__(self, idx: int) -> dict[str, torch.Tensor]:
+        dataset_idx, local_idx = self._locate(idx)
+        item = self._datasets[dataset_idx][local_idx]
+        return self._finalize_item(item, dataset_idx)
+
+    def __getitems__(self, indices: list[int]) -> list[dict[str, torch.Tensor]]:
+        """Batched version of `__getitem__`, used by the DataLoader fetcher when available.
+
+        Indices are routed to the underlying datasets in one vectorized lookup, and each dataset is queried
+        with its whole share of the batch. Items are returned in the order of `indices`.
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        if len(indices) and (indices.max() >= len(self) or indices.min() < 0):
+            raise IndexError(f"Indices out of bounds for a dataset of length {len(self)}.")
+        dataset_idxs = np.searchsorted(self._dataset_ends, indices, side="right")
+        local_idxs = indices - self._dataset_starts[dataset_idxs]
+
+        items = [None] * len(indices)
+        for dataset_idx in np.unique(dataset_idxs).tolist():
+            positions = np.flatnonzero(dataset_idxs == dataset_idx)
+            dataset = self._datasets[dataset_idx]
+            sub_indices = local_idxs[positions].tolist()
+            if hasattr(dataset, "__getitems__"):
+                sub_items = dataset.__getitems__(sub_indices)
+            else:
+                sub_items = [dataset[i] for i in sub_indices]
+            for position, item in zip(positions.tolist(), sub_items, strict=True):
+                items[position] = self._finalize_item(item, dataset_idx)
+        return items
+
+    def get_sampler_weights(self) -> torch.Tensor:
+        """Per-frame sampling weights implementing `sampling_weights`, normalized to 1."""
+        if self.sampling_weights is None:
+            dataset_weights = self._dataset_sizes.astype(np.float64)
+        else:
+            dataset_weights = np.array(
+                [self.sampling_weights.get(repo_id, 0.0) for repo_id in self.repo_ids], dtype=np.float64
+            )
+        if (dataset_weights < 0).any() or dataset_weights[self._dataset_sizes > 0].sum() == 0:
+            raise ValueError("Sampling weights must be non-negative, with at least one non-empty dataset.")
+
+        frame_weights = np.divide(
+            dataset_weights,
+            self._dataset_sizes,
+            out=np.zeros_like(dataset_weights),
+            where=self._dataset_sizes > 0,
+        )
+        weights = torch.from_numpy(np.repeat(frame_weights, self._dataset_sizes))
+        return weights / weights.sum()
+
+    def make_weighted_sampler(
+        self, num_samples: int | None = None, seed: int | None = None, replacement: bool = True
+    ) -> torch.utils.data.WeightedRandomSampler:
+        """Sampler mixing the underlying datasets according to `sampling_weights`.
+
+        Passing a `seed` makes the sequence of sampled indices deterministic.
+        """
+        generator = None
+        if seed is not None:
+            generator = torch.Generator()
+            generator.manual_seed(seed)
+        return torch.utils.data.WeightedRandomSampler(
+            self.get_sampler_weights(),
+            num_samples=num_samples if num_samples is not None else len(self),
+            replacement=replacement,
+            generator=generator,
+        )
+
     def __repr__(self):
         return (
             f"{self.__class__.__name__}(\n"
@@ -0,0 +1,301 @@
+# Copyright 2026 Nimit Shah. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Merge several LeRobot datasets (e.g. the shards of a parallel generation) into one, from their metadata.
+
+Episodes are renumbered in order, and the `episode_index`, `index` and `task_index` columns of the parquet files
+are rewritten with pyarrow (frames are never decoded). Stats are combined from the per-episode stats with
+`aggregate_stats` instead of being recomputed. Video files are hardlinked (or moved) instead of copied.
+
+```
+python -m domin.dataset_builder.merge_datasets \
+    --manifest datasets/dexterous_shards/shards.json \
+    --output-dir datasets/dexterous
+```
+"""
+
+import argparse
+import json
+import logging
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from ..fingerprint import FINGERPRINT_KEY
+from .compute_stats import aggregate_stats
+from .utils import (
+    EPISODES_PATH,
+    EPISODES_STATS_PATH,
+    INFO_PATH,
+    MODALITY_PATH,
+    TASKS_PATH,
+    cast_stats_to_numpy,
+    create_empty_dataset_info,
+    load_info,
+    load_jsonlines,
+    load_tasks,
+    write_info,
+    write_jsonlines,
+    write_stats,
+)
+from .video_utils import VIDEO_ENCODING_KEY
+
+LINK_MODES = ["hardlink", "move", "copy"]
+# Keys every info.json has. Any other key was added with `save_metadata`.
+INFO_KEYS = set(create_empty_dataset_info("", 0, {}, False))
+
+
+def _check_compatible(infos: list[dict], roots: list[Path]) -> None:
+    reference = infos[0]
+    for info, root in zip(infos[1:], roots[1:]):
+        for key in [
+            "codebase_version",
+            "robot_type",
+            "fps",
+            "chunks_size",
+            "data_path",
+            "video_path",
+            # Shards of one config, encoded alike (a merged dataset is topped up with the same config)
+            FINGERPRINT_KEY,
+            VIDEO_ENCODING_KEY,
+        ]:
+            if info.get(key) != reference.get(key):
+                raise ValueError(
+                    f"Cannot merge '{root}' into '{roots[0]}': '{key}' differs ({info.get(key)} != {reference.get(key)})."
+                )
+        # Video info (codec, resolution...) is only filled in once the first episode is encoded
+        features = {k: {n: v for n, v in ft.items() if n != "info"} for k, ft in info["features"].items()}
+        ref_features = {k: {n: v for n, v in ft.items() if n != "info"} for k, ft in reference["features"].items()}
+        if features != ref_features:
+            raise ValueError(f"Cannot merge '{root}' into '{roots[0]}': features differ.")
+
+
+def _transfer(src: Path, dst: Path, link_mode: str) -> None:
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    if link_mode == "move":
+        shutil.move(src, dst)
+    elif link_mode == "hardlink":
+        try:
+            os.link(src, dst)
+        except OSError:
+            # e.g. across filesystems
+            shutil.copy2(src, dst)
+    else:
+        shutil.copy2(src, dst)
+
+
+def _merge_episode_data(
+    src: Path,
+    dst: Path,
+    episode_index: int,
+    index_start: int,
+    task_index_map: np.ndarray,
+    link_mode: str,
+) -> None:
+    """Rewrite the index columns of an episode's parquet file, or just link it if they already match."""
+    index_columns = ["episode_index", "index", "task_index"]
+    columns = pq.read_table(src, columns=index_columns)
+    num_frames = columns.num_rows
+    new_columns = {
+        "episode_index": np.full(num_frames, episode_index, dtype=np.int64),
+        "index": np.arange(index_start, index_start + num_frames, dtype=np.int64),
+        "task_index": task_index_map[columns["task_index"].to_numpy()],
+    }
+    if all(np.array_equal(columns[key].to_numpy(), new_columns[key]) for key in index_columns):
+        _transfer(src, dst, link_mode)
+        return
+
+    # Other columns (including embedded images) are carried over as they are
+    table = pq.read_table(src)
+    for key, values in new_columns.items():
+        i = table.schema.get_field_index(key)
+        table = table.set_column(i, table.schema.field(i), pa.array(values, type=pa.int64()))
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    pq.write_table(table, dst)
+    if link_mode == "move":
+        src.unlink()
+
+
+def merge_datasets(
+    roots: list[str | Path],
+    output_root: str | Path,
+    link_mode: str = "hardlink",
+    num_workers: int = 8,
+) -> dict:
+    """
+    Merge LeRobot datasets into a new one at `output_root`.
+
+    Datasets are concatenated in the order of their "episode_offset" (set for the shards of a parallel
+    generation), then in the given order. Their episodes are renumbered contiguously, and tasks are merged into
+    one table.
+
+    Args:
+        roots: Roots of the datasets to merge.
+        output_root: Root of the merged dataset. It must not contain a dataset already.
+        link_mode: How parquet files that don't need to be rewritten and video files are transferred:
+            "hardlink" (falls back to a copy across filesystems), "move" (the source datasets are consumed)
+            or "copy".
+        num_workers: Number of threads rewriting and linking files.
+
+    Returns:
+        The info.json content of the merged dataset.
+    """
+    if link_mode not in LINK_MODES:
+        raise ValueError(f"link_mode must be one of {LINK_MODES}, got '{link_mode}'.")
+    roots = [Path(root) for root in roots]
+    output_root = Path(output_root)
+    if (output_root / INFO_PATH).exists():
+        raise FileExistsError(f"A dataset already exists at '{output_root}'.")
+
+    infos = [load_info(root) for root in roots]
+    if not infos:
+        raise ValueError("No dataset to merge.")
+    _check_compatible(infos, roots)
+    order = sorted(range(len(roots)), key=lambda i: infos[i].get("episode_offset", 0))
+
+    reference = infos[order[0]]
+    data_path, video_path = reference["data_path"], reference["video_path"]
+    chunks_size = reference["chunks_size"]
+    video_keys = [key for key, ft in reference["features"].items() if ft["dtype"] == "video"]
+
+    def episode_path(template: str, episode_index: int, **kwargs) -> str:
+        return template.format(
+            episode_chunk=episode_index // chunks_size, episode_index=episode_index, **kwargs
+        )
+
+    task_to_index = {}
+    episodes, episodes_stats, shard_stats, jobs = [], [], [], []
+    num_frames = 0
+    summed_info = {}
+    for i in order:
+        root, info = roots[i], infos[i]
+        shard_tasks, _ = load_tasks(root)
+        task_index_map = np.zeros(max(shard_tasks, default=-1) + 1, dtype=np.int64)
+        for task_index, task in shard_tasks.items():
+            task_index_map[task_index] = task_to_index.setdefault(task, len(task_to_index))
+
+        stats_by_episode = {
+            item["episode_index"]: item["stats"] for item in load_jsonlines(root / EPISODES_STATS_PATH)
+        }
+        shard_episodes = sorted(load_jsonlines(root / EPISODES_PATH), key=lambda ep: ep["episode_index"])
+        for episode in shard_episodes:
+            old_index, new_index = episode["episode_index"], len(episodes)
+            episodes.append({**episode, "episode_index": new_index})
+            episodes_stats.append({"episode_index": new_index, "stats": stats_by_episode[old_index]})
+
+            jobs.append(
+                (
+                    _merge_episode_data,
+                    root / episode_path(data_path, old_index),
+                    output_root / episode_path(data_path, new_index),
+                    new_index,
+                    num_frames,
+                    task_index_map,
+                    link_mode,
+                )
+            )
+            for key in video_keys:
+                jobs.append(
+                    (
+                        _transfer,
+                        root / episode_path(video_path, old_index, video_key=key),
+                        output_root / episode_path(video_path, new_index, video_key=key),
+                        link_mode,
+                    )
+                )
+            num_frames += episode["length"]
+
+        # Combine stats per shard, then over shards (with the same parallel-variance math)
+        shard_episode_stats = [cast_stats_to_numpy(stats_by_episode[ep["episode_index"]]) for ep in shard_episodes]
+        if shard_episode_stats:
+            shard_stats.append(aggregate_stats(shard_episode_stats))
+
+        # Custom metrics (e.g. total_rerecords) are summed over the shards when they are numbers
+        for key, value in info.items():
+            if key in INFO_KEYS or key == "episode_offset":
+                continue
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                summed_info[key] = summed_info.get(key, 0) + value
+
+    with ThreadPoolExecutor(max_workers=num_workers) as executor:
+        for future in [executor.submit(fn, *args) for fn, *args in jobs]:
+            future.result()
+
+    # The other custom entries (e.g. config_fingerprint, video_encoding) are kept when all the shards agree on
+    # them. The ones that describe a single shard (e.g. episode_offset, settle_steps) are dropped
+    info = {
+        key: value
+        for key, value in reference.items()
+        if key in INFO_KEYS or (key != "episode_offset" and all(other.get(key) == value for other in infos))
+    }
+    info.update(summed_info)
+    info["total_episodes"] = len(episodes)
+    info["total_frames"] = num_frames
+    info["total_tasks"] = len(task_to_index)
+    info["total_videos"] = len(episodes) * len(video_keys)
+    info["total_chunks"] = (len(episodes) - 1) // chunks_size + 1 if episodes else 0
+    info["splits"] = {"train": f"0:{len(episodes)}"}
+
+    write_info(info, output_root)
+    write_jsonlines(episodes, output_root / EPISODES_PATH)
+    write_jsonlines(episodes_stats, output_root / EPISODES_STATS_PATH)
+    write_jsonlines(
+        [{"task_index": task_index, "task": task} for task, task_index in task_to_index.items()],
+        output_root / TASKS_PATH,
+    )
+    if shard_stats:
+        write_stats(aggregate_stats(shard_stats), output_root)
+    if (roots[order[0]] / MODALITY_PATH).exists():
+        shutil.copy2(roots[order[0]] / MODALITY_PATH, output_root / MODALITY_PATH)
+
+    logging.info(f"Merged {len(roots)} datasets into '{output_root}': {len(episodes)} episodes, {num_frames} frames")
+    return info
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--roots", type=str, nargs="+", help="Roots of the datasets to merge.")
+    source.add_argument(
+        "--manifest",
+        type=str,
+        help="`shards.json` written by a sharded generation (`domin-gen --shard_devices ...`).",
+    )
+    parser.add_argument("--output-dir", type=str, required=True, help="Root of the merged dataset.")
+    parser.add_argument(
+        "--link-mode",
+        type=str,
+        default="hardlink",
+        choices=LINK_MODES,
+        help="How files are transferred to the merged dataset. 'move' consumes the source datasets.",
+    )
+    parser.add_argument("--num-workers", type=int, default=8, help="Number of threads handling files.")
+    args = parser.parse_args()
+
+    roots = args.roots
+    if args.manifest is not None:
+        with open(args.manifest) as f:
+            roots = [shard["root"] for shard in json.load(f) if shard["num_episodes_saved"] > 0]
+
+    info = merge_datasets(roots, args.output_dir, link_mode=args.link_mode, num_workers=args.num_workers)
+    print(f"Merged {len(roots)} datasets: {info['total_episodes']} episodes, {info['total_frames']} frames")
+
+
+if __name__ == "__main__":
+    main()
@@ -22,6 +22,7 @@ supports in-place slicing and mutation which is very handy for a dynamic buffer.
 """
 
 import os
+import time
 from pathlib import Path
 from typing import Any
 
@@ -31,6 +32,22 @@ import torch
 from .lerobot_dataset import LeRobotDataset
 
 
+def _ring_positions(starts: np.ndarray, lengths: np.ndarray, capacity: int) -> np.ndarray:
+    """Vectorized expansion of (start, length) runs in a ring buffer into buffer positions.
+
+    The runs are expanded in order, and the positions within each run follow insertion order (so they may
+    wrap around from `capacity - 1` to 0).
+    """
+    starts = np.asarray(starts, dtype=np.int64)
+    lengths = np.maximum(np.asarray(lengths, dtype=np.int64), 0)
+    total = int(lengths.sum())
+    if total == 0:
+        return np.empty((0,), dtype=np.int64)
+    run_offsets = np.cumsum(lengths) - lengths
+    offsets = np.arange(total, dtype=np.int64) - np.repeat(run_offsets, lengths)
+    return (np.repeat(starts, lengths) + offsets) % capacity
+
+
 def _make_memmap_safe(**kwargs) -> np.memmap:
     """Make a numpy memmap with checks on available disk space first.
 
@@ -60,9 +77,21 @@ class OnlineBuffer(torch.utils.data.Dataset):
     last index, and when you reach the end, wrap around to the start.
 
     The data is stored in a numpy memmap.
+
+    An in-memory index mapping each episode to its (start, length) in the ring is kept alongside the memmaps
+    so that per-episode lookups, counts and sampler weights never have to scan the whole buffer. It is built
+    once when opening the buffer and then maintained incrementally by `add_data`, including when old episodes
+    get partially or fully overwritten on wraparound.
+
+    The buffer can be written by one process and tailed by others opening the same `write_dir`, without any
+    locking. `add_data` brackets every write with increments of a sequence counter stored next to the
+    `_next_index` pointer (odd while a write is in progress, even otherwise), in the manner of a seqlock. A
+    reader picks up new frames with `refresh`, which incrementally updates its episode index from the frames
+    written since its last sync, and `__getitem__` retries any read that raced with a write.
     """
 
     NEXT_INDEX_KEY = "_next_index"
+    SEQUENCE_KEY = "_sequence"
     OCCUPANCY_MASK_KEY = "_occupancy_mask"
     INDEX_KEY = "index"
     FRAME_INDEX_KEY = "frame_index"
@@ -115,6 +144,98 @@ class OnlineBuffer(torch.utils.data.Dataset):
                 mode="r+" if (Path(write_dir) / k).exists() else "w+",
                 shape=tuple(v["shape"]) if v is not None else None,
             )
+        self._build_episode_index()
+
+    def _build_episode_index(self):
+        """(Re)build the episode -> (start, length) index from the memmaps.
+
+        This is the only place where the whole buffer is scanned. Episodes are stored oldest first, which is
+        the order in which they get evicted when the buffer wraps around.
+        """
+        self._episode_bounds: dict[int, tuple[int, int]] = {}
+        self._sequence = int(self._data[OnlineBuffer.SEQUENCE_KEY])
+        next_index = int(self._data[OnlineBuffer.NEXT_INDEX_KEY])
+        occupancy_mask = self._data[OnlineBuffer.OCCUPANCY_MASK_KEY]
+        self._num_frames = int(np.count_nonzero(occupancy_mask))
+        # Position and global index of the last frame covered by the episode index, used by `refresh`.
+        self._synced_next_index = next_index
+        self._synced_last_index = (
+            int(self._data[OnlineBuffer.INDEX_KEY][next_index - 1]) if self._num_frames > 0 else -1
+        )
+        if self._num_frames == 0:
+            return
+
+        # When the buffer is full, the oldest frame is the one that will be overwritten next.
+        if self._num_frames == self._buffer_capacity:
+            positions = (next_index + np.arange(self._buffer_capacity)) % self._buffer_capacity
+        else:
+            positions = np.flatnonzero(occupancy_mask)
+        episode_indices = np.asarray(self._data[OnlineBuffer.EPISODE_INDEX_KEY][positions])
+        self._add_episode_runs(int(positions[0]), episode_indices)
+
+    def _add_episode_runs(self, start: int, episode_indices: np.ndarray):
+        """Register the contiguous episode runs of `episode_indices`, stored in the ring from `start`."""
+        run_starts = np.concatenate([[0], np.flatnonzero(np.diff(episode_indices)) + 1])
+        run_lengths = np.diff(np.append(run_starts, len(episode_indices)))
+        for run_start, run_length in zip(run_starts.tolist(), run_lengths.tolist(), strict=True):
+            ep_idx = int(episode_indices[run_start])
+            self._episode_bounds[ep_idx] = ((start + run_start) % self._buffer_capacity, run_length)
+
+    def _evict_oldest_frames(self, n: int):
+        """Drop the `n` oldest frames from the episode index (they are about to be overwritten)."""
+        while n > 0 and self._episode_bounds:
+            ep_idx = next(iter(self._episode_bounds))
+            start, length = self._episode_bounds[ep_idx]
+            if length <= n:
+                del self._episode_bounds[ep_idx]
+                n -= length
+                self._num_frames -= length
+            else:
+                # Re-assigning an existing key keeps its (oldest first) position in the dict.
+                self._episode_bounds[ep_idx] = ((start + n) % self._buffer_capacity, length - n)
+                self._num_frames -= n
+                n = 0
+
+    def _read_sequence(self) -> int:
+        """Read the sequence counter, waiting for any write in progress (odd counter) to complete."""
+        while (sequence := int(self._data[OnlineBuffer.SEQUENCE_KEY])) % 2 == 1:
+            time.sleep(1e-4)
+        return sequence
+
+    def refresh(self) -> bool:
+        """Pick up frames added by another process writing to the same `write_dir`.
+
+        Only the frames written since the last sync are read, unless the writer has gone around the whole
+        ring in the meantime, in which case the episode index is rebuilt.
+
+        Returns:
+            True if new data was found.
+        """
+        full_rebuild = False
+        while True:
+            sequence = self._read_sequence()
+            if sequence == self._sequence and not full_rebuild:
+                return False
+
+            next_index = int(self._data[OnlineBuffer.NEXT_INDEX_KEY])
+            last_index = int(self._data[OnlineBuffer.INDEX_KEY][next_index - 1])
+            n_new = last_index - self._synced_last_index
+            if full_rebuild or not 0 < n_new <= self._buffer_capacity:
+                self._build_episode_index()
+            else:
+                positions = _ring_positions([self._synced_next_index], [n_new], self._buffer_capacity)
+                episode_indices = np.asarray(self._data[OnlineBuffer.EPISODE_INDEX_KEY][positions])
+                self._evict_oldest_frames(self._num_frames + n_new - self._buffer_capacity)
+                self._add_episode_runs(self._synced_next_index, episode_indices)
+                self._num_frames += n_new
+                self._synced_next_index = next_index
+                self._synced_last_index = last_index
+
+            if int(self._data[OnlineBuffer.SEQUENCE_KEY]) == sequence:
+                self._sequence = sequence
+                return True
+            # A write started while we were reading: the index may be torn, so start over from scratch.
+            full_rebuild = True
 
     @property
     def delta_timestamps(self) -> dict[str, np.ndarray] | None:
@@ -152,6 +273,9 @@ class OnlineBuffer(torch.utils.data.Dataset):
             # _next_index will be a pointer to the next index that we should start filling from when we add
             # more data.
             OnlineBuffer.NEXT_INDEX_KEY: {"dtype": np.dtype("int64"), "shape": ()},
+            # _sequence is incremented before and after every write so that readers in other processes can
+            # detect writes that happened while they were reading.
+            OnlineBuffer.SEQUENCE_KEY: {"dtype": np.dtype("int64"), "shape": ()},
             # Since the memmap is initialized with all-zeros, this keeps track of which indices are occupied
             # with real data rather than the dummy initialization.
             OnlineBuffer.OCCUPANCY_MASK_KEY: {"dtype": np.dtype("?"), "shape": (buffer_capacity,)},
@@ -180,7 +304,7 @@ class OnlineBuffer(torch.utils.data.Dataset):
         if not all(len(data[k]) == new_data_length for k in self.data_keys):
             raise ValueError("All data items should have the same length")
 
-        next_index = self._data[OnlineBuffer.NEXT_INDEX_KEY]
+        next_index = int(self._data[OnlineBuffer.NEXT_INDEX_KEY])
 
         # Sanity check to make sure that the new data indices start from 0.
         assert data[OnlineBuffer.EPISODE_INDEX_KEY][0].item() == 0
@@ -193,6 +317,14 @@ class OnlineBuffer(torch.utils.data.Dataset):
             data[OnlineBuffer.EPISODE_INDEX_KEY] += last_episode_index + 1
             data[OnlineBuffer.INDEX_KEY] += last_data_index + 1
 
+        # Mark the write as in progress for readers in other processes.
+        self._data[OnlineBuffer.SEQUENCE_KEY][...] = self._sequence + 1
+
+        # Keep the episode index in sync: frames about to be overwritten are always the oldest ones.
+        self._evict_oldest_frames(self._num_frames + new_data_length - self._buffer_capacity)
+        self._add_episode_runs(next_index, np.asarray(data[OnlineBuffer.EPISODE_INDEX_KEY]))
+        self._num_frames += new_data_length
+
         # Insert the new data starting from next_index. It may be necessary to wrap around to the start.
         n_surplus = max(0, new_data_length - (self._buffer_capacity - next_index))
         for k in self.data_keys:
@@ -204,31 +336,49 @@ class OnlineBuffer(torch.utils.data.Dataset):
                 self._data[k][next_index:] = data[k][:-n_surplus]
                 self._data[OnlineBuffer.OCCUPANCY_MASK_KEY][next_index:] = True
                 self._data[k][:n_surplus] = data[k][-n_surplus:]
+        # Write through the 0-d memmap (rather than rebinding the dict entry) so the pointer is persisted.
         if n_surplus == 0:
-            self._data[OnlineBuffer.NEXT_INDEX_KEY] = next_index + new_data_length
+            self._data[OnlineBuffer.NEXT_INDEX_KEY][...] = next_index + new_data_length
         else:
-            self._data[OnlineBuffer.NEXT_INDEX_KEY] = n_surplus
+            self._data[OnlineBuffer.NEXT_INDEX_KEY][...] = n_surplus
+
+        self._synced_next_index = int(self._data[OnlineBuffer.NEXT_INDEX_KEY])
+        self._synced_last_index = int(data[OnlineBuffer.INDEX_KEY][-1])
+        self._sequence += 2
+        self._data[OnlineBuffer.SEQUENCE_KEY][...] = self._sequence
 
     @property
     def data_keys(self) -> list[str]:
-        keys = set(self._data)
-        keys.remove(OnlineBuffer.OCCUPANCY_MASK_KEY)
-        keys.remove(OnlineBuffer.NEXT_INDEX_KEY)
-        return sorted(keys)
+        return sorted(k for k in self._data if not k.startswith("_"))
 
     @property
     def fps(self) -> float | None:
         return self._fps
 
+    @property
+    def buffer_capacity(self) -> int:
+        return self._buffer_capacity
+
     @property
     def num_episodes(self) -> int:
-        return len(
-            np.unique(self._data[OnlineBuffer.EPISODE_INDEX_KEY][self._data[OnlineBuffer.OCCUPANCY_MASK_KEY]])
-        )
+        return len(self._episode_bounds)
 
     @property
     def num_frames(self) -> int:
-        return np.count_nonzero(self._data[OnlineBuffer.OCCUPANCY_MASK_KEY])
+        return self._num_frames
+
+    @property
+    def episode_bounds(self) -> dict[int, tuple[int, int]]:
+        """Mapping from episode index to its (start, length) in the buffer, oldest episode first.
+
+        Note that `start + length` may exceed the buffer capacity, in which case the episode wraps around.
+        """
+        return self._episode_bounds
+
+    def get_episode_data_indices(self, episode_index: int, drop_n_last_frames: int = 0) -> np.ndarray:
+        """Buffer positions of the frames of an episode, in frame order."""
+        start, length = self._episode_bounds[episode_index]
+        return _ring_positions([start], [length - drop_n_last_frames], self._buffer_capacity)
 
     def __len__(self):
         return self.num_frames
@@ -245,6 +395,17 @@ class OnlineBuffer(torch.utils.data.Dataset):
         return item_
 
     def __getitem__(self, idx: int) -> dict[str, torch.Tensor]:
+        while True:
+            sequence = self._read_sequence()
+            if sequence != self._sequence:
+                self.refresh()
+                continue
+            item = self._get_item(idx)
+            # Retry if the writer touched the buffer while we were reading from it.
+            if int(self._data[OnlineBuffer.SEQUENCE_KEY]) == sequence:
+                return item
+
+    def _get_item(self, idx: int) -> dict[str, torch.Tensor]:
         if idx >= len(self) or idx < -len(self):
             raise IndexError
 
@@ -255,12 +416,7 @@ class OnlineBuffer(torch.utils.data.Dataset):
 
         episode_index = item[OnlineBuffer.EPISODE_INDEX_KEY]
         current_ts = item[OnlineBuffer.TIMESTAMP_KEY]
-        episode_data_indices = np.where(
-            np.bitwise_and(
-                self._data[OnlineBuffer.EPISODE_INDEX_KEY] == episode_index,
-                self._data[OnlineBuffer.OCCUPANCY_MASK_KEY],
-            )
-        )[0]
+        episode_data_indices = self.get_episode_data_indices(int(episode_index))
         episode_timestamps = self._data[OnlineBuffer.TIMESTAMP_KEY][episode_data_indices]
 
         for data_key in self.delta_timestamps:
@@ -355,17 +511,12 @@ def compute_sampler_weights(
         )
 
     if online_dataset is not None and len(online_dataset) > 0:
-        online_data_mask_indices = []
-        episode_indices = online_dataset.get_data_by_key("episode_index")
-        for episode_idx in torch.unique(episode_indices):
-            where_episode = torch.where(episode_indices == episode_idx)
-            start_index = where_episode[0][0]
-            end_index = where_episode[0][-1] + 1
-            online_data_mask_indices.extend(
-                range(start_index.item(), end_index.item() - online_drop_n_last_frames)
-            )
+        bounds = np.array(list(online_dataset.episode_bounds.values()), dtype=np.int64).reshape(-1, 2)
+        online_data_mask_indices = _ring_positions(
+            bounds[:, 0], bounds[:, 1] - online_drop_n_last_frames, online_dataset.buffer_capacity
+        )
         online_data_mask = torch.zeros(len(online_dataset), dtype=torch.bool)
-        online_data_mask[torch.tensor(online_data_mask_indices)] = True
+        online_data_mask[torch.from_numpy(online_data_mask_indices)] = True
         weights.append(
             torch.full(
                 size=(len(online_dataset),),
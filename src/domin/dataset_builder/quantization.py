@@ -0,0 +1,90 @@
+# Copyright 2026 Nimit Shah. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Compact storage of numeric features.
+
+A feature keeps its logical `dtype` (e.g. "float32"): frames are recorded, validated and stats are computed in
+that precision. An optional `storage` entry of the feature spec picks how its values are stored in the parquet
+files instead:
+
+- `{"dtype": "float16"}`: half precision.
+- `{"dtype": "bfloat16"}`: bfloat16, stored as the raw uint16 bits (parquet has no bfloat16 type). Same range as
+  float32, with 8 bits of mantissa.
+- `{"dtype": "int16", "scale": s, "offset": o}`: values are stored as `round((x - o) / s)`, clipped to the int16
+  range. `int16_storage(low, high)` picks the scale and offset covering a known range.
+
+Values are encoded when the parquet file of an episode is written, and decoded back to float32 on read.
+"""
+
+import numpy as np
+import torch
+
+# Parquet dtype of each storage dtype
+STORAGE_DTYPES = {"float16": "float16", "bfloat16": "uint16", "int16": "int16"}
+INT16_MAX = np.iinfo(np.int16).max
+
+
+def int16_storage(low: float, high: float) -> dict:
+    """Scaled int16 storage of values in [low, high], with a resolution of (high - low) / 65535."""
+    if not high > low:
+        raise ValueError(f"The range of int16 storage must not be empty, got [{low}, {high}].")
+    return {"dtype": "int16", "scale": (high - low) / (2 * INT16_MAX + 1), "offset": (high + low) / 2}
+
+
+def validate_storage(key: str, ft: dict) -> None:
+    storage = ft.get("storage")
+    if storage is None:
+        return
+    if ft["dtype"] not in ["float32", "float64"]:
+        raise ValueError(f"Compact storage is only supported for float features, '{key}' is {ft['dtype']}.")
+    if storage.get("dtype") not in STORAGE_DTYPES:
+        raise ValueError(
+            f"Unknown storage dtype '{storage.get('dtype')}' for '{key}', expected one of {list(STORAGE_DTYPES)}."
+        )
+    if storage["dtype"] == "int16" and not storage.get("scale", 0) > 0:
+        raise ValueError(f"The int16 storage of '{key}' needs a positive 'scale' (and an 'offset').")
+
+
+def storage_dtype(ft: dict) -> str:
+    """Dtype of a feature in the parquet files."""
+    return STORAGE_DTYPES[ft["storage"]["dtype"]] if "storage" in ft else ft["dtype"]
+
+
+def storage_specs(features: dict[str, dict]) -> dict[str, dict]:
+    """Storage of the features that aren't stored in their own dtype."""
+    return {key: ft["storage"] for key, ft in features.items() if "storage" in ft}
+
+
+def encode_storage(values: np.ndarray, storage: dict) -> np.ndarray:
+    values = np.asarray(values, dtype=np.float32)
+    if storage["dtype"] == "float16":
+        return values.astype(np.float16)
+    if storage["dtype"] == "bfloat16":
+        # Round to nearest even, then keep the upper 16 bits
+        bits = values.view(np.uint32)
+        bits = bits + (0x7FFF + ((bits >> 16) & 1))
+        return (bits >> 16).astype(np.uint16)
+    quantized = np.rint((values - storage.get("offset", 0.0)) / storage["scale"])
+    return quantized.clip(-INT16_MAX - 1, INT16_MAX).astype(np.int16)
+
+
+def decode_storage(values: np.ndarray | torch.Tensor, storage: dict) -> np.ndarray | torch.Tensor:
+    """Decode stored values back to float32. Tensors (of any integer or float dtype) are decoded to tensors."""
+    if isinstance(values, torch.Tensor):
+        return torch.from_numpy(decode_storage(values.numpy(), storage))
+    if storage["dtype"] == "float16":
+        return values.astype(np.float32)
+    if storage["dtype"] == "bfloat16":
+        return (values.astype(np.uint32) << 16).view(np.float32)
+    return (values * storage["scale"] + storage.get("offset", 0.0)).astype(np.float32)
@@ -0,0 +1,188 @@
+# Copyright 2026 Nimit Shah. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Deferred camera rendering of state-only datasets.
+
+Rendering and writing cameras is the main cost of a generation, while many episodes end up rerecorded. With
+`state_only`, the simulation controller records the joint states, the actions and the packed sim state of every
+frame (`observation.sim_state`: robot joints, robot pose and object poses, see `SimStateBuffer`), without cameras.
+`replay_cameras` then loads the saved episodes, drives a scene through their logged sim states in large batches of
+envs and records a new dataset with the cameras, only for the episodes that were kept:
+
+```python
+renderer = SimReplayRenderer(controller)  # or any `ReplayRenderer`
+replay_cameras("datasets/dexterous_states", record_cfg, renderer)
+```
+
+The scene is never stepped: the renderer writes the logged states and renders them. Episodes of similar lengths are
+replayed in the same story (see `schedule_replay`), so that few envs are idle at the end of a story.
+"""
+
+import dataclasses
+from pathlib import Path
+from typing import Any, Protocol
+
+import numpy as np
+import pyarrow.parquet as pq
+import torch
+
+from .dataset_record import SIM_STATE_KEY, DatasetRecord, DatasetRecordConfig
+from .lerobot_dataset import LeRobotDatasetMetadata
+from .quantization import decode_storage, storage_specs
+
+# info.json entry listing the source episode of each replayed episode
+SOURCE_EPISODES_KEY = "replay_source_episodes"
+# Columns of the source episodes that are replayed
+REPLAY_KEYS = ("observation.state", "action", SIM_STATE_KEY, "task_index")
+
+
+class ReplayRenderer(Protocol):
+    """Renders the cameras of a fixed batch of envs at given sim states."""
+
+    num_envs: int
+
+    def render(self, sim_state: torch.Tensor, env_ids: list[int], cameras: list[str]) -> dict[str, torch.Tensor]:
+        """
+        Args:
+            sim_state: (num_envs, D) packed sim states (see `SimStateBuffer`). Only the rows of `env_ids` are
+                recorded, the other rows hold the last state of a finished episode (or zeros).
+            env_ids: Envs whose frame is recorded.
+            cameras: Cameras to render (see `DatasetRecord.cameras_due`).
+
+        Returns:
+            Camera name -> (num_envs, H, W, C) frames, and `{camera}.{channel}` -> (num_envs, H, W, 1) for the
+            `camera_channels`, as passed to `DatasetRecord.step`.
+        """
+        ...
+
+
+def schedule_replay(lengths: dict[int, int], num_envs: int) -> list[list[int]]:
+    """
+    Group episodes into stories of at most `num_envs` episodes, longest first, so that the episodes of a story
+    have similar lengths.
+
+    Args:
+        lengths: Episode index -> number of frames.
+        num_envs: Number of envs replayed together.
+
+    Returns:
+        Episode indices of each story.
+    """
+    order = sorted(lengths, key=lambda ep_idx: (-lengths[ep_idx], ep_idx))
+    return [order[start : start + num_envs] for start in range(0, len(order), num_envs)]
+
+
+def load_episode_states(meta: LeRobotDatasetMetadata, ep_idx: int) -> dict[str, np.ndarray]:
+    """Columns of an episode needed to replay it (see `REPLAY_KEYS`), decoded from their storage."""
+    table = pq.read_table(Path(meta.root) / meta.get_data_file_path(ep_idx), columns=list(REPLAY_KEYS))
+    columns = {key: np.array(table[key].to_pylist()) for key in REPLAY_KEYS}
+    for key, storage in storage_specs(meta.features).items():
+        if key in columns:
+            columns[key] = decode_storage(columns[key], storage)
+    return columns
+
+
+def _pad_episodes(episodes: list[np.ndarray], num_envs: int, length: int) -> np.ndarray:
+    """(num_envs, length, ...) array of the episodes, each one repeating its last frame up to `length`."""
+    padded = np.zeros((num_envs, length, *episodes[0].shape[1:]), dtype=episodes[0].dtype)
+    for env_idx, values in enumerate(episodes):
+        padded[env_idx, : len(values)] = values
+        padded[env_idx, len(values) :] = values[-1]
+    return padded
+
+
+def _replay_story(
+    recorder: DatasetRecord,
+    renderer: ReplayRenderer,
+    source: LeRobotDatasetMetadata,
+    story: list[int],
+    episode_indices: list[int],
+) -> None:
+    """Record the episodes `story` of `source` under `episode_indices`, with their cameras rendered."""
+    num_envs = recorder.cfg.num_envs
+    episodes = [load_episode_states(source, ep_idx) for ep_idx in story]
+    lengths = [len(episode["action"]) for episode in episodes]
+    columns = {
+        key: _pad_episodes([episode[key] for episode in episodes], num_envs, max(lengths)) for key in REPLAY_KEYS
+    }
+    batches = {key: torch.from_numpy(values) for key, values in columns.items() if key != "task_index"}
+
+    tasks = None
+    recorder.new_story(episode_indices=episode_indices)
+    for frame_index in range(max(lengths)):
+        frame_tasks = [source.tasks[int(i)] for i in columns["task_index"][: len(story), frame_index]]
+        if frame_tasks != tasks:
+            tasks = frame_tasks
+            recorder.set_tasks(tasks)
+
+        sim_state = batches[SIM_STATE_KEY][:, frame_index]
+        cameras = recorder.cameras_due()
+        cam_obs = renderer.render(sim_state, recorder.active_env_ids, cameras) if cameras else {}
+        recorder.step(
+            batches["observation.state"][:, frame_index],
+            batches["action"][:, frame_index],
+            cam_obs,
+            sim_state=sim_state,
+        )
+        recorder.finish_episodes([env_idx for env_idx, length in enumerate(lengths) if length == frame_index + 1])
+
+
+def replay_cameras(
+    source_root: str | Path,
+    cfg: DatasetRecordConfig,
+    renderer: ReplayRenderer,
+    episodes: list[int] | None = None,
+    metadata: dict[str, Any] | None = None,
+) -> list[int]:
+    """
+    Record a dataset with cameras from the episodes of a state-only dataset.
+
+    The episodes are renumbered from 0 in their original order; the source episode of each of them is saved in
+    info.json (`replay_source_episodes`).
+
+    Args:
+        source_root: Root of a dataset with an `observation.sim_state` feature (recorded with `sim_state_names`).
+        cfg: Config of the recorded dataset, with its cameras. Its `num_envs` must match the renderer's.
+        renderer: Renders the cameras of the replayed sim states.
+        episodes: Source episodes to replay (e.g. after filtering). Defaults to all of them.
+        metadata: Extra entries of the info.json of the recorded dataset (e.g. its config fingerprint).
+
+    Returns:
+        Source episode index of each recorded episode.
+    """
+    source = LeRobotDatasetMetadata(cfg.repo_id, root=source_root)
+    if SIM_STATE_KEY not in source.features:
+        raise ValueError(
+            f"The dataset at {source_root} has no '{SIM_STATE_KEY}' feature: record it with `sim_state_names`."
+        )
+    if source.fps != cfg.fps:
+        raise ValueError(f"The dataset at {source_root} was recorded at {source.fps} fps, not {cfg.fps}.")
+    if source.features["observation.state"]["names"] != list(cfg.joint_names):
+        raise ValueError(f"The joints of the dataset at {source_root} don't match `joint_names`.")
+    if cfg.num_envs != renderer.num_envs:
+        raise ValueError(f"`num_envs` ({cfg.num_envs}) must match the renderer's ({renderer.num_envs}).")
+
+    episodes = sorted(source.episodes if episodes is None else episodes)
+    cfg = dataclasses.replace(cfg, num_episodes=len(episodes))
+    # Kept episodes are renumbered densely, in their original order
+    episode_indices = {ep_idx: i for i, ep_idx in enumerate(episodes)}
+    stories = schedule_replay({ep_idx: source.episodes[ep_idx]["length"] for ep_idx in episodes}, cfg.num_envs)
+
+    with DatasetRecord(cfg) as recorder:
+        recorder.save_metadata(SOURCE_EPISODES_KEY, episodes)
+        for key, value in (metadata or {}).items():
+            recorder.save_metadata(key, value)
+        for story in stories:
+            _replay_story(recorder, renderer, source, story, [episode_indices[ep_idx] for ep_idx in story])
+    return episodes
@@ -0,0 +1,281 @@
+# Copyright 2026 Nimit Shah. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Sequential, iterable reader of a LeRobot dataset, for passes over entire corpora.
+
+`LeRobotDataset` is map-style: every item seeks into the Arrow table and into each video. Instead,
+`StreamingLeRobotDataset` reads the parquet file of an episode once and decodes its videos front to back in a
+single pass. Frames are emitted in order; the camera frames needed by `delta_timestamps` windows are kept in a ring
+that only holds the frames of the current window. Randomness comes from shuffling the episode order and from a
+bounded shuffle buffer over the emitted frames.
+
+Episodes are split across distributed ranks and dataloader workers, so every frame is read once per epoch:
+
+```python
+dataset = StreamingLeRobotDataset("nimit/dexterous", root="datasets/dexterous", shuffle_buffer_size=10_000)
+loader = torch.utils.data.DataLoader(dataset, batch_size=64, num_workers=8)
+for epoch in range(num_epochs):
+    dataset.set_epoch(epoch)
+    for batch in loader:
+        ...
+```
+"""
+
+import io
+import random
+from collections import deque
+from collections.abc import Callable, Iterator
+from pathlib import Path
+
+import numpy as np
+import PIL.Image
+import pyarrow as pa
+import pyarrow.parquet as pq
+import torch
+import torch.distributed as dist
+import torch.utils.data
+
+from .camera_channels import CHANNEL_PIX_FMT, channel_specs, decode_channel
+from .lerobot_dataset import LeRobotDatasetMetadata
+from .quantization import decode_storage, storage_specs
+from .utils import check_delta_timestamps, get_delta_indices, get_nearest_camera_frames
+from .video_utils import iter_video_frames
+
+
+class FrameRing:
+    """Random access to the recent frames of a sequential frame iterator.
+
+    Frames are pulled from the iterator on demand and dropped with `release`, so that only the frames between the
+    oldest one still needed and the newest one requested are kept in memory.
+    """
+
+    def __init__(self, frames: Iterator[torch.Tensor]):
+        self.frames = frames
+        self.ring = deque()
+        self.start = 0  # Index of the first frame of the ring
+
+    def __getitem__(self, index: int) -> torch.Tensor:
+        if index < self.start:
+            raise IndexError(f"Frame {index} was already released (the oldest frame kept is {self.start}).")
+        while self.start + len(self.ring) <= index:
+            frame = next(self.frames, None)
+            if frame is None:
+                raise IndexError(f"Frame {index} requested, but there are only {self.start + len(self.ring)} frames.")
+            self.ring.append(frame)
+        return self.ring[index - self.start]
+
+    def __len__(self) -> int:
+        return len(self.ring)
+
+    def release(self, index: int) -> None:
+        """Drop the frames before `index`."""
+        while self.ring and self.start < index:
+            self.ring.popleft()
+            self.start += 1
+
+
+def _column_to_tensor(column: pa.ChunkedArray, shape: tuple) -> torch.Tensor:
+    array = column.combine_chunks()
+    if pa.types.is_list(array.type) or pa.types.is_fixed_size_list(array.type):
+        values = array.flatten().to_numpy(zero_copy_only=False).reshape(len(array), *shape)
+    else:
+        values = array.to_numpy(zero_copy_only=False)
+    # Arrow buffers are read-only
+    return torch.from_numpy(np.array(values))
+
+
+def _iter_image_column(column: pa.ChunkedArray, channel: dict | None = None) -> Iterator[torch.Tensor]:
+    for image in column.to_pylist():
+        with PIL.Image.open(io.BytesIO(image["bytes"])) as img:
+            if channel is not None:
+                # 16-bit depth or segmentation image
+                yield torch.from_numpy(np.array(img).astype(np.int32))[None]
+            else:
+                yield torch.from_numpy(np.array(img.convert("RGB"))).permute(2, 0, 1)
+
+
+class StreamingLeRobotDataset(torch.utils.data.IterableDataset):
+    def __init__(
+        self,
+        repo_id: str,
+        root: str | Path | None = None,
+        episodes: list[int] | None = None,
+        image_transforms: Callable | None = None,
+        delta_timestamps: dict[list[float]] | None = None,
+        tolerance_s: float = 1e-4,
+        shuffle_buffer_size: int = 0,
+        seed: int = 0,
+        rank: int | None = None,
+        world_size: int | None = None,
+    ):
+        """
+        Args:
+            repo_id: Name of the dataset.
+            root: Local directory of the dataset.
+            episodes: Episodes to read (all of them if None).
+            image_transforms: Transform applied to the camera frames of each item.
+            delta_timestamps: Same as for `LeRobotDataset`: offsets (in seconds) of the frames to stack for each
+                key. Frames outside of the episode are clamped to its ends and flagged in `{key}_is_pad`.
+            tolerance_s: Tolerance used to check that `delta_timestamps` are multiples of 1/fps.
+            shuffle_buffer_size: Number of frames of the shuffle buffer. When > 0, the episode order is also
+                shuffled every epoch. 0 reads frames in order.
+            seed: Seed of the shuffling, combined with the epoch (see `set_epoch`).
+            rank: Rank of this process. Defaults to the rank of the initialized process group (or 0).
+            world_size: Number of processes. Defaults to the size of the initialized process group (or 1).
+        """
+        super().__init__()
+        self.meta = LeRobotDatasetMetadata(repo_id, root=root)
+        self.root = self.meta.root
+        self.episodes = sorted(self.meta.episodes) if episodes is None else list(episodes)
+        self.image_transforms = image_transforms
+        self.shuffle_buffer_size = shuffle_buffer_size
+        self.seed = seed
+        self.epoch = 0
+
+        distributed = dist.is_available() and dist.is_initialized()
+        self.rank = rank if rank is not None else (dist.get_rank() if distributed else 0)
+        self.world_size = world_size if world_size is not None else (dist.get_world_size() if distributed else 1)
+
+        self.delta_timestamps = delta_timestamps
+        self.delta_indices = None
+        if delta_timestamps is not None:
+            check_delta_timestamps(delta_timestamps, self.fps, tolerance_s)
+            self.delta_indices = get_delta_indices(delta_timestamps, self.fps)
+
+    @property
+    def fps(self) -> int:
+        return self.meta.fps
+
+    @property
+    def features(self) -> dict[str, dict]:
+        return self.meta.features
+
+    @property
+    def num_episodes(self) -> int:
+        return len(self.episodes)
+
+    @property
+    def num_frames(self) -> int:
+        """Number of frames of the selected episodes (over all ranks and workers)."""
+        return sum(self.meta.episodes[ep_idx]["length"] for ep_idx in self.episodes)
+
+    def set_epoch(self, epoch: int) -> None:
+        """Change the shuffling of the next iterations. Call it with the same value on every rank."""
+        self.epoch = epoch
+
+    def _shard(self) -> tuple[int, int]:
+        worker_info = torch.utils.data.get_worker_info()
+        worker_id, num_workers = (worker_info.id, worker_info.num_workers) if worker_info else (0, 1)
+        return self.rank * num_workers + worker_id, self.world_size * num_workers
+
+    def shard_episodes(self) -> list[int]:
+        """Episodes read by this rank and dataloader worker, in order."""
+        episodes = list(self.episodes)
+        if self.shuffle_buffer_size > 0:
+            # Same permutation on every rank and worker, so that the shards don't overlap
+            random.Random(self.seed + self.epoch).shuffle(episodes)
+        shard, num_shards = self._shard()
+        return episodes[shard::num_shards]
+
+    def _frame_rings(self, ep_idx: int, table: pa.Table, timestamps: np.ndarray) -> dict:
+        """Build the ring and the frame index (for every frame of the episode) of each camera."""
+        rings = {}
+        for key in self.meta.video_keys:
+            video_path = self.root / self.meta.get_video_file_path(ep_idx, key)
+            frame_indices = np.arange(len(timestamps))
+            if "fps" in self.features[key]:
+                # Rate-decoupled camera: its video only holds the fresh frames
+                camera_ts = self.meta.episodes[ep_idx]["camera_timestamps"][key]
+                frame_indices = get_nearest_camera_frames(camera_ts, timestamps)
+            pix_fmt = CHANNEL_PIX_FMT if "channel" in self.features[key] else "rgb24"
+            rings[key] = (FrameRing(iter_video_frames(video_path, pix_fmt)), frame_indices)
+        for key in self.meta.image_keys:
+            image_frames = _iter_image_column(table[key], self.features[key].get("channel"))
+            rings[key] = (FrameRing(image_frames), np.arange(len(timestamps)))
+        return rings
+
+    def iter_episode(self, ep_idx: int) -> Iterator[dict]:
+        """Yield the items of an episode, in order."""
+        table = pq.read_table(self.root / self.meta.get_data_file_path(ep_idx))
+        length = table.num_rows
+        columns = {
+            key: _column_to_tensor(table[key], tuple(ft["shape"]))
+            for key, ft in self.features.items()
+            if key in table.column_names and ft["dtype"] not in ["image", "video", "string"]
+        }
+        for key, storage in storage_specs(self.features).items():
+            columns[key] = decode_storage(columns[key], storage)
+        rings = self._frame_rings(ep_idx, table, columns["timestamp"].numpy())
+        delta_indices = self.delta_indices or {}
+
+        channels = channel_specs(self.features)
+
+        def camera_frames(key: str, indices: list[int]) -> torch.Tensor:
+            ring, frame_indices = rings[key]
+            frames = torch.stack([ring[frame_indices[i]] for i in indices])
+            if key in channels:
+                return decode_channel(frames, channels[key])
+            return frames.type(torch.float32) / 255
+
+        for i in range(length):
+            item = {key: column[i] for key, column in columns.items()}
+            for key, deltas in delta_indices.items():
+                query = [i + delta for delta in deltas]
+                clamped = [min(max(q, 0), length - 1) for q in query]
+                item[f"{key}_is_pad"] = torch.BoolTensor([q < 0 or q >= length for q in query])
+                item[key] = camera_frames(key, clamped) if key in rings else columns[key][clamped]
+            for key in rings:
+                if key not in delta_indices:
+                    item[key] = camera_frames(key, [i])[0]
+
+            if self.image_transforms is not None:
+                for key in self.meta.camera_keys:
+                    item[key] = self.image_transforms(item[key])
+            item["task"] = self.meta.tasks[item["task_index"].item()]
+            yield item
+
+            # Frames older than the window of the next item are not needed anymore
+            for key, (ring, frame_indices) in rings.items():
+                oldest = max(0, i + 1 + min(0, *delta_indices.get(key, [0])))
+                ring.release(frame_indices[min(oldest, length - 1)])
+
+    def __iter__(self) -> Iterator[dict]:
+        items = (item for ep_idx in self.shard_episodes() for item in self.iter_episode(ep_idx))
+        if self.shuffle_buffer_size <= 0:
+            yield from items
+            return
+
+        shard, _ = self._shard()
+        rng = random.Random(f"{self.seed}-{self.epoch}-{shard}")
+        buffer = []
+        for item in items:
+            if len(buffer) < self.shuffle_buffer_size:
+                buffer.append(item)
+                continue
+            idx = rng.randrange(len(buffer))
+            yield buffer[idx]
+            buffer[idx] = item
+        rng.shuffle(buffer)
+        yield from buffer
+
+    def __repr__(self):
+        return (
+            f"{self.__class__.__name__}({{\n"
+            f"    Repository ID: '{self.meta.repo_id}',\n"
+            f"    Number of selected episodes: '{self.num_episodes}',\n"
+            f"    Number of selected samples: '{self.num_frames}',\n"
+            f"    Shard: rank {self.rank} of {self.world_size},\n"
+            f"    Shuffle buffer size: {self.shuffle_buffer_size},\n"
+            f"}})"
+        )
@@ -0,0 +1,192 @@
+# Copyright 2026 Nimit Shah. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Low-overhead telemetry for the recording loop: per-phase timers and values aggregated into rolling histograms,
+counters and gauges, exported periodically as JSON lines and in the Prometheus text format.
+
+```
+telemetry = Telemetry("outputs/telemetry")
+with telemetry.timer("sim.step"):
+    sim.step()
+telemetry.observe("settle.steps", 12)
+telemetry.maybe_export()
+```
+
+Timers measure host wall time. CUDA work is asynchronous, so GPU time shows up in the phase that next waits
+for the device (e.g. a `.item()` or `.cpu()` call) rather than in the phase that queued it.
+"""
+
+import json
+import os
+import re
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+
+import numpy as np
+
+JSONL_NAME = "telemetry.jsonl"
+PROMETHEUS_NAME = "telemetry.prom"
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+class RollingHistogram:
+    """
+    Distribution of the last `window` values of a metric (kept in a ring buffer), plus the count and sum of
+    all the values ever observed.
+    """
+
+    def __init__(self, window: int = 1024):
+        self.values = np.zeros(window, dtype=np.float64)
+        self.size = 0
+        self.pos = 0
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, value: float):
+        self.values[self.pos] = value
+        self.pos = (self.pos + 1) % len(self.values)
+        self.size = min(self.size + 1, len(self.values))
+        self.count += 1
+        self.total += value
+
+    def summary(self) -> dict[str, float]:
+        window = self.values[: self.size]
+        summary = {"count": self.count, "sum": self.total}
+        if self.size:
+            summary["mean"] = float(window.mean())
+            summary["max"] = float(window.max())
+            for q, value in zip(QUANTILES, np.quantile(window, QUANTILES)):
+                summary[f"p{round(q * 100)}"] = float(value)
+        return summary
+
+
+class Telemetry:
+    def __init__(
+        self,
+        output_dir: str | Path | None = None,
+        export_interval_s: float = 10.0,
+        window: int = 1024,
+        enabled: bool = True,
+    ):
+        """
+        Args:
+            output_dir: Directory of the `telemetry.jsonl` (one line appended per export) and `telemetry.prom`
+                (overwritten on every export, e.g. for a node exporter textfile collector) files. If None,
+                metrics are still aggregated (e.g. for progress summaries) but never written.
+            export_interval_s: Minimum time between two exports by `maybe_export`.
+            window: Number of recent values each histogram keeps.
+            enabled: If False, every call is a no-op.
+        """
+        self.output_dir = Path(output_dir) if output_dir is not None else None
+        self.export_interval_s = export_interval_s
+        self.window = window
+        self.enabled = enabled
+        self.histograms: dict[str, RollingHistogram] = {}
+        self.counters: dict[str, float] = defaultdict(float)
+        self.gauges: dict[str, float] = {}
+        self.start_time = time.time()
+        self.last_export_time = time.perf_counter()
+
+        if self.enabled and self.output_dir is not None:
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+
+    def timer(self, name: str):
+        """Context manager observing the wall time (in seconds) spent in its block under `name`."""
+        if not self.enabled:
+            return nullcontext()
+        return self._timer(name)
+
+    @contextmanager
+    def _timer(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def observe(self, name: str, value: float):
+        """Add a value to the rolling histogram of `name`."""
+        if not self.enabled:
+            return
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = RollingHistogram(self.window)
+        histogram.add(value)
+
+    def count(self, name: str, value: float = 1):
+        if self.enabled:
+            self.counters[name] += value
+
+    def gauge(self, name: str, value: float):
+        if self.enabled:
+            self.gauges[name] = value
+
+    def summary(self) -> dict:
+        return {
+            "time": time.time(),
+            "elapsed_s": time.time() - self.start_time,
+            "histograms": {name: h.summary() for name, h in self.histograms.items()},
+            "counters": dict(self.counters),
+            "gauges": dict(self.gauges),
+        }
+
+    def maybe_export(self) -> bool:
+        """Export if `export_interval_s` passed since the last export. Cheap enough to call on every step."""
+        if not self.enabled or time.perf_counter() - self.last_export_time < self.export_interval_s:
+            return False
+        self.export()
+        return True
+
+    def export(self):
+        self.last_export_time = time.perf_counter()
+        if not self.enabled or self.output_dir is None:
+            return
+        summary = self.summary()
+        with open(self.output_dir / JSONL_NAME, "a") as f:
+            f.write(json.dumps(summary) + "\n")
+
+        # Written then renamed, so that scrapers never read a partial file
+        tmp_path = self.output_dir / f".{PROMETHEUS_NAME}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(format_prometheus(summary))
+        os.replace(tmp_path, self.output_dir / PROMETHEUS_NAME)
+
+
+def _prometheus_name(name: str) -> str:
+    return "domin_" + re.sub(r"[^a-zA-Z0-9_]", "_", name)
+
+
+def format_prometheus(summary: dict) -> str:
+    """Format a `Telemetry.summary()` in the Prometheus text exposition format (histograms as summaries)."""
+    lines = []
+    for name, histogram in summary["histograms"].items():
+        metric = _prometheus_name(name)
+        lines.append(f"# TYPE {metric} summary")
+        for q in QUANTILES:
+            key = f"p{round(q * 100)}"
+            if key in histogram:
+                lines.append(f'{metric}{{quantile="{q}"}} {histogram[key]}')
+        lines.append(f"{metric}_sum {histogram['sum']}")
+        lines.append(f"{metric}_count {histogram['count']}")
+    for name, value in summary["counters"].items():
+        metric = _prometheus_name(name) + "_total"
+        lines.append(f"# TYPE {metric} counter")
+        lines.append(f"{metric} {value}")
+    for name, value in summary["gauges"].items():
+        metric = _prometheus_name(name)
+        lines.append(f"# TYPE {metric} gauge")
+        lines.append(f"{metric} {value}")
+    return "\n".join(lines) + "\n"
@@ -35,6 +35,8 @@ from huggingface_hub.errors import RevisionNotFoundError
 from PIL import Image as PILImage
 from torchvision import transforms
 
+from .camera_channels import camera_observation_name, decode_channel
+from .quantization import decode_storage, storage_dtype, validate_storage
 from .types import DictLike, FeatureType, PolicyFeature
 
 DEFAULT_CHUNK_SIZE = 1000  # Max number of episodes per chunk
@@ -283,15 +285,26 @@ def load_image_as_numpy(
     return img_array
 
 
-def hf_transform_to_torch(items_dict: dict[torch.Tensor | None]):
+def hf_transform_to_torch(
+    items_dict: dict[torch.Tensor | None],
+    storage: dict[str, dict] | None = None,
+    channels: dict[str, dict] | None = None,
+):
     """Get a transform function that convert items from Hugging Face dataset (pyarrow)
     to torch tensors. Importantly, images are converted from PIL, which corresponds to
     a channel last representation (h w c) of uint8 type, to a torch image representation
     with channel first (c h w) of float32 type in range [0,1].
+    Features in `storage` (see `quantization.storage_specs`) are decoded back to float32, and the 16-bit images
+    of `channels` (see `camera_channels.channel_specs`) to (1 h w) depth or segmentation tensors.
     """
     for key in items_dict:
         first_item = items_dict[key][0]
-        if isinstance(first_item, PILImage.Image):
+        if channels and key in channels and isinstance(first_item, PILImage.Image):
+            items_dict[key] = [
+                decode_channel(torch.from_numpy(np.array(img).astype(np.int32))[None], channels[key])
+                for img in items_dict[key]
+            ]
+        elif isinstance(first_item, PILImage.Image):
             to_tensor = transforms.ToTensor()
             items_dict[key] = [to_tensor(img) for img in items_dict[key]]
         elif first_item is None:
@@ -300,6 +313,8 @@ def hf_transform_to_torch(items_dict: dict[torch.Tensor | None]):
             items_dict[key] = [
                 x if isinstance(x, str) else torch.tensor(x) for x in items_dict[key]
             ]
+            if storage and key in storage:
+                items_dict[key] = [decode_storage(x, storage[key]) for x in items_dict[key]]
     return items_dict
 
 
@@ -393,24 +408,25 @@ def get_repo_versions(repo_id: str) -> list[packaging.version.Version]:
 def get_hf_features_from_features(features: dict) -> datasets.Features:
     hf_features = {}
     for key, ft in features.items():
+        dtype = storage_dtype(ft)
         if ft["dtype"] == "video":
             continue
         elif ft["dtype"] == "image":
             hf_features[key] = datasets.Image()
         elif ft["shape"] == (1,):
-            hf_features[key] = datasets.Value(dtype=ft["dtype"])
+            hf_features[key] = datasets.Value(dtype=dtype)
         elif len(ft["shape"]) == 1:
             hf_features[key] = datasets.Sequence(
-                length=ft["shape"][0], feature=datasets.Value(dtype=ft["dtype"])
+                length=ft["shape"][0], feature=datasets.Value(dtype=dtype)
             )
         elif len(ft["shape"]) == 2:
-            hf_features[key] = datasets.Array2D(shape=ft["shape"], dtype=ft["dtype"])
+            hf_features[key] = datasets.Array2D(shape=ft["shape"], dtype=dtype)
         elif len(ft["shape"]) == 3:
-            hf_features[key] = datasets.Array3D(shape=ft["shape"], dtype=ft["dtype"])
+            hf_features[key] = datasets.Array3D(shape=ft["shape"], dtype=dtype)
         elif len(ft["shape"]) == 4:
-            hf_features[key] = datasets.Array4D(shape=ft["shape"], dtype=ft["dtype"])
+            hf_features[key] = datasets.Array4D(shape=ft["shape"], dtype=dtype)
         elif len(ft["shape"]) == 5:
-            hf_features[key] = datasets.Array5D(shape=ft["shape"], dtype=ft["dtype"])
+            hf_features[key] = datasets.Array5D(shape=ft["shape"], dtype=dtype)
         else:
             raise ValueError(f"Corresponding feature is not valid: {ft}")
 
@@ -426,8 +442,19 @@ def _validate_feature_names(features: dict[str, dict]) -> None:
 
 
 def hw_to_dataset_features(
-    hw_features: dict[str, type | tuple], prefix: str, use_video: bool = True
+    hw_features: dict[str, type | tuple],
+    prefix: str,
+    use_video: bool = True,
+    storage: dict[str, dict] | None = None,
 ) -> dict[str, dict]:
+    """Build the dataset features of the joints and cameras of a robot.
+
+    Args:
+        hw_features: Joint names (mapped to `float`) and camera names (mapped to their (h, w, c) shape).
+        prefix: "observation" or "action".
+        use_video: Store the cameras as videos instead of images.
+        storage: Compact storage (see `quantization`) of some of the resulting features, by feature name.
+    """
     features = {}
     joint_fts = {key: ftype for key, ftype in hw_features.items() if ftype is float}
     cam_fts = {
@@ -455,6 +482,11 @@ def hw_to_dataset_features(
             "names": ["height", "width", "channels"],
         }
 
+    for key, spec in (storage or {}).items():
+        if key in features:
+            features[key]["storage"] = spec
+            validate_storage(key, features[key])
+
     _validate_feature_names(features)
     return features
 
@@ -471,7 +503,7 @@ def build_dataset_frame(
                 [values[name] for name in ft["names"]], dtype=np.float32
             )
         elif ft["dtype"] in ["image", "video"]:
-            frame[key] = values[key.removeprefix(f"{prefix}.images.")]
+            frame[key] = values[camera_observation_name(key, prefix)]
 
     return frame
 
@@ -679,6 +711,38 @@ def get_delta_indices(
     return delta_indices
 
 
+def is_camera_frame_due(frame_index: int, fps: int, camera_fps: int | None) -> bool:
+    """Whether a camera recorded at `camera_fps` produces a fresh frame at `frame_index` of a `fps` episode.
+
+    A camera frame `k` is captured at the first dataset frame whose timestamp is not earlier than
+    `k / camera_fps`. Cameras without their own rate are captured at every frame.
+    """
+    if camera_fps is None or frame_index == 0:
+        return True
+    return (frame_index * camera_fps) // fps != ((frame_index - 1) * camera_fps) // fps
+
+
+def get_nearest_camera_frames(
+    camera_timestamps: list[float] | np.ndarray, query_timestamps: list[float] | np.ndarray
+) -> np.ndarray:
+    """Map each query timestamp to the index of the camera frame captured nearest to it.
+
+    Args:
+        camera_timestamps: Sorted capture timestamps of the camera frames of an episode.
+        query_timestamps: Timestamps (e.g. of state frames) to look up.
+    """
+    camera_timestamps = np.asarray(camera_timestamps)
+    query_timestamps = np.asarray(query_timestamps)
+    if len(camera_timestamps) == 1:
+        return np.zeros(len(query_timestamps), dtype=np.int64)
+    right = np.searchsorted(camera_timestamps, query_timestamps).clip(1, len(camera_timestamps) - 1)
+    left = right - 1
+    use_left = np.abs(query_timestamps - camera_timestamps[left]) <= np.abs(
+        camera_timestamps[right] - query_timestamps
+    )
+    return np.where(use_left, left, right)
+
+
 def cycle(iterable):
     """The equivalent of itertools.cycle, but safe for Pytorch dataloaders.
 
@@ -899,8 +963,8 @@ def validate_episode_buffer(episode_buffer: dict, total_episodes: int, features:
     if "size" not in episode_buffer:
         raise ValueError("size key not found in episode_buffer")
 
-    if "task" not in episode_buffer:
-        raise ValueError("task key not found in episode_buffer")
+    if "task_segments" not in episode_buffer:
+        raise ValueError("task_segments key not found in episode_buffer")
 
     # if episode_buffer["episode_index"] != total_episodes:
     #     # TODO(aliberts): Add option to use existing episode_index
@@ -917,7 +981,7 @@ def validate_episode_buffer(episode_buffer: dict, total_episodes: int, features:
             "You must add one or several frames with `add_frame` before calling `add_episode`."
         )
 
-    buffer_keys = set(episode_buffer.keys()) - {"task", "size"}
+    buffer_keys = set(episode_buffer.keys()) - {"task_segments", "size", "camera_timestamps"}
     if not buffer_keys == set(features):
         raise ValueError(
             f"Features from `episode_buffer` don't match the ones in `features`."
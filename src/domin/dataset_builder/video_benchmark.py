@@ -0,0 +1,351 @@
+# Copyright 2026 Nimit Shah. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Random-access decode benchmark of the video encoding settings, to pick the preset generated datasets use.
+
+`encode_video_frames` trades file size against the time training takes to decode a frame. A frame can only be
+decoded from the key frame before it, so the key frame interval `g` bounds the frames decoded per query. `crf`
+sets the quality (and size), and `fast_decode` makes the encoder choose tools that are cheaper to decode. This
+benchmark encodes a synthetic rendered scene (a gradient background with moving boxes and a little sensor noise)
+at every setting of a grid. For each setting it measures:
+
+-   bytes per frame and encode time;
+-   quality, as the PSNR of the decoded frames;
+-   the p50/p99 latency of random-access queries through `decode_video_frames`, for every available backend.
+    Queries follow a `delta_timestamps` pattern (e.g. `-0.1 0.0` for the current frame and the one before).
+
+The recommended setting is the one with the lowest p99 latency among those that reach `min_psnr_db` (and fit in
+`max_bytes_per_frame`). It can be written into a dataset's info.json as `video_encoding`, which the videos of the
+episodes it records from then on are encoded with:
+
+```bash
+python -m domin.dataset_builder.video_benchmark --width 256 --height 256 --delta-timestamps -0.1 0.0 \\
+    --root datasets/dexterous --output video_benchmark.json
+```
+"""
+
+import argparse
+import importlib.util
+import itertools
+import json
+import math
+import random
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+import av
+import numpy as np
+import PIL.Image
+
+from .utils import load_info, write_info
+from .video_utils import (
+    VIDEO_ENCODING_KEY,
+    decode_video_frames,
+    encode_video_frames,
+    iter_video_frames,
+)
+
+# info.json entry with the measurements of the recommended `video_encoding`
+VIDEO_BENCHMARK_KEY = "video_encoding_benchmark"
+DEFAULT_BACKENDS = ["torchcodec", "pyav"]
+# Failures of an encoder or decoding backend, reported per setting instead of stopping the benchmark. The decoders
+# assert that the decoded frames are within the tolerance of the queried timestamps
+CODEC_ERRORS = (av.FFmpegError, AssertionError, ImportError, OSError, RuntimeError, ValueError)
+
+
+@dataclass(frozen=True)
+class EncodingSetting:
+    vcodec: str = "libsvtav1"
+    g: int | None = 2
+    crf: int | None = 30
+    fast_decode: int = 0
+
+    @property
+    def name(self) -> str:
+        return f"{self.vcodec}-g{self.g}-crf{self.crf}-fd{self.fast_decode}"
+
+    def as_kwargs(self) -> dict:
+        """Keyword arguments of `encode_video_frames` (and value of `video_encoding`)."""
+        return asdict(self)
+
+
+@dataclass
+class BenchmarkResult:
+    setting: EncodingSetting
+    bytes_per_frame: float = 0.0
+    encode_s: float = 0.0
+    # Mean PSNR of the decoded frames, in dB (inf when lossless)
+    psnr_db: float = 0.0
+    # backend -> {"p50_ms", "p99_ms", "mean_ms"} of the random-access queries
+    latency_ms: dict[str, dict[str, float]] = field(default_factory=dict)
+    # backend (or "encode") -> error message, for the backends that failed
+    errors: dict[str, str] = field(default_factory=dict)
+
+    def as_dict(self) -> dict:
+        return {"setting": self.setting.as_kwargs(), **{k: v for k, v in asdict(self).items() if k != "setting"}}
+
+
+def encoding_grid(
+    vcodecs: list[str], gs: list[int | None], crfs: list[int | None], fast_decodes: list[int]
+) -> list[EncodingSetting]:
+    return [EncodingSetting(*values) for values in itertools.product(vcodecs, gs, crfs, fast_decodes)]
+
+
+def available_backends(backends: list[str]) -> list[str]:
+    """The decoding backends that can be imported here."""
+    return [backend for backend in backends if backend != "torchcodec" or importlib.util.find_spec("torchcodec")]
+
+
+def synthetic_frames(
+    frames_dir: Path | str, num_frames: int, width: int, height: int, num_objects: int = 4, seed: int = 0
+) -> np.ndarray:
+    """
+    Write the PNG frames of a synthetic rendered scene to `frames_dir` (as the image writer does), and return
+    them as a (num_frames, height, width, 3) uint8 array.
+    """
+    rng = np.random.default_rng(seed)
+    frames_dir = Path(frames_dir)
+    frames_dir.mkdir(parents=True, exist_ok=True)
+
+    ys, xs = np.mgrid[0:height, 0:width]
+    background = np.stack([xs / width * 160 + 40, ys / height * 120 + 60, np.full_like(xs, 90.0)], axis=-1)
+    sizes = rng.uniform(0.1, 0.3, (num_objects, 2)) * (width, height)
+    starts = rng.uniform(0, 1, (num_objects, 2)) * (width, height)
+    velocities = rng.uniform(-2, 2, (num_objects, 2))
+    colors = rng.integers(0, 256, (num_objects, 3))
+
+    frames = np.empty((num_frames, height, width, 3), dtype=np.uint8)
+    for frame_index in range(num_frames):
+        image = background.copy()
+        for size, start, velocity, color in zip(sizes, starts, velocities, colors):
+            x0, y0 = (start + velocity * frame_index) % (width, height)
+            image[int(y0) : int(y0 + size[1]), int(x0) : int(x0 + size[0])] = color
+        image += rng.normal(0, 2, image.shape)
+        frames[frame_index] = image.clip(0, 255).astype(np.uint8)
+        PIL.Image.fromarray(frames[frame_index]).save(frames_dir / f"frame_{frame_index:06d}.png")
+    return frames
+
+
+def sample_queries(
+    num_frames: int, fps: int, delta_timestamps: list[float], num_queries: int, seed: int = 0
+) -> list[list[float]]:
+    """Timestamps of random-access queries: a random current frame, shifted by each of `delta_timestamps`."""
+    rng = random.Random(seed)
+    deltas = [round(delta * fps) for delta in delta_timestamps]
+    first, last = -min(deltas + [0]), num_frames - 1 - max(deltas + [0])
+    if first > last:
+        raise ValueError(f"The delta_timestamps {delta_timestamps} don't fit in {num_frames} frames.")
+    queries = []
+    for _ in range(num_queries):
+        frame_index = rng.randint(first, last)
+        queries.append([(frame_index + delta) / fps for delta in deltas])
+    return queries
+
+
+def psnr(reference: np.ndarray, decoded: np.ndarray) -> float:
+    mse = np.mean((reference.astype(np.float64) - decoded.astype(np.float64)) ** 2)
+    return math.inf if mse == 0 else 10 * math.log10(255**2 / mse)
+
+
+def benchmark_setting(
+    setting: EncodingSetting,
+    frames_dir: Path | str,
+    frames: np.ndarray,
+    video_path: Path | str,
+    fps: int,
+    queries: list[list[float]],
+    backends: list[str],
+) -> BenchmarkResult:
+    """Encode the frames in `frames_dir` with a setting, and measure its size, quality and decode latency."""
+    result = BenchmarkResult(setting)
+    start = time.perf_counter()
+    try:
+        encode_video_frames(frames_dir, video_path, fps, overwrite=True, **setting.as_kwargs())
+    except CODEC_ERRORS as e:
+        result.errors["encode"] = f"{type(e).__name__}: {e}"
+        return result
+    result.encode_s = time.perf_counter() - start
+    result.bytes_per_frame = Path(video_path).stat().st_size / len(frames)
+
+    decoded = np.stack([frame.permute(1, 2, 0).numpy() for frame in iter_video_frames(video_path)])
+    result.psnr_db = float(np.mean([psnr(ref, dec) for ref, dec in zip(frames, decoded)]))
+
+    # Same tolerance as `LeRobotDataset`
+    tolerance_s = 1e-4
+    for backend in backends:
+        try:
+            # The first query also pays for imports and caches
+            decode_video_frames(video_path, queries[0], tolerance_s, backend)
+            latencies = []
+            for timestamps in queries:
+                start = time.perf_counter()
+                decode_video_frames(video_path, timestamps, tolerance_s, backend)
+                latencies.append((time.perf_counter() - start) * 1000)
+        except CODEC_ERRORS as e:
+            result.errors[backend] = f"{type(e).__name__}: {e}"
+            continue
+        result.latency_ms[backend] = {
+            "p50_ms": float(np.percentile(latencies, 50)),
+            "p99_ms": float(np.percentile(latencies, 99)),
+            "mean_ms": float(np.mean(latencies)),
+        }
+    return result
+
+
+def recommend(
+    results: list[BenchmarkResult],
+    min_psnr_db: float = 30.0,
+    max_bytes_per_frame: float | None = None,
+    backend: str | None = None,
+) -> BenchmarkResult | None:
+    """
+    The setting with the lowest p99 decode latency (then the smallest files) among those that reach `min_psnr_db`
+    and fit in `max_bytes_per_frame`.
+
+    Args:
+        results: Results of `benchmark_setting`.
+        min_psnr_db: Minimum quality of the decoded frames.
+        max_bytes_per_frame: Size budget. None for no limit.
+        backend: Backend whose latency is compared. Defaults to the first one measured for every candidate.
+
+    Returns:
+        The recommended result, or None if no setting qualifies.
+    """
+    candidates = [
+        result
+        for result in results
+        if result.latency_ms
+        and result.psnr_db >= min_psnr_db
+        and (max_bytes_per_frame is None or result.bytes_per_frame <= max_bytes_per_frame)
+    ]
+    if backend is None:
+        backend = next(
+            (b for b in DEFAULT_BACKENDS if all(b in result.latency_ms for result in candidates)),
+            None,
+        )
+    candidates = [result for result in candidates if backend in result.latency_ms]
+    if not candidates:
+        return None
+    return min(candidates, key=lambda result: (result.latency_ms[backend]["p99_ms"], result.bytes_per_frame))
+
+
+def write_preset(root: Path | str, result: BenchmarkResult) -> dict:
+    """
+    Write a recommended setting into the info.json of a dataset, as `video_encoding` (used to encode the videos of
+    the episodes it records from then on) with its measurements as `video_encoding_benchmark`.
+    """
+    root = Path(root)
+    info = load_info(root)
+    info[VIDEO_ENCODING_KEY] = result.setting.as_kwargs()
+    info[VIDEO_BENCHMARK_KEY] = {k: v for k, v in result.as_dict().items() if k != "setting"}
+    write_info(info, root)
+    return info
+
+
+def run_benchmark(
+    settings: list[EncodingSetting],
+    num_frames: int = 120,
+    width: int = 256,
+    height: int = 256,
+    fps: int = 30,
+    delta_timestamps: list[float] | None = None,
+    num_queries: int = 200,
+    backends: list[str] | None = None,
+    work_dir: Path | str | None = None,
+    seed: int = 0,
+) -> list[BenchmarkResult]:
+    """
+    Benchmark every setting on the same synthetic scene and queries (see the module docstring). Queries default
+    to single frames (`delta_timestamps=[0.0]`), decoded with every available backend of `DEFAULT_BACKENDS`.
+    """
+    work_dir = Path(work_dir or tempfile.mkdtemp(prefix="domin-video-benchmark-"))
+    frames = synthetic_frames(work_dir / "frames", num_frames, width, height, seed=seed)
+    queries = sample_queries(num_frames, fps, delta_timestamps or [0.0], num_queries, seed=seed)
+    backends = available_backends(backends or DEFAULT_BACKENDS)
+
+    results = []
+    for setting in settings:
+        result = benchmark_setting(
+            setting, work_dir / "frames", frames, work_dir / f"{setting.name}.mp4", fps, queries, backends
+        )
+        results.append(result)
+        latency = ", ".join(
+            f"{backend} p50 {lat['p50_ms']:.1f}ms p99 {lat['p99_ms']:.1f}ms" for backend, lat in result.latency_ms.items()
+        )
+        print(
+            f"{setting.name}: {result.bytes_per_frame:.0f} B/frame, {result.psnr_db:.1f} dB, {latency}"
+            + (f", errors: {result.errors}" if result.errors else "")
+        )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--vcodec", type=str, nargs="+", default=["libsvtav1", "h264"], help="Codecs to try.")
+    parser.add_argument("--g", type=int, nargs="+", default=[2, 5, 10, 30], help="Key frame intervals to try.")
+    parser.add_argument("--crf", type=int, nargs="+", default=[20, 30, 40], help="Quality settings to try.")
+    parser.add_argument("--fast-decode", type=int, nargs="+", default=[0, 1], help="fast_decode values to try.")
+    parser.add_argument("--backends", type=str, nargs="+", default=DEFAULT_BACKENDS, help="Decoding backends.")
+    parser.add_argument("--num-frames", type=int, default=120, help="Frames of the synthetic episode.")
+    parser.add_argument("--width", type=int, default=256, help="Width of the frames.")
+    parser.add_argument("--height", type=int, default=256, help="Height of the frames.")
+    parser.add_argument("--fps", type=int, default=30, help="Frame rate of the videos.")
+    parser.add_argument(
+        "--delta-timestamps", type=float, nargs="+", default=[0.0], help="Offsets (s) of the frames of a query."
+    )
+    parser.add_argument("--num-queries", type=int, default=200, help="Random-access queries per setting.")
+    parser.add_argument("--min-psnr-db", type=float, default=30.0, help="Minimum quality of a recommendation.")
+    parser.add_argument("--max-bytes-per-frame", type=float, default=None, help="Size budget of a recommendation.")
+    parser.add_argument("--work-dir", type=Path, default=None, help="Directory of the frames and videos.")
+    parser.add_argument("--output", type=Path, default=None, help="JSON file of all the results.")
+    parser.add_argument(
+        "--root", type=Path, default=None, help="Dataset whose info.json the recommended preset is written into."
+    )
+    args = parser.parse_args()
+
+    results = run_benchmark(
+        encoding_grid(args.vcodec, args.g, args.crf, args.fast_decode),
+        num_frames=args.num_frames,
+        width=args.width,
+        height=args.height,
+        fps=args.fps,
+        delta_timestamps=args.delta_timestamps,
+        num_queries=args.num_queries,
+        backends=args.backends,
+        work_dir=args.work_dir,
+    )
+    best = recommend(results, min_psnr_db=args.min_psnr_db, max_bytes_per_frame=args.max_bytes_per_frame)
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            json.dump(
+                {
+                    "results": [result.as_dict() for result in results],
+                    "recommended": best.as_dict() if best is not None else None,
+                },
+                f,
+                indent=4,
+            )
+    if best is None:
+        print("No setting reaches the quality and size constraints.")
+        return
+    print(f"Recommended: {best.setting.name} ({best.setting.as_kwargs()})")
+    if args.root is not None:
+        write_preset(args.root, best)
+        print(f"Written to {args.root / 'meta/info.json'} as '{VIDEO_ENCODING_KEY}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -19,15 +19,20 @@ import logging
 import warnings
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, ClassVar
+from typing import Any, ClassVar, Iterator
 
 import av
+import numpy as np
 import pyarrow as pa
 import torch
 import torchvision
 from datasets.features.features import register_feature
 from PIL import Image
 
+# info.json entry with the `encode_video_frames` arguments (vcodec, g, crf, fast_decode) of a dataset's videos,
+# e.g. the preset recommended by `video_benchmark`
+VIDEO_ENCODING_KEY = "video_encoding"
+
 
 def get_safe_default_codec():
     if importlib.util.find_spec("torchcodec"):
@@ -63,12 +68,71 @@ def decode_video_frames(
         backend = get_safe_default_codec()
     if backend == "torchcodec":
         return decode_video_frames_torchcodec(video_path, timestamps, tolerance_s)
-    elif backend in ["pyav", "video_reader"]:
+    elif backend == "pyav":
+        return decode_video_frames_pyav(video_path, timestamps, tolerance_s)
+    elif backend == "video_reader":
         return decode_video_frames_torchvision(video_path, timestamps, tolerance_s, backend)
     else:
         raise ValueError(f"Unsupported video backend: {backend}")
 
 
+def decode_video_frames_pyav(
+    video_path: Path | str,
+    timestamps: list[float],
+    tolerance_s: float,
+    log_loaded_timestamps: bool = False,
+) -> torch.Tensor:
+    """Loads frames associated to the requested timestamps of a video with PyAV directly.
+
+    Seeks to the key frame preceding the first requested timestamp and decodes until the last one, like the
+    "pyav" backend of `decode_video_frames_torchvision` (which recent torchvision versions no longer provide).
+    Only the frames closest to the requested timestamps are converted to RGB.
+
+    Returns float32 frames in [0, 1], in channel first (t c h w) format.
+    """
+    first_ts = min(timestamps)
+    last_ts = max(timestamps)
+
+    loaded_frames = []
+    loaded_ts = []
+    with av.open(str(video_path)) as container:
+        stream = container.streams.video[0]
+        # Seeks land on the closest key frame before the offset
+        container.seek(int(first_ts / stream.time_base), stream=stream, backward=True, any_frame=False)
+        for frame in container.decode(stream):
+            current_ts = float(frame.pts * frame.time_base)
+            if log_loaded_timestamps:
+                logging.info(f"frame loaded at timestamp={current_ts:.4f}")
+            loaded_frames.append(frame)
+            loaded_ts.append(current_ts)
+            if current_ts >= last_ts - tolerance_s:
+                break
+
+        query_ts = torch.tensor(timestamps)
+        loaded_ts = torch.tensor(loaded_ts)
+        dist = torch.cdist(query_ts[:, None], loaded_ts[:, None], p=1)
+        min_, argmin_ = dist.min(1)
+
+        is_within_tol = min_ < tolerance_s
+        assert is_within_tol.all(), (
+            f"One or several query timestamps unexpectedly violate the tolerance ({min_[~is_within_tol]} > {tolerance_s=})."
+            "It means that the closest frame that can be loaded from the video is too far away in time."
+            "This might be due to synchronization issues with timestamps during data collection."
+            "To be safe, we advise to ignore this item during training."
+            f"\nqueried timestamps: {query_ts}"
+            f"\nloaded timestamps: {loaded_ts}"
+            f"\nvideo: {video_path}"
+            f"\nbackend: pyav"
+        )
+        closest_frames = np.stack([loaded_frames[idx].to_ndarray(format="rgb24") for idx in argmin_.tolist()])
+
+    if log_loaded_timestamps:
+        logging.info(f"closest_ts={loaded_ts[argmin_]}")
+
+    # convert to the pytorch format which is float32 in [0,1] range (and channel first)
+    return torch.from_numpy(closest_frames).permute(0, 3, 1, 2).type(torch.float32) / 255
+
+
 def decode_video_frames_torchvision(
     video_path: Path | str,
     timestamps: list[float],
@@ -242,6 +306,62 @@ def decode_video_frames_torchcodec(
     return closest_frames
 
 
+def iter_video_frames(video_path: Path | str, pix_fmt: str = "rgb24") -> Iterator[torch.Tensor]:
+    """Decode all the frames of a video front to back, in a single pass (no seeking).
+
+    Frames are yielded as they are decoded, as uint8 tensors in channel first (c h w) format, so that a
+    sequential reader only keeps the frames it still needs in memory. With `pix_fmt="gray16le"` (lossless
+    depth and segmentation videos), frames are (1 h w) int32 tensors holding the 16-bit values.
+    """
+    with av.open(str(video_path)) as container:
+        stream = container.streams.video[0]
+        stream.thread_type = "AUTO"
+        for frame in container.decode(stream):
+            if pix_fmt == "gray16le":
+                yield torch.from_numpy(frame.to_ndarray(format=pix_fmt).astype(np.int32))[None]
+            else:
+                yield torch.from_numpy(frame.to_ndarray(format=pix_fmt)).permute(2, 0, 1)
+
+
+def decode_video_frames_gray16(
+    video_path: Path | str,
+    timestamps: list[float],
+    tolerance_s: float,
+) -> torch.Tensor:
+    """Loads the 16-bit frames (e.g. depth) of a lossless gray16le video at the requested timestamps.
+
+    Returns the raw values as a (t 1 h w) int32 tensor. FFV1 videos only have key frames, so frames are
+    decoded in a single pass from the first to the last requested timestamp.
+    """
+    first_ts = min(timestamps)
+    last_ts = max(timestamps)
+    loaded_frames = []
+    loaded_ts = []
+    with av.open(str(video_path)) as container:
+        stream = container.streams.video[0]
+        container.seek(int(first_ts / stream.time_base), stream=stream, backward=True, any_frame=False)
+        for frame in container.decode(stream):
+            loaded_frames.append(frame.to_ndarray(format="gray16le"))
+            loaded_ts.append(float(frame.pts * frame.time_base))
+            if loaded_ts[-1] >= last_ts - tolerance_s:
+                break
+
+    query_ts = torch.tensor(timestamps)
+    loaded_ts = torch.tensor(loaded_ts)
+    dist = torch.cdist(query_ts[:, None], loaded_ts[:, None], p=1)
+    min_, argmin_ = dist.min(1)
+    is_within_tol = min_ < tolerance_s
+    assert is_within_tol.all(), (
+        f"One or several query timestamps unexpectedly violate the tolerance ({min_[~is_within_tol]} > {tolerance_s=})."
+        f"\nqueried timestamps: {query_ts}"
+        f"\nloaded timestamps: {loaded_ts}"
+        f"\nvideo: {video_path}"
+    )
+
+    frames = np.stack([loaded_frames[idx] for idx in argmin_]).astype(np.int32)
+    return torch.from_numpy(frames)[:, None]
+
+
 def encode_video_frames(
     imgs_dir: Path | str,
     video_path: Path | str,
@@ -256,8 +376,8 @@ def encode_video_frames(
 ) -> None:
     """More info on ffmpeg arguments tuning on `benchmark/video/README.md`"""
     # Check encoder availability
-    if vcodec not in ["h264", "hevc", "libsvtav1"]:
-        raise ValueError(f"Unsupported video codec: {vcodec}. Supported codecs are: h264, hevc, libsvtav1.")
+    if vcodec not in ["h264", "hevc", "libsvtav1", "ffv1"]:
+        raise ValueError(f"Unsupported video codec: {vcodec}. Supported codecs are: h264, hevc, libsvtav1, ffv1.")
 
     video_path = Path(video_path)
     imgs_dir = Path(imgs_dir)
@@ -311,8 +431,14 @@ def encode_video_frames(
 
         # Loop through input frames and encode them
         for input_data in input_list:
-            input_image = Image.open(input_data).convert("RGB")
-            input_frame = av.VideoFrame.from_image(input_image)
+            if pix_fmt == "gray16le":
+                # 16-bit single channel frames (lossless depth and segmentation)
+                with Image.open(input_data) as input_image:
+                    input_array = np.array(input_image).astype(np.uint16)
+                input_frame = av.VideoFrame.from_ndarray(input_array, format="gray16le")
+            else:
+                input_image = Image.open(input_data).convert("RGB")
+                input_frame = av.VideoFrame.from_image(input_image)
             packet = output_stream.encode(input_frame)
             if packet:
                 output.mux(packet)
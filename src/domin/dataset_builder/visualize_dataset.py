@@ -59,22 +59,56 @@ distant$ python lerobot/scripts/visualize_dataset.py \
 local$ rerun ws://localhost:9087
 ```
 
+- Fast inspection: read the episode's parquet columns (and videos) directly and send whole time series and
+image sequences to rerun in column batches, instead of logging frame by frame through a DataLoader:
+```
+local$ python lerobot/scripts/visualize_dataset.py \
+    --repo-id lerobot/pusht \
+    --root path/to/dataset \
+    --episode-index 0 \
+    --columnar 1
+```
+
+- Bulk QA: headlessly save one .rrd file per episode, using several processes:
+```
+distant$ python lerobot/scripts/visualize_dataset.py \
+    --repo-id lerobot/pusht \
+    --root path/to/dataset \
+    --episode-index 0 1 2 3 4 5 6 7 \
+    --columnar 1 \
+    --save 1 \
+    --output-dir path/to/directory \
+    --num-processes 4
+```
+
 """
 
 import argparse
 import gc
+import io
 import logging
 import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from typing import Iterator
 
+import av
 import numpy as np
+import PIL.Image
+import pyarrow.parquet as pq
 import rerun as rr
 import torch
 import torch.utils.data
 import tqdm
 
-from src.lerobot_dataset import LeRobotDataset
+from domin.dataset_builder.camera_channels import CHANNEL_PIX_FMT, channel_specs, decode_channel, load_channel_image
+from domin.dataset_builder.lerobot_dataset import LeRobotDataset, LeRobotDatasetMetadata
+from domin.dataset_builder.quantization import decode_storage, storage_specs
+from domin.dataset_builder.utils import get_nearest_camera_frames
+
+# Scalar features logged by both the frame-by-frame and the columnar paths, with their rerun entity path.
+SCALAR_KEYS = {"next.done": "next.done", "next.reward": "next.reward", "next.success": "next.success"}
+VECTOR_KEYS = {"action": "action", "observation.state": "state"}
 
 
 class EpisodeSampler(torch.utils.data.Sampler):
@@ -99,6 +133,209 @@ def to_hwc_uint8_numpy(chw_float32_torch: torch.Tensor) -> np.ndarray:
     return hwc_uint8_numpy
 
 
+def _decode_video(video_path: Path, pix_fmt: str = "rgb24") -> np.ndarray:
+    """
+    Decode all the frames of a video front to back, in a single pass, as (T, H, W, C) uint8 (or (T, H, W) uint16
+    for gray16le depth and segmentation videos).
+    """
+    with av.open(str(video_path)) as container:
+        return np.stack([frame.to_ndarray(format=pix_fmt) for frame in container.decode(video=0)])
+
+
+def log_camera_frame(key: str, frame: torch.Tensor, channel: dict | None = None) -> None:
+    """Log a (C, H, W) frame of a camera: RGB in [0, 1], depth in metres or segmentation ids."""
+    if channel is None:
+        # TODO(rcadene): add `.compress()`? is it lossless?
+        rr.log(key, rr.Image(to_hwc_uint8_numpy(frame)))
+    elif channel["type"] == "depth":
+        rr.log(key, rr.DepthImage(frame[0].numpy(), meter=1.0))
+    else:
+        # Ids are 16-bit
+        rr.log(key, rr.SegmentationImage(frame[0].numpy().astype(np.uint16)))
+
+
+def load_episode_columns(meta: LeRobotDatasetMetadata, episode_index: int) -> dict[str, np.ndarray]:
+    """Read the columns of one episode straight from its parquet file (and video files).
+
+    This bypasses `LeRobotDataset.__getitem__` entirely: each column is read once as a whole, and each video
+    is decoded sequentially instead of seeking for every frame.
+
+    Returns:
+        Mapping from feature key to an array whose first dimension is the frame index. Images are
+        (T, H, W, C) uint8, depth is (T, H, W) float32 metres and segmentation (T, H, W) int64 ids.
+    """
+    table = pq.read_table(meta.root / meta.get_data_file_path(episode_index))
+    columns = {}
+    for key in ["frame_index", "timestamp", *SCALAR_KEYS, *VECTOR_KEYS]:
+        if key not in table.column_names:
+            continue
+        column = table.column(key).combine_chunks()
+        if key in VECTOR_KEYS:
+            columns[key] = np.asarray(column.flatten()).reshape(len(table), -1)
+        else:
+            columns[key] = np.asarray(column)
+    # Features stored in a compact dtype are plotted as their float32 values
+    for key, storage in storage_specs(meta.features).items():
+        if key in columns:
+            columns[key] = decode_storage(columns[key], storage)
+
+    channels = channel_specs(meta.features)
+    for key in meta.image_keys:
+        image_bytes = table.column(key).combine_chunks().field("bytes").to_pylist()
+        if key in channels:
+            # 16-bit depth or segmentation PNGs
+            columns[key] = np.concatenate([load_channel_image(io.BytesIO(b), channels[key]) for b in image_bytes])
+        else:
+            columns[key] = np.stack(
+                [np.asarray(PIL.Image.open(io.BytesIO(b)).convert("RGB")) for b in image_bytes]
+            )
+
+    for key in meta.video_keys:
+        video_path = meta.root / meta.get_video_file_path(episode_index, key)
+        if key in channels:
+            # Lossless gray16le depth or segmentation video
+            frames = decode_channel(_decode_video(video_path, CHANNEL_PIX_FMT), channels[key])
+        else:
+            frames = _decode_video(video_path)
+        if "fps" in meta.features[key]:
+            # Rate-decoupled camera: its video only holds the fresh frames
+            camera_ts = meta.episodes[episode_index]["camera_timestamps"][key]
+            frames = frames[get_nearest_camera_frames(camera_ts, columns["timestamp"])]
+        # The encoder may flush a slightly different number of frames; align with the parquet rows.
+        columns[key] = frames[: len(table)]
+
+    return columns
+
+
+def log_episode_columns(
+    columns: dict[str, np.ndarray], camera_keys: list[str], channels: dict[str, dict] | None = None
+) -> None:
+    """
+    Send a whole episode to rerun with one `send_columns` call per entity. Camera channels (see
+    `channel_specs`) are logged as depth and segmentation images.
+    """
+    channels = channels or {}
+
+    def time_columns(num_frames: int) -> list:
+        return [
+            rr.TimeSequenceColumn("frame_index", columns["frame_index"][:num_frames]),
+            rr.TimeSecondsColumn("timestamp", columns["timestamp"][:num_frames]),
+        ]
+
+    times = time_columns(len(columns["frame_index"]))
+
+    for key in camera_keys:
+        frames = columns[key]
+        num_frames, height, width = frames.shape[:3]
+        # The image format is shared by all frames, so only the pixel buffers are sent per frame.
+        channel = channels.get(key)
+        if channel is None:
+            archetype = rr.Image
+            image_format = rr.components.ImageFormat(
+                width=width, height=height, color_model="RGB", channel_datatype="U8"
+            )
+            rr.log(key, rr.Image.from_fields(format=image_format), static=True)
+        elif channel["type"] == "depth":
+            archetype = rr.DepthImage
+            frames = frames.astype(np.float32)
+            image_format = rr.components.ImageFormat(width=width, height=height, channel_datatype="F32")
+            rr.log(key, rr.DepthImage.from_fields(format=image_format, meter=1.0), static=True)
+        else:
+            archetype = rr.SegmentationImage
+            # Ids are 16-bit
+            frames = frames.astype(np.uint16)
+            image_format = rr.components.ImageFormat(width=width, height=height, channel_datatype="U16")
+            rr.log(key, rr.SegmentationImage.from_fields(format=image_format), static=True)
+        rr.send_columns(
+            key,
+            indexes=time_columns(num_frames),
+            columns=archetype.columns(buffer=frames.reshape(num_frames, -1).view(np.uint8)),
+        )
+
+    for key, entity in VECTOR_KEYS.items():
+        if key not in columns:
+            continue
+        for dim_idx in range(columns[key].shape[1]):
+            rr.send_columns(
+                f"{entity}/{dim_idx}", indexes=times, columns=rr.Scalar.columns(scalar=columns[key][:, dim_idx])
+            )
+
+    for key, entity in SCALAR_KEYS.items():
+        if key in columns:
+            rr.send_columns(entity, indexes=times, columns=rr.Scalar.columns(scalar=columns[key]))
+
+
+def visualize_episode_columnar(
+    meta: LeRobotDatasetMetadata,
+    episode_index: int,
+    mode: str = "local",
+    web_port: int = 9090,
+    ws_port: int = 9087,
+    save: bool = False,
+    output_dir: Path | None = None,
+) -> Path | None:
+    """Columnar counterpart of `visualize_dataset`, reading the episode's files directly."""
+    if save:
+        assert output_dir is not None, (
+            "Set an output directory where to write .rrd files with `--output-dir path/to/directory`."
+        )
+    if mode not in ["local", "distant"]:
+        raise ValueError(mode)
+
+    repo_id = meta.repo_id
+    rr.init(f"{repo_id}/episode_{episode_index}", spawn=mode == "local" and not save)
+
+    rrd_path = None
+    if save:
+        # Set the file sink before logging so that nothing is buffered in memory.
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        rrd_path = output_dir / f"{repo_id.replace('/', '_')}_episode_{episode_index}.rrd"
+        rr.save(rrd_path)
+    elif mode == "distant":
+        rr.serve(open_browser=False, web_port=web_port, ws_port=ws_port)
+
+    logging.info(f"Logging episode {episode_index} to Rerun")
+    log_episode_columns(load_episode_columns(meta, episode_index), meta.camera_keys, channel_specs(meta.features))
+
+    if save:
+        # Flush and close the file sink, so that the next episode handled by this process starts cleanly.
+        rr.disconnect()
+        return rrd_path
+
+    if mode == "distant":
+        # stop the process from exiting since it is serving the websocket connection
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            print("Ctrl-C received. Exiting.")
+
+
+def _save_episode_columnar(repo_id: str, root: Path | None, episode_index: int, output_dir: Path) -> Path:
+    meta = LeRobotDatasetMetadata(repo_id, root=root)
+    return visualize_episode_columnar(meta, episode_index, save=True, output_dir=output_dir)
+
+
+def save_episodes_columnar(
+    repo_id: str,
+    root: Path | None,
+    episode_indices: list[int],
+    output_dir: Path,
+    num_processes: int = 1,
+) -> list[Path]:
+    """Headlessly save one .rrd file per episode, spreading the episodes over `num_processes` processes."""
+    if num_processes <= 1:
+        return [_save_episode_columnar(repo_id, root, ep_idx, output_dir) for ep_idx in episode_indices]
+
+    with ProcessPoolExecutor(max_workers=num_processes) as executor:
+        futures = [
+            executor.submit(_save_episode_columnar, repo_id, root, ep_idx, output_dir)
+            for ep_idx in episode_indices
+        ]
+        return [future.result() for future in tqdm.tqdm(futures, total=len(futures))]
+
+
 def visualize_dataset(
     dataset: LeRobotDataset,
     episode_index: int,
@@ -144,6 +381,7 @@ def visualize_dataset(
 
     logging.info("Logging to Rerun")
 
+    channels = channel_specs(dataset.meta.features)
     for batch in tqdm.tqdm(dataloader, total=len(dataloader)):
         # iterate over the batch
         for i in range(len(batch["index"])):
@@ -152,8 +390,7 @@ def visualize_dataset(
 
             # display each camera image
             for key in dataset.meta.camera_keys:
-                # TODO(rcadene): add `.compress()`? is it lossless?
-                rr.log(key, rr.Image(to_hwc_uint8_numpy(batch[key][i])))
+                log_camera_frame(key, batch[key][i], channels.get(key))
 
             # display each dimension of action space (e.g. actuators command)
             if "action" in batch:
@@ -204,8 +441,9 @@ def main():
     parser.add_argument(
         "--episode-index",
         type=int,
+        nargs="+",
         required=True,
-        help="Episode to visualize.",
+        help="Episode to visualize. Several episodes can be given with `--columnar 1 --save 1`.",
     )
     parser.add_argument(
         "--root",
@@ -276,16 +514,57 @@ def main():
         ),
     )
 
+    parser.add_argument(
+        "--columnar",
+        type=int,
+        default=0,
+        help=(
+            "Read the episode's parquet columns and videos directly and send them to rerun in column batches. "
+            "This is much faster than the default frame by frame logging through a DataLoader."
+        ),
+    )
+    parser.add_argument(
+        "--num-processes",
+        type=int,
+        default=1,
+        help="Number of processes used to save several episodes with `--columnar 1 --save 1`.",
+    )
+
     args = parser.parse_args()
     kwargs = vars(args)
     repo_id = kwargs.pop("repo_id")
     root = kwargs.pop("root")
     tolerance_s = kwargs.pop("tolerance_s")
+    episode_indices = kwargs.pop("episode_index")
+    columnar = kwargs.pop("columnar")
+    num_processes = kwargs.pop("num_processes")
+
+    if columnar and args.save:
+        assert args.output_dir is not None, (
+            "Set an output directory where to write .rrd files with `--output-dir path/to/directory`."
+        )
+        save_episodes_columnar(repo_id, root, episode_indices, args.output_dir, num_processes)
+        return
+
+    if len(episode_indices) > 1:
+        parser.error("Several episodes can only be given with `--columnar 1 --save 1`.")
+
+    if columnar:
+        logging.info("Loading dataset metadata")
+        meta = LeRobotDatasetMetadata(repo_id, root=root)
+        visualize_episode_columnar(
+            meta,
+            episode_indices[0],
+            mode=args.mode,
+            web_port=args.web_port,
+            ws_port=args.ws_port,
+        )
+        return
 
     logging.info("Loading dataset")
     dataset = LeRobotDataset(repo_id, root=root, tolerance_s=tolerance_s)
 
-    visualize_dataset(dataset, **vars(args))
+    visualize_dataset(dataset, episode_index=episode_indices[0], **vars(args))
 
 
 if __name__ == "__main__":
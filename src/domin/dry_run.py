@@ -0,0 +1,338 @@
+# Copyright 2026 Nimit Shah. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Dry run of a dataset generation: load and validate a config, and estimate the size of the dataset, without
+launching Isaac Sim.
+
+Isaac Lab modules can only be imported once the simulation app runs. While the config is loaded, they are
+replaced with lazy placeholders (`lazy_isaac_imports`): config classes become `LazyIsaacObject`s keeping the
+arguments they were built with (e.g. the width and height of a `CameraCfg`), and scene configs deriving from
+them plain attribute holders.
+"""
+
+import copy
+import importlib.abc
+import importlib.util
+import inspect
+import math
+import re
+import sys
+import types
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+# Top-level modules replaced by placeholders during a dry run
+ISAAC_MODULES = ("isaaclab", "isaaclab_assets", "isaaclab_tasks", "isaacsim", "omni", "pxr", "carb")
+
+# Rough on-disk size of camera data relative to raw RGB, used for estimates only. Rendered scenes compress far
+# better than camera footage: AV1 at the default crf=30 is typically around 1% of raw, PNG around 50%.
+VIDEO_COMPRESSION_RATIO = 0.01
+PNG_COMPRESSION_RATIO = 0.5
+# Seconds of images the image writer queue holds if the writers fall behind, for the memory estimate
+QUEUE_BACKLOG_S = 1.0
+
+
+class LazyIsaacObject:
+    """
+    Placeholder of an Isaac Lab object. Calling it records the arguments (`.replace(...)` updates them),
+    any other attribute is another placeholder, and classes can derive from it.
+    """
+
+    def __init__(self, name: str, args: tuple = (), kwargs: dict | None = None):
+        self.__dict__["_lazy_name"] = name
+        self.__dict__["_lazy_args"] = args
+        self.__dict__["_lazy_kwargs"] = kwargs or {}
+
+    def __getattr__(self, key: str):
+        if key.startswith("__"):
+            raise AttributeError(key)
+        if key in self._lazy_kwargs:
+            return self._lazy_kwargs[key]
+        if key == "replace":
+            return lambda **kwargs: LazyIsaacObject(self._lazy_name, self._lazy_args, {**self._lazy_kwargs, **kwargs})
+        return LazyIsaacObject(f"{self._lazy_name}.{key}")
+
+    def __call__(self, *args, **kwargs):
+        # Decorators (e.g. `@configclass`) return what they decorate
+        if len(args) == 1 and not kwargs and (inspect.isclass(args[0]) or inspect.isfunction(args[0])):
+            return args[0]
+        return LazyIsaacObject(self._lazy_name, args, kwargs)
+
+    def __mro_entries__(self, bases):
+        return (LazyIsaacBase,)
+
+    def __getitem__(self, key):
+        return LazyIsaacObject(f"{self._lazy_name}[{key!r}]")
+
+    def __iter__(self):
+        return iter(())
+
+    def __repr__(self):
+        return f"<{self._lazy_name}>"
+
+    __str__ = __repr__
+
+    def __format__(self, format_spec):
+        return repr(self)
+
+
+class LazyIsaacBase:
+    """Base of classes deriving from a placeholder (e.g. a scene config deriving from `InteractiveSceneCfg`)."""
+
+    def __init__(self, *args, **kwargs):
+        for key, value in kwargs.items():
+            setattr(self, key, value)
+
+    def __getattr__(self, key: str):
+        if key.startswith("__"):
+            raise AttributeError(key)
+        return LazyIsaacObject(f"{type(self).__name__}.{key}")
+
+    def replace(self, **kwargs):
+        obj = copy.copy(self)
+        for key, value in kwargs.items():
+            setattr(obj, key, value)
+        return obj
+
+
+class _LazyModule(types.ModuleType):
+    def __getattr__(self, key: str):
+        if key.startswith("__"):
+            raise AttributeError(key)
+        return LazyIsaacObject(f"{self.__name__}.{key}")
+
+
+class _LazyIsaacFinder(importlib.abc.MetaPathFinder, importlib.abc.Loader):
+    def find_spec(self, fullname, path, target=None):
+        if fullname.split(".")[0] in ISAAC_MODULES:
+            return importlib.util.spec_from_loader(fullname, self, is_package=True)
+        return None
+
+    def create_module(self, spec):
+        return _LazyModule(spec.name)
+
+    def exec_module(self, module):
+        pass
+
+
+@contextmanager
+def lazy_isaac_imports():
+    """
+    Import Isaac Lab modules as placeholders in this block. Placeholder modules, and the modules that may have
+    imported them, are unloaded when it exits.
+    """
+    finder = _LazyIsaacFinder()
+    loaded = set(sys.modules)
+    sys.meta_path.insert(0, finder)
+    try:
+        yield
+    finally:
+        sys.meta_path.remove(finder)
+        for name in set(sys.modules) - loaded:
+            module = sys.modules[name]
+            # The standard library and installed third-party packages can't depend on Isaac Lab, everything else
+            # (configs, scenes, modules of this package) may hold placeholders
+            path = getattr(module, "__file__", None) or ""
+            installed = name.split(".")[0] in sys.stdlib_module_names or any(
+                d in path for d in ("site-packages", "dist-packages")
+            )
+            if isinstance(module, _LazyModule) or not installed:
+                del sys.modules[name]
+
+
+def type_name(obj) -> str:
+    """Class name of an object, or of the placeholder it stands for (e.g. "CameraCfg")."""
+    if isinstance(obj, LazyIsaacObject):
+        return obj._lazy_name.rsplit(".", 1)[-1]
+    return type(obj).__name__
+
+
+def find_cameras(scene_cfg) -> dict:
+    """Camera configs of a scene config, by name."""
+    cameras = {}
+    for name in dir(scene_cfg):
+        if name.startswith("_"):
+            continue
+        value = getattr(scene_cfg, name, None)
+        if type_name(value).endswith("CameraCfg"):
+            cameras[name] = value
+    return cameras
+
+
+def _format_bytes(num_bytes: float) -> str:
+    for unit in ["B", "KiB", "MiB", "GiB", "TiB"]:
+        if num_bytes < 1024 or unit == "TiB":
+            return f"{num_bytes:.1f} {unit}"
+        num_bytes /= 1024
+
+
+@dataclass
+class DryRunReport:
+    config_name: str
+    errors: list[str] = field(default_factory=list)
+    warnings: list[str] = field(default_factory=list)
+    # camera name -> (width, height, record fps)
+    cameras: dict[str, tuple[int, int, float]] = field(default_factory=dict)
+    estimates: dict[str, float] = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+    def format(self) -> str:
+        lines = [f"Dry run of {self.config_name}: {'OK' if self.ok else 'FAILED'}"]
+        lines += [f"  error: {error}" for error in self.errors]
+        lines += [f"  warning: {warning}" for warning in self.warnings]
+        for name, (width, height, fps) in self.cameras.items():
+            lines.append(f"  camera {name}: {width}x{height} at {fps:g} fps")
+        for key, value in self.estimates.items():
+            value = _format_bytes(value) if key.endswith("_bytes") else f"{value:,.0f}"
+            lines.append(f"  {key}: {value}")
+        return "\n".join(lines)
+
+
+def validate_config(config, report: DryRunReport) -> dict:
+    """
+    Check the parts of a constructed config that are only used once the simulation runs. Returns the cameras
+    that would be recorded, as name -> (width, height, record fps).
+    """
+    from domin.dataset_builder.camera_channels import CHANNEL_DATA_TYPES
+    from domin.dataset_builder.quantization import validate_storage
+
+    if config.num_episodes <= 0:
+        report.errors.append(f"num_episodes must be positive, got {config.num_episodes}.")
+    if config.episode_time_s <= 0:
+        report.errors.append(f"episode_time_s must be positive, got {config.episode_time_s}.")
+
+    for key in ["arm_joint_names", "hand_joint_names"]:
+        try:
+            re.compile(getattr(config, key))
+        except re.error as e:
+            report.errors.append(f"{key} is not a valid regex ('{getattr(config, key)}'): {e}")
+    if config.arm_joint_names == config.hand_joint_names:
+        report.warnings.append(
+            f"arm_joint_names and hand_joint_names are the same ('{config.arm_joint_names}'): "
+            "IK and hand commands would drive the same joints."
+        )
+
+    cameras = {}
+    camera_cfgs = find_cameras(config.scene_cfg)
+    if not camera_cfgs:
+        report.warnings.append("The scene has no camera: only states and actions will be recorded.")
+    for name, cfg in camera_cfgs.items():
+        width, height = cfg.width, cfg.height
+        if not all(isinstance(x, int) and x > 0 for x in (width, height)):
+            report.errors.append(f"Camera '{name}' has an invalid resolution: {width}x{height}.")
+            continue
+        if config.video and (width % 2 or height % 2):
+            report.errors.append(
+                f"Camera '{name}' resolution {width}x{height} must be even to be encoded as video (yuv420p)."
+            )
+        if "/" in name:
+            report.errors.append(f"Camera name '{name}' should not contain '/' (used as a feature name).")
+        data_types = cfg.data_types
+        if not isinstance(data_types, LazyIsaacObject):
+            for channel in getattr(config, "camera_channels", {}).get(name, []):
+                data_type = CHANNEL_DATA_TYPES.get(channel)
+                if data_type is None:
+                    report.errors.append(f"Unknown channel '{channel}' for camera '{name}'.")
+                elif data_type not in data_types:
+                    report.errors.append(
+                        f"Camera '{name}' records '{channel}' but has no '{data_type}' output in its data_types."
+                    )
+            if "rgb" not in data_types:
+                report.warnings.append(f"Camera '{name}' has no 'rgb' output and won't be recorded.")
+                continue
+
+        update_period = cfg.update_period
+        fps = config.fps
+        if isinstance(update_period, (int, float)) and update_period > 0:
+            fps = min(fps, round(1 / update_period))
+        fps = config.camera_fps.get(name, fps)
+        if not 0 < fps <= config.fps:
+            report.errors.append(f"The rate of camera '{name}' ({fps}) must be in (0, fps={config.fps}].")
+        cameras[name] = (width, height, fps)
+
+    for name in config.camera_fps:
+        if name not in camera_cfgs:
+            report.errors.append(f"`camera_fps` has a rate for unknown camera '{name}'.")
+    for name in getattr(config, "camera_channels", {}):
+        if name not in camera_cfgs:
+            report.errors.append(f"`camera_channels` has channels for unknown camera '{name}'.")
+
+    for key, storage in getattr(config, "feature_storage", {}).items():
+        if key not in ["observation.state", "action"]:
+            report.errors.append(f"`feature_storage` has a storage for unknown feature '{key}'.")
+            continue
+        try:
+            validate_storage(key, {"dtype": "float32", "storage": storage})
+        except ValueError as e:
+            report.errors.append(str(e))
+    return cameras
+
+
+def estimate_resources(config, cameras: dict[str, tuple[int, int, float]]) -> dict[str, float]:
+    """
+    Upper bounds of what a generation with this config produces, assuming every episode runs its whole
+    `episode_time_s` (episodes that succeed earlier are shorter).
+    """
+    episode_frames = round(config.episode_time_s * config.fps)
+    raw_image_bytes = 0
+    queue_bytes_per_s = 0
+    batch_bytes = 0
+    for name, (width, height, fps) in cameras.items():
+        # RGB, plus 16 bits per pixel for each depth or segmentation channel
+        image_bytes = width * height * (3 + 2 * len(getattr(config, "camera_channels", {}).get(name, [])))
+        raw_image_bytes += config.num_episodes * math.ceil(config.episode_time_s * fps) * image_bytes
+        queue_bytes_per_s += config.num_envs * fps * image_bytes
+        batch_bytes += config.num_envs * image_bytes
+
+    if config.video:
+        encoded_bytes = raw_image_bytes * VIDEO_COMPRESSION_RATIO
+        # The PNG frames the videos are encoded from are kept next to them
+        disk_bytes = encoded_bytes + raw_image_bytes * PNG_COMPRESSION_RATIO
+    else:
+        encoded_bytes = disk_bytes = raw_image_bytes * PNG_COMPRESSION_RATIO
+    return {
+        "max_frames": config.num_episodes * episode_frames,
+        "max_physics_steps": config.num_episodes * episode_frames * config.record_decimation,
+        "raw_image_bytes": raw_image_bytes,
+        "encoded_image_bytes": encoded_bytes,
+        "disk_bytes": disk_bytes,
+        "camera_batch_bytes": batch_bytes,
+        "image_queue_bytes": queue_bytes_per_s * QUEUE_BACKLOG_S,
+    }
+
+
+def dry_run(config_path: str, config_kwargs: dict | None = None) -> DryRunReport:
+    """
+    Load the config class at `config_path` with lazily imported Isaac types, construct it with `config_kwargs`,
+    validate it and estimate the resources of the generation.
+    """
+    from domin.generate_dataset import load_config_from_path
+
+    report = DryRunReport(config_name=config_path)
+    with lazy_isaac_imports():
+        try:
+            config_cls = load_config_from_path(config_path)
+            report.config_name = config_cls.__name__
+            config = config_cls(**(config_kwargs or {}))
+        # The config module runs user code: any of its errors is reported
+        except Exception as e:  # noqa: BLE001
+            report.errors.append(f"Could not load the config: {type(e).__name__}: {e}")
+            return report
+
+        report.cameras = validate_config(config, report)
+        report.estimates = estimate_resources(config, report.cameras)
+    return report
@@ -0,0 +1,118 @@
+# Copyright 2026 Nimit Shah. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Stable fingerprints of dataset configs, to tell whether an existing dataset can be extended by a new run.
+
+The values that define what a dataset contains (scene, randomization ranges, task, rates, cameras, robot) are
+reduced to a canonical JSON form and hashed. Config objects are walked field by field, arrays and tensors become
+lists, and functions and classes are represented by their qualified name (so a change in their code is not
+detected: bump the config `version` for that). The hash is stored in info.json as `config_fingerprint`.
+"""
+
+import dataclasses
+import enum
+import hashlib
+import json
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import torch
+
+# info.json entry of the fingerprint of the config a dataset was generated with
+FINGERPRINT_KEY = "config_fingerprint"
+# Bumped when the canonical form changes, so that fingerprints of different forms never match
+FINGERPRINT_VERSION = 1
+INFO_PATH = "meta/info.json"
+
+
+def qualified_name(obj: Any) -> str:
+    return f"{getattr(obj, '__module__', '')}.{getattr(obj, '__qualname__', type(obj).__qualname__)}"
+
+
+def canonical(value: Any, _parents: tuple[int, ...] = ()) -> Any:
+    """JSON-serializable form of a config value that only depends on its contents."""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, enum.Enum):
+        return canonical(value.value, _parents)
+    if isinstance(value, Path):
+        return str(value)
+    if isinstance(value, torch.Tensor):
+        value = value.detach().cpu().numpy()
+    if isinstance(value, (np.ndarray, np.generic)):
+        return value.tolist()
+    if isinstance(value, type) or callable(value) and not dataclasses.is_dataclass(value):
+        return qualified_name(value)
+
+    if id(value) in _parents:
+        return "<cycle>"
+    parents = (*_parents, id(value))
+    if isinstance(value, dict):
+        return {str(key): canonical(item, parents) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [canonical(item, parents) for item in value]
+    if isinstance(value, (set, frozenset)):
+        return sorted((canonical(item, parents) for item in value), key=json.dumps)
+    if dataclasses.is_dataclass(value):
+        fields = {field.name: getattr(value, field.name) for field in dataclasses.fields(value)}
+    elif hasattr(value, "__dict__"):
+        fields = {key: item for key, item in vars(value).items() if not key.startswith("_")}
+    else:
+        return qualified_name(type(value))
+    return {"__type__": qualified_name(type(value)), **canonical(fields, parents)}
+
+
+def config_fingerprint(values: dict[str, Any]) -> str:
+    """
+    Hash of the canonical form of named config values.
+
+    Args:
+        values: Name -> value of everything that defines the contents of a dataset.
+
+    Returns:
+        16 hex digits, stable across processes and machines.
+    """
+    payload = json.dumps(
+        {"version": FINGERPRINT_VERSION, "values": canonical(values)}, sort_keys=True, separators=(",", ":")
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def check_fingerprint(root: str | Path, fingerprint: str) -> int:
+    """
+    Number of episodes of the dataset at `root` that a run with this fingerprint can extend.
+
+    Args:
+        root: Dataset root, which may not exist yet.
+        fingerprint: Fingerprint of the config of the run.
+
+    Returns:
+        0 if there's no dataset at `root` yet, else its number of episodes.
+
+    Raises:
+        ValueError: If the dataset was generated with another config (or before fingerprints were recorded).
+    """
+    info_path = Path(root) / INFO_PATH
+    if not info_path.exists():
+        return 0
+    with open(info_path) as f:
+        info = json.load(f)
+    existing = info.get(FINGERPRINT_KEY)
+    if existing != fingerprint:
+        raise ValueError(
+            f"The dataset at {root} was generated with another config (fingerprint {existing}, this config "
+            f"{fingerprint}). Use another dataset_path, or the config it was generated with."
+        )
+    return info["total_episodes"]
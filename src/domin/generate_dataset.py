@@ -63,9 +63,227 @@ def load_config_from_path(path: str):
     return config_cls
 
 
+def config_kwargs(args_cli, **kwargs) -> dict:
+    """
+    Keyword arguments of the config class: the fields of `--config_overlay`, overridden by `kwargs` that are
+    not None.
+    """
+    overlay = {}
+    if args_cli.config_overlay:
+        from domin.autotune import load_overlay
+
+        overlay = load_overlay(args_cli.config_overlay)
+    return {**overlay, **{k: v for k, v in kwargs.items() if v is not None}}
+
+
+def run_shard(spec, quota, reserved, progress, config_path: str, args_cli):
+    """
+    Worker of a sharded generation (see `domin.sharding`): record the episodes of one shard in this process.
+    """
+    import copy
+
+    from isaaclab.app import AppLauncher
+
+    args_cli = copy.copy(args_cli)
+    args_cli.device = spec.device
+    app_launcher = AppLauncher(args_cli)
+
+    from domin.sharding import reserve_next_story
+    from domin.simulation_controller import SimulationController
+
+    config_cls = load_config_from_path(config_path)
+    dataset_config = config_cls(
+        **config_kwargs(
+            args_cli,
+            num_envs=spec.num_envs,
+            num_episodes=quota.value,
+            dataset_path=spec.root,
+            episode_offset=spec.episode_start,
+        )
+    )  # type: ignore
+
+    controller = SimulationController(
+        config=dataset_config, app_launcher=app_launcher, args_cli=args_cli
+    )
+
+    def on_story_end(num_saved: int) -> int:
+        # The coordinator may have lowered the quota to hand episodes over to another shard
+        num_episodes = reserve_next_story(quota, reserved, num_saved, spec.num_envs)
+        progress.put((spec.shard_id, num_saved, False))
+        return num_episodes
+
+    controller.record_dataset(on_story_end=on_story_end)
+    progress.put((spec.shard_id, controller.dataset.dataset.num_episodes, True))
+    # Flush the queue before closing the app, which may exit the process
+    progress.close()
+    progress.join_thread()
+    app_launcher.app.close()
+
+
+def run_sharded(args_cli):
+    """
+    Launch one generation process per device in `--shard_devices` and coordinate them.
+    """
+    import functools
+
+    from domin.sharding import ShardCoordinator
+
+    num_envs = args_cli.shard_num_envs or [config_kwargs(args_cli, num_envs=args_cli.num_envs).get("num_envs", 1)]
+    if len(num_envs) == 1:
+        num_envs = num_envs * len(args_cli.shard_devices)
+    if len(num_envs) != len(args_cli.shard_devices):
+        raise ValueError("--shard_num_envs needs one value, or one value per device in --shard_devices.")
+
+    coordinator = ShardCoordinator(
+        num_episodes=args_cli.num_episodes,
+        slots=list(zip(args_cli.shard_devices, num_envs)),
+        output_root=args_cli.output_dir,
+        worker=functools.partial(
+            run_shard, config_path=args_cli.config_path, args_cli=args_cli
+        ),
+    )
+    shards = coordinator.run()
+    print(
+        f"Generated {sum(n for _, n in shards)} episodes in {len(shards)} shards under {args_cli.output_dir}"
+    )
+
+
+def calibrate(candidate, args_cli, work_dir: str):
+    """
+    Autotune workload: record a few short stories with the candidate setting in a separate Isaac Sim process
+    (the scene has to be rebuilt for every env count), and read back its telemetry and peak memory.
+    """
+    import json
+    import os
+    import shutil
+    import subprocess
+    import sys
+    import time
+    from pathlib import Path
+
+    from domin.autotune import Calibration
+    from domin.dataset_builder.telemetry import JSONL_NAME
+
+    run_dir = Path(work_dir) / (
+        f"envs{candidate.num_envs}-p{candidate.num_image_writer_processes}"
+        f"-t{candidate.num_image_writer_threads_per_camera}"
+    )
+    # A dataset (or telemetry) left by a previous run would be topped up (or read) instead of recorded afresh
+    shutil.rmtree(run_dir, ignore_errors=True)
+    run_dir.mkdir(parents=True)
+    overlay = config_kwargs(
+        args_cli,
+        **candidate.as_overlay(),
+        dataset_path=str(run_dir / "dataset"),
+        telemetry_dir=str(run_dir / "telemetry"),
+        episode_time_s=args_cli.autotune_episode_time_s,
+    )
+    with open(run_dir / "overlay.json", "w") as f:
+        json.dump(overlay, f, indent=4)
+
+    cmd = [
+        sys.executable,
+        "-m",
+        "domin.generate_dataset",
+        args_cli.config_path,
+        "--num_episodes",
+        str(candidate.num_envs * args_cli.autotune_stories),
+        "--config_overlay",
+        str(run_dir / "overlay.json"),
+        "--headless",
+    ]
+    if getattr(args_cli, "device", None):
+        cmd += ["--device", args_cli.device]
+    with open(run_dir / "log.txt", "w") as log:
+        process = subprocess.Popen(cmd, stdout=log, stderr=subprocess.STDOUT)
+        deadline = time.monotonic() + args_cli.autotune_timeout_s
+        # wait4 gives the peak memory of this child only
+        pid, status, rusage = os.wait4(process.pid, os.WNOHANG)
+        while pid == 0 and time.monotonic() < deadline:
+            time.sleep(1.0)
+            pid, status, rusage = os.wait4(process.pid, os.WNOHANG)
+        if pid == 0:
+            process.kill()
+            os.wait4(process.pid, 0)
+            return Calibration(
+                candidate, error=f"timed out after {args_cli.autotune_timeout_s:.0f}s, see {run_dir / 'log.txt'}"
+            )
+        process.returncode = os.waitstatus_to_exitcode(status)
+
+    telemetry_path = run_dir / "telemetry" / JSONL_NAME
+    if process.returncode != 0 or not telemetry_path.exists():
+        return Calibration(candidate, error=f"exit code {process.returncode}, see {run_dir / 'log.txt'}")
+    with open(telemetry_path) as f:
+        summary = json.loads(f.readlines()[-1])
+    # ru_maxrss is in KiB on Linux
+    return Calibration.from_telemetry(candidate, summary, peak_memory_bytes=rusage.ru_maxrss * 1024)
+
+
+def run_autotune(args_cli):
+    """
+    Search for the `num_envs` and image writer settings with the best recording throughput, and write them as
+    a config overlay to `--autotune`.
+    """
+    import functools
+    import tempfile
+
+    from domin.autotune import Autotuner, write_overlay
+
+    work_dir = args_cli.output_dir or tempfile.mkdtemp(prefix="domin-autotune-")
+    tuner = Autotuner(
+        functools.partial(calibrate, args_cli=args_cli, work_dir=work_dir),
+        num_envs_options=args_cli.autotune_num_envs,
+        memory_limit_bytes=int(args_cli.autotune_memory_gb * 2**30) if args_cli.autotune_memory_gb else None,
+        images_per_frame=args_cli.autotune_num_cameras,
+    )
+    result = tuner.run()
+    if result.best is None:
+        raise RuntimeError(f"No setting could be calibrated, see the logs under {work_dir}")
+    write_overlay(result.best, args_cli.autotune, result.calibrations)
+    print(f"Best setting: {result.best}. Written to {args_cli.autotune} (use it with --config_overlay)")
+
+
+def run_replay(args_cli):
+    """
+    Render the cameras of a state-only dataset (see `domin.dataset_builder.replay`).
+    """
+    from isaaclab.app import AppLauncher
+
+    app_launcher = AppLauncher(args_cli)
+
+    from domin.simulation_controller import SimulationController
+
+    config_cls = load_config_from_path(args_cli.config_path)
+    # The replayed dataset has cameras, so the config is the state-only one without `state_only`. A dataset_path of
+    # the overlay is the one of the source: the replay goes to --output_dir, or to the fingerprint's default path
+    kwargs = config_kwargs(args_cli, num_envs=args_cli.num_envs, state_only=False)
+    kwargs["dataset_path"] = args_cli.output_dir or ""
+    dataset_config = config_cls(**kwargs)  # type: ignore
+    controller = SimulationController(
+        config=dataset_config, app_launcher=app_launcher, args_cli=args_cli
+    )
+    episodes = controller.replay_dataset(args_cli.replay)
+    print(f"Replayed {len(episodes)} episodes of {args_cli.replay} into {dataset_config.dataset_path}")
+    app_launcher.app.close()
+
+
+def run_dry_run(args_cli) -> int:
+    """
+    Validate the config and estimate the resources of the generation, without launching Isaac Sim.
+    """
+    from domin.dry_run import dry_run
+
+    report = dry_run(
+        args_cli.config_path,
+        config_kwargs(args_cli, num_envs=args_cli.num_envs, num_episodes=args_cli.num_episodes),
+    )
+    print(report.format())
+    return 0 if report.ok else 1
+
+
 def main():
     import argparse
-    from isaaclab.app import AppLauncher
+    import sys
 
     parser = argparse.ArgumentParser(
         description="Generate Dataset using Domin"
@@ -76,19 +294,131 @@ def main():
         help="Path to the python file containing the dataset configuration.",
     )
     parser.add_argument(
-        "--num_envs", type=int, default=1, help="Number of environments to simulate."
+        "--num_envs",
+        type=int,
+        default=None,
+        help="Number of environments to simulate. Defaults to the config overlay's, or 1.",
     )
     parser.add_argument(
         "--num_episodes",
         type=int,
-        required=True,
-        help="Number of episodes to record/infer",
+        default=None,
+        help="Number of episodes to record/infer (required unless autotuning). An existing dataset of the same "
+        "config (see BaseDatasetConfig.fingerprint) at its dataset_path is topped up to this number.",
+    )
+    parser.add_argument(
+        "--config_overlay",
+        type=str,
+        default=None,
+        help="JSON file of config fields overriding the config class defaults (e.g. written by --autotune).",
+    )
+    parser.add_argument(
+        "--autotune",
+        type=str,
+        default=None,
+        help="Run short calibrations to find the num_envs and image writer settings with the best throughput, "
+        "and write them to this config overlay file instead of generating a dataset.",
+    )
+    parser.add_argument(
+        "--autotune_num_envs",
+        type=int,
+        nargs="+",
+        default=[1, 2, 4, 8, 16, 32, 64, 128],
+        help="Env counts tried by --autotune, in increasing order.",
     )
+    parser.add_argument(
+        "--autotune_memory_gb",
+        type=float,
+        default=None,
+        help="Peak memory (GiB) a calibration run may use. Larger env counts are not tried once it's exceeded.",
+    )
+    parser.add_argument(
+        "--autotune_num_cameras",
+        type=int,
+        default=1,
+        help="Number of cameras recorded by the config, to size the tolerated image writer backlog.",
+    )
+    parser.add_argument(
+        "--autotune_stories", type=int, default=2, help="Stories recorded by each calibration run."
+    )
+    parser.add_argument(
+        "--autotune_episode_time_s",
+        type=float,
+        default=5.0,
+        help="Maximum episode length of the calibration runs.",
+    )
+    parser.add_argument(
+        "--autotune_timeout_s",
+        type=float,
+        default=1800.0,
+        help="Calibration runs taking longer than this are killed and count as failed.",
+    )
+    parser.add_argument(
+        "--shard_devices",
+        type=str,
+        nargs="+",
+        default=None,
+        help="Generate in parallel with one process per device (e.g. cuda:0 cuda:1), each writing its own "
+        "shard of the dataset under --output_dir.",
+    )
+    parser.add_argument(
+        "--shard_num_envs",
+        type=int,
+        nargs="+",
+        default=None,
+        help="Number of environments of each shard process (one value, or one per device). Defaults to --num_envs.",
+    )
+    parser.add_argument(
+        "--output_dir",
+        type=str,
+        default=None,
+        help="Directory of the shard datasets (required with --shard_devices), of the --autotune calibration runs, "
+        "or of the --replay dataset.",
+    )
+    parser.add_argument(
+        "--replay",
+        type=str,
+        default=None,
+        help="Root of a dataset recorded with `state_only`: render its cameras by replaying its sim states, and "
+        "record them in a new dataset at --output_dir (defaults to the dataset_path of the config without "
+        "`state_only`).",
+    )
+    parser.add_argument(
+        "--dry_run",
+        "--dry-run",
+        action="store_true",
+        help="Validate the config and estimate frames, disk and memory usage without launching Isaac Sim.",
+    )
+    args_cli, _ = parser.parse_known_args()
+    if args_cli.dry_run:
+        # Dispatched before Isaac Lab is imported: it isn't needed, and its modules are replaced by placeholders.
+        # Isaac Sim arguments (e.g. --headless) are accepted and ignored
+        sys.exit(run_dry_run(args_cli))
+
+    try:
+        from isaaclab.app import AppLauncher
+    except ImportError:
+        parser.error("Isaac Lab is required to generate datasets (only --dry-run works without it).")
     AppLauncher.add_app_launcher_args(parser)
     args_cli = parser.parse_args()
     args_cli.enable_cameras = True
     config_path = args_cli.config_path
 
+    if args_cli.autotune:
+        run_autotune(args_cli)
+        return
+    if args_cli.replay:
+        run_replay(args_cli)
+        return
+    if args_cli.num_episodes is None:
+        parser.error("--num_episodes is required.")
+
+    if args_cli.shard_devices:
+        if args_cli.output_dir is None:
+            parser.error("--output_dir is required with --shard_devices.")
+        run_sharded(args_cli)
+        return
+
     app_launcher = AppLauncher(args_cli)
     simulation_app = app_launcher.app
 
@@ -97,8 +427,7 @@ def main():
     config_cls = load_config_from_path(config_path)
 
     dataset_config = config_cls(
-        num_envs=args_cli.num_envs,
-        num_episodes=args_cli.num_episodes,
+        **config_kwargs(args_cli, num_envs=args_cli.num_envs, num_episodes=args_cli.num_episodes)
     )  # type: ignore
 
     controller = SimulationController(
@@ -106,6 +435,8 @@ def main():
     )
 
     controller.record_dataset()
+    # record_dataset doesn't exit the simulation app
+    simulation_app.close()
 
 
 if __name__ == "__main__":
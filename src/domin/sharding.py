@@ -0,0 +1,297 @@
+# Copyright 2026 Nimit Shah. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Coordinator for sharded dataset generation: several independent generation processes (e.g. one per GPU), each
+recording a disjoint range of episodes into its own dataset root.
+
+Workers are plain functions run in their own process, with the signature
+`worker(spec: ShardSpec, quota: multiprocessing.Value, reserved: multiprocessing.Value,
+progress: multiprocessing.Queue)`. A worker records episodes until it has saved `quota.value` of them (the
+coordinator may lower it to rebalance), never handing out a local episode index at or above its quota. After each
+story it calls `reserve_next_story` (which reads the quota and reserves the indices its next story may use) and
+puts a `(shard_id, num_episodes_saved, finished)` tuple on `progress`, and once more with `finished=True` when it
+stops.
+
+Episode indices are allocated densely: the shards' ranges tile [0, num_episodes), so global indices line up with
+the rows of a start poses file. Rebalancing hands the untouched tail of a shard's range over to a new shard. Only
+the episodes a crashed shard had in flight get replacements past num_episodes.
+"""
+
+import json
+import multiprocessing as mp
+import queue
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+MANIFEST_NAME = "shards.json"
+
+
+@dataclass
+class ShardSpec:
+    shard_id: int
+    # Dataset root the shard writes to
+    root: str
+    device: str
+    num_envs: int
+    # Global index of the first episode of the shard. Its episodes use the range
+    # [episode_start, episode_start + num_episodes).
+    episode_start: int
+    # Quota of episodes. Lowered in the coordinator's copy when the tail of the range is handed over to another
+    # shard, or left unused by a crashed shard (see `ShardCoordinator`)
+    num_episodes: int
+
+
+def reserve_next_story(
+    quota: "mp.sharedctypes.Synchronized", reserved: "mp.sharedctypes.Synchronized", num_saved: int, num_envs: int
+) -> int:
+    """
+    Called by a worker between two stories: reserve the local episode indices its next story may use, and return
+    its current quota (the next story only hands out indices below it).
+
+    Each env holds at most one episode that isn't saved (recording or pending a rerecord), so the next story only
+    uses indices below `num_saved + num_envs`. The coordinator never takes reserved indices away.
+    """
+    with quota.get_lock():
+        reserved.value = min(quota.value, num_saved + num_envs)
+        return quota.value
+
+
+@dataclass
+class _RunningShard:
+    spec: ShardSpec
+    slot: int
+    process: mp.process.BaseProcess
+    quota: "mp.sharedctypes.Synchronized"
+    # Local episode indices below it may be in use (see `reserve_next_story`)
+    reserved: "mp.sharedctypes.Synchronized"
+    num_saved: int = 0
+
+
+class ShardCoordinator:
+    """
+    Spawn one worker per slot, track the overall progress towards `num_episodes`, and rebalance when a shard
+    finishes early: the remaining episodes are either handed out to a new shard on the freed slot or, when
+    none are left unassigned, half of the unreserved quota of the slowest shard (the tail of its episode range)
+    is taken over.
+    """
+
+    def __init__(
+        self,
+        num_episodes: int,
+        slots: list[tuple[str, int]],
+        output_root: str | Path,
+        worker: Callable,
+        min_episodes_per_shard: int = 1,
+        max_failures: int = 3,
+        mp_context: str = "spawn",
+    ):
+        """
+        Args:
+            num_episodes: Total number of episodes to generate over all the shards.
+            slots: (device, num_envs) of each worker process running at the same time.
+            output_root: Directory under which the shard roots (`shard-XXX`) and the manifest are written.
+            worker: Function run in each worker process (see module docstring).
+            min_episodes_per_shard: Don't start a new shard for fewer episodes than this.
+            max_failures: Number of worker crashes tolerated before giving up.
+            mp_context: Multiprocessing start method. Isaac Sim requires "spawn".
+        """
+        if not slots:
+            raise ValueError("At least one (device, num_envs) slot is required.")
+        self.num_episodes = num_episodes
+        self.slots = slots
+        self.output_root = Path(output_root)
+        self.worker = worker
+        self.min_episodes_per_shard = max(1, min_episodes_per_shard)
+        self.max_failures = max_failures
+        self.ctx = mp.get_context(mp_context)
+
+        self.progress = self.ctx.Queue()
+        self.running: dict[int, _RunningShard] = {}
+        self.finished: list[tuple[ShardSpec, int]] = []  # (spec, num_episodes_saved)
+        self.next_shard_id = 0
+        # Episode ranges [start, end) not handed out to a shard yet
+        self.free_ranges: list[tuple[int, int]] = []
+        # Replacements of the episodes lost by crashed shards are numbered from here
+        self.next_episode_index = num_episodes
+        self.num_failures = 0
+
+    @property
+    def num_saved(self) -> int:
+        return sum(n for _, n in self.finished) + sum(s.num_saved for s in self.running.values())
+
+    @property
+    def num_unassigned(self) -> int:
+        """Episodes not covered by the quota of a running shard nor saved by a finished one."""
+        assigned = sum(n for _, n in self.finished)
+        assigned += sum(max(s.quota.value, s.num_saved) for s in self.running.values())
+        return max(0, self.num_episodes - assigned)
+
+    def _allocate(self, num_episodes: int) -> tuple[int, int]:
+        """
+        Take up to `num_episodes` contiguous episode indices, from the free ranges first.
+
+        Returns:
+            (first index, number of episodes)
+        """
+        if self.free_ranges:
+            start, end = self.free_ranges.pop(0)
+            num_episodes = min(num_episodes, end - start)
+            if start + num_episodes < end:
+                self.free_ranges.insert(0, (start + num_episodes, end))
+            return start, num_episodes
+        start = self.next_episode_index
+        self.next_episode_index += num_episodes
+        return start, num_episodes
+
+    def _start_shard(self, slot: int, episode_start: int, num_episodes: int):
+        device, num_envs = self.slots[slot]
+        spec = ShardSpec(
+            shard_id=self.next_shard_id,
+            root=str(self.output_root / f"shard-{self.next_shard_id:03d}"),
+            device=device,
+            num_envs=num_envs,
+            episode_start=episode_start,
+            num_episodes=num_episodes,
+        )
+        self.next_shard_id += 1
+
+        quota = self.ctx.Value("i", num_episodes)
+        # The first story may use the first num_envs indices
+        reserved = self.ctx.Value("i", min(num_episodes, num_envs), lock=False)
+        process = self.ctx.Process(
+            target=self.worker, args=(spec, quota, reserved, self.progress), daemon=True
+        )
+        process.start()
+        self.running[spec.shard_id] = _RunningShard(spec, slot, process, quota, reserved)
+        print(f"Started shard {spec.shard_id} on {device}: {num_episodes} episodes from {spec.episode_start}")
+
+    def _steal(self) -> tuple[int, int]:
+        """
+        Lower the quota of the running shard with the most unreserved episodes, and take over the tail of its
+        episode range.
+
+        Returns:
+            (first index, number of episodes) taken over, with 0 episodes if none were.
+        """
+        if not self.running:
+            return 0, 0
+        victim = max(self.running.values(), key=lambda s: s.quota.value - s.reserved.value)
+        with victim.quota.get_lock():
+            stolen = (victim.quota.value - victim.reserved.value) // 2
+            if stolen < self.min_episodes_per_shard:
+                return 0, 0
+            victim.quota.value -= stolen
+            victim.spec.num_episodes = victim.quota.value
+        print(f"Rebalancing {stolen} episodes away from shard {victim.spec.shard_id}")
+        return victim.spec.episode_start + victim.spec.num_episodes, stolen
+
+    def _on_finished(self, shard_id: int, crashed: bool = False):
+        shard = self.running.pop(shard_id)
+        shard.process.join()
+        self.finished.append((shard.spec, shard.num_saved))
+        if crashed:
+            self.num_failures += 1
+            print(f"Shard {shard_id} crashed (exit code {shard.process.exitcode}) after {shard.num_saved} episodes")
+            if self.num_failures > self.max_failures:
+                self.shutdown()
+                raise RuntimeError(f"More than {self.max_failures} shard workers crashed.")
+
+        # Indices of the shard's range that it never used (when it crashed)
+        unused_start = shard.spec.episode_start + max(shard.reserved.value, shard.num_saved)
+        unused_end = shard.spec.episode_start + shard.quota.value
+        if unused_start < unused_end:
+            self.free_ranges.append((unused_start, unused_end))
+            self.free_ranges.sort()
+            shard.spec.num_episodes = unused_start - shard.spec.episode_start
+
+        # Reuse the freed slot for the unassigned episodes, or take over part of a slower shard
+        num_episodes = self.num_unassigned
+        if num_episodes:
+            episode_start, num_episodes = self._allocate(num_episodes)
+        else:
+            episode_start, num_episodes = self._steal()
+        if num_episodes >= self.min_episodes_per_shard or (num_episodes and not self.running):
+            self._start_shard(shard.slot, episode_start, num_episodes)
+        elif num_episodes:
+            # Too few to start a shard for now: keep them for a later one
+            self.free_ranges.append((episode_start, episode_start + num_episodes))
+            self.free_ranges.sort()
+
+    def _handle_message(self, shard_id: int, num_saved: int, finished: bool):
+        shard = self.running.get(shard_id)
+        if shard is None:
+            return
+        shard.num_saved = num_saved
+        print(f"Progress: {self.num_saved}/{self.num_episodes} episodes ({len(self.running)} shards running)")
+        if finished:
+            self._on_finished(shard_id)
+
+    def _poll(self, timeout: float):
+        try:
+            self._handle_message(*self.progress.get(timeout=timeout))
+            return
+        except queue.Empty:
+            pass
+
+        # Workers that exited without reporting that they finished
+        dead = [shard_id for shard_id, s in self.running.items() if not s.process.is_alive()]
+        if not dead:
+            return
+        # Their last messages may have arrived in the meantime
+        while True:
+            try:
+                self._handle_message(*self.progress.get_nowait())
+            except queue.Empty:
+                break
+        for shard_id in dead:
+            if shard_id in self.running:
+                self._on_finished(shard_id, crashed=self.running[shard_id].process.exitcode != 0)
+
+    def run(self, poll_interval_s: float = 1.0) -> list[tuple[ShardSpec, int]]:
+        """
+        Generate all the episodes and write the manifest of the shards.
+
+        Returns:
+            (spec, number of episodes saved) of every shard, in the order they were started.
+        """
+        self.output_root.mkdir(parents=True, exist_ok=True)
+        per_slot, extra = divmod(self.num_episodes, len(self.slots))
+        episode_start = 0
+        for slot in range(len(self.slots)):
+            num_episodes = per_slot + (slot < extra)
+            if num_episodes:
+                self._start_shard(slot, episode_start, num_episodes)
+                episode_start += num_episodes
+
+        try:
+            while self.running:
+                self._poll(poll_interval_s)
+        finally:
+            self.shutdown()
+
+        shards = sorted(self.finished, key=lambda f: f[0].shard_id)
+        self.write_manifest(shards)
+        return shards
+
+    def write_manifest(self, shards: list[tuple[ShardSpec, int]]):
+        manifest = [{**asdict(spec), "num_episodes_saved": n} for spec, n in shards]
+        with open(self.output_root / MANIFEST_NAME, "w") as f:
+            json.dump(manifest, f, indent=4)
+
+    def shutdown(self):
+        for shard in self.running.values():
+            if shard.process.is_alive():
+                shard.process.terminate()
+            shard.process.join()
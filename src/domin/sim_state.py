@@ -14,6 +14,10 @@
 import torch
 from dataclasses import dataclass
 
+# Position (3) + quaternion (4)
+POSE_DIM = 7
+POSE_NAMES = ("x", "y", "z", "qw", "qx", "qy", "qz")
+
 
 @dataclass
 class SimState:
@@ -26,3 +30,88 @@ class SimState:
 class SimProps:
     robot_joint_limits: torch.Tensor
     objs_size: dict[str, torch.Tensor]
+
+
+class SimStateBuffer:
+    """
+    Packed, preallocated storage for the `SimState` of all envs.
+
+    One (num_envs, num_joints + 7 * (1 + num_objects)) tensor is laid out as
+    [robot_joints | robot_pose | object_0 pose | object_1 pose | ...], and `state` is a `SimState` of
+    named views into it. `update` refreshes the buffer in place, so the views never need to be rebuilt
+    and nothing is allocated per physics step.
+    """
+
+    def __init__(
+        self,
+        num_envs: int,
+        num_joints: int,
+        obj_names: list[str],
+        device: torch.device | str | None = None,
+        dtype: torch.dtype = torch.float32,
+    ):
+        self.num_joints = num_joints
+        self.obj_names = list(obj_names)
+        self.data = torch.zeros(
+            (num_envs, num_joints + POSE_DIM * (1 + len(self.obj_names))),
+            device=device,
+            dtype=dtype,
+        )
+        self.state = self.views(self.data)
+
+    def views(self, data: torch.Tensor) -> SimState:
+        """
+        `SimState` of views into a tensor with the layout of `data`.
+        """
+        start = self.num_joints
+        objs_pose = {}
+        for name in self.obj_names:
+            start += POSE_DIM
+            objs_pose[name] = data[:, start : start + POSE_DIM]
+        return SimState(
+            data[:, : self.num_joints],
+            data[:, self.num_joints : self.num_joints + POSE_DIM],
+            objs_pose,
+        )
+
+    def names(self, joint_names: list[str]) -> list[str]:
+        """
+        Name of each column of `data` (e.g. of a recorded `observation.sim_state` feature).
+        """
+        if len(joint_names) != self.num_joints:
+            raise ValueError(f"Expected {self.num_joints} joint names, got {len(joint_names)}.")
+        return [
+            *joint_names,
+            *(f"robot.{name}" for name in POSE_NAMES),
+            *(f"{obj}.{name}" for obj in self.obj_names for name in POSE_NAMES),
+        ]
+
+    def update(
+        self,
+        robot_joints: torch.Tensor,
+        robot_pos_w: torch.Tensor,
+        robot_quat_w: torch.Tensor,
+        objs_pos_w: dict[str, torch.Tensor],
+        objs_quat_w: dict[str, torch.Tensor],
+        env_origins: torch.Tensor,
+    ):
+        """
+        Refresh the buffer in place from world frame data. Positions are stored relative to `env_origins`.
+        """
+        self.state.robot_joints.copy_(robot_joints)
+        self._write_pose(self.state.robot_pose, robot_pos_w, robot_quat_w, env_origins)
+        for name, pose in self.state.objs_pose.items():
+            self._write_pose(pose, objs_pos_w[name], objs_quat_w[name], env_origins)
+
+    @staticmethod
+    def _write_pose(
+        pose: torch.Tensor, pos_w: torch.Tensor, quat_w: torch.Tensor, env_origins: torch.Tensor
+    ):
+        pose[:, :3].copy_(pos_w).sub_(env_origins)
+        pose[:, 3:].copy_(quat_w)
+
+    def snapshot(self) -> SimState:
+        """
+        Packed copy of the current state (e.g. the start state of an episode).
+        """
+        return self.views(self.data.clone())
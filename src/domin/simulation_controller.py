@@ -16,8 +16,12 @@ Simulation controller for managing the simulation loop.
 """
 
 import argparse
+import warnings
+from pathlib import Path
+from typing import Callable
 
 import isaaclab.sim as sim_utils
+import numpy as np
 import torch
 from isaaclab.app import AppLauncher
 from isaaclab.assets.articulation import Articulation
@@ -31,7 +35,11 @@ from isaaclab.utils.math import subtract_frame_transforms
 
 from .base_dataset_config import BaseDatasetConfig
 from .dataset_builder import DatasetRecord, DatasetRecordConfig
-from .sim_state import SimProps, SimState
+from .dataset_builder.camera_channels import CHANNEL_DATA_TYPES
+from .dataset_builder.replay import replay_cameras
+from .dataset_builder.telemetry import Telemetry
+from .fingerprint import FINGERPRINT_KEY, check_fingerprint
+from .sim_state import SimProps, SimState, SimStateBuffer
 
 # TODO (bug): video creation and replacement on re-record
 # TODO (bug): images folder not deleted after episode finishes recording
@@ -88,7 +96,7 @@ class SimulationController:
 
         # Initialize Simulation Context
         sim_cfg = sim_utils.SimulationCfg(
-            dt=0.01,
+            dt=config.physics_dt,
             device=args_cli.device
             if args_cli and hasattr(args_cli, "device")
             else "cuda:0",
@@ -138,21 +146,50 @@ class SimulationController:
 
         self.props = SimProps(rjoint_lims, objs_size)
 
-    def get_state(self):
+        self.state_buffer = SimStateBuffer(
+            self.scene.num_envs,
+            self.robot.num_joints,
+            list(self.objects),
+            device=self.sim.device,
+        )
+        # Number of times the sim state changed, and the value it had when `state_buffer` was last refreshed
+        self._sim_version = 0
+        self._state_version = -1
+
+        # Replaced by the recorder's telemetry once recording starts
+        self.telemetry = Telemetry(enabled=False)
+
+    def get_state(self) -> SimState:
         """
-        Gets the current positions of all the rigid objects and robot in world frame.
+        Gets the current positions of all the rigid objects and robot (relative to their env origin).
+
+        The returned state is a view of `state_buffer`, refreshed in place at most once per sim step and
+        shared by targets, success checks and recording. Use `state_buffer.snapshot()` to keep a copy.
         """
-        env_origins = self.scene.env_origins
-        objs_pose = {
-            k: torch.cat((v.data.root_pos_w - env_origins, v.data.root_quat_w), dim=-1)
-            for k, v in self.objects.items()
-        }
-        rdata = self.robot.data
-        robot_joints = rdata.joint_pos
-        robot_pose = torch.cat(
-            (rdata.root_pos_w - env_origins, rdata.root_quat_w), dim=-1
-        )
-        return SimState(robot_joints, robot_pose, objs_pose)
+        if self._state_version != self._sim_version:
+            rdata = self.robot.data
+            self.state_buffer.update(
+                rdata.joint_pos,
+                rdata.root_pos_w,
+                rdata.root_quat_w,
+                {k: v.data.root_pos_w for k, v in self.objects.items()},
+                {k: v.data.root_quat_w for k, v in self.objects.items()},
+                self.scene.env_origins,
+            )
+            self._state_version = self._sim_version
+        return self.state_buffer.state
+
+    def step_sim(self, render: bool = True):
+        """
+        Step the physics and update the scene buffers.
+
+        Args:
+            render: Whether to render (and so refresh the cameras) after this physics step.
+        """
+        with self.telemetry.timer("sim.step_render" if render else "sim.step"):
+            self.sim.step(render=render)
+            self.scene.update(self.sim.get_physics_dt())
+        self._sim_version += 1
 
     def reset(self, success_mask: list[bool] | None = None):
         """
@@ -182,6 +219,8 @@ class SimulationController:
         joint_pos = self.robot.data.default_joint_pos
         joint_vel = self.robot.data.default_joint_vel
         self.robot.write_joint_state_to_sim(joint_pos, joint_vel)
+        # Hold the reset pose instead of the last targets of the previous story
+        self.robot.set_joint_position_target(joint_pos)
 
         # Determine which episode index to use for each env
         # We need to know the *next* episode index for successful envs
@@ -226,8 +265,16 @@ class SimulationController:
                 obj_pose_tensors[obj_name] = obj.data.default_root_state.clone()
 
             for env_idx in range(self.config.num_envs):
-                ep_idx = active_episodes[env_idx]
-                if ep_idx in self.loaded_poses:
+                if env_idx not in active_episodes:
+                    # Idle env
+                    continue
+                ep_idx = active_episodes[env_idx] + self.config.episode_offset
+                if ep_idx not in self.loaded_poses:
+                    warnings.warn(
+                        f"Some episodes have no start pose in {self.config.start_poses_file}, "
+                        "they start from the default poses."
+                    )
+                else:
                     ep_poses = self.loaded_poses[ep_idx]
 
                     # Robot
@@ -275,7 +322,10 @@ class SimulationController:
             poses_to_save = {}  # ep_idx -> {obj_name: pose}
 
             for env_idx in range(self.config.num_envs):
-                ep_idx = active_episodes[env_idx]
+                if env_idx not in active_episodes:
+                    # Idle env
+                    continue
+                ep_idx = active_episodes[env_idx] + self.config.episode_offset
 
                 # Initialize episode dict
                 if ep_idx not in poses_to_save:
@@ -348,49 +398,182 @@ class SimulationController:
 
             poses_to_save_final = {}
             for env_idx in range(self.config.num_envs):
-                if success_mask[env_idx]:
-                    ep_idx = active_episodes[env_idx]
+                if success_mask[env_idx] and env_idx in active_episodes:
+                    ep_idx = active_episodes[env_idx] + self.config.episode_offset
                     if ep_idx in poses_to_save:
                         poses_to_save_final[ep_idx] = poses_to_save[ep_idx]
 
             self.config.save_start_poses(poses_to_save_final, append=True)
 
-        for _ in range(10):
-            self.scene.update(self.sim.get_physics_dt())
+        # No physics step happened, so a single update refreshes the scene buffers
+        self.scene.update(self.sim.get_physics_dt())
+        self._sim_version += 1
 
-    def record_dataset(self):
+    def _is_settled(self) -> bool:
         """
-        Main loop to run the simulation.
-        Handles both recording and inference loops based on mode.
+        Whether the root and joint velocities of the robot and all objects, in every env, are below the
+        thresholds of the config.
+        """
+        unsettled = (
+            self.robot.data.joint_vel.abs() > self.config.settle_joint_vel_threshold
+        ).any()
+        for asset in [self.robot, *self.objects.values()]:
+            unsettled |= (
+                asset.data.root_lin_vel_w.norm(dim=-1) > self.config.settle_lin_vel_threshold
+            ).any()
+            unsettled |= (
+                asset.data.root_ang_vel_w.norm(dim=-1) > self.config.settle_ang_vel_threshold
+            ).any()
+        # Single device sync per check
+        return not unsettled.item()
+
+    def settle(self) -> int:
         """
+        Step the scene, without rendering, until it settles (see `_is_settled`) or `max_settle_steps` is reached.
+        A last rendered step then provides the cameras for the first recorded frame (unless `state_only`).
 
-        # Load start poses if available
-        if self.config.start_poses_file:
-            self.loaded_poses = self.config.load_start_poses()
+        Returns:
+            Number of physics steps taken
+        """
+        self.scene.write_data_to_sim()
+        steps = 0
+        while steps < self.config.max_settle_steps:
+            self.step_sim(render=False)
+            steps += 1
+            if self._is_settled():
+                break
         else:
-            self.loaded_poses = None
+            self.telemetry.count("settle.timeouts")
+
+        self.scene.write_data_to_sim()
+        self.step_sim(render=not self.config.state_only)
+        steps += 1
+        self.telemetry.observe("settle.steps", steps)
+        self.telemetry.gauge("settle.max_steps", max(steps, self.telemetry.gauges.get("settle.max_steps", 0)))
+        return steps
+
+    def settle_summary(self) -> dict | None:
+        """Physics steps taken by the settle phases of this run, and how many of them hit the step guard."""
+        steps = self.telemetry.histograms.get("settle.steps")
+        if steps is None or not steps.count:
+            return None
+        return {
+            "resets": steps.count,
+            "mean": steps.total / steps.count,
+            "max": self.telemetry.gauges["settle.max_steps"],
+            "total": steps.total,
+            "timeouts": self.telemetry.counters.get("settle.timeouts", 0),
+        }
 
-        assert self.simulation_app.is_running()
+    def _dataset_record_config(
+        self, state_only: bool = False, record_sim_state: bool | None = None
+    ) -> DatasetRecordConfig:
+        """
+        Recording config of the dataset at `dataset_path`.
 
-        rec_cfg = DatasetRecordConfig(
+        Args:
+            state_only: Leave the cameras out (see `BaseDatasetConfig.state_only`).
+            record_sim_state: Record the packed sim state of every frame. Defaults to `state_only`.
+        """
+        if record_sim_state is None:
+            record_sim_state = state_only
+        # Cameras that render slower than the dataset fps only record their fresh frames
+        camera_fps = {
+            k: round(1 / v.update_period) for k, v in self.cameras.items() if v.update_period > 0
+        }
+        camera_fps.update(self.config.camera_fps)
+        cameras = {} if state_only else {k: (v.width, v.height) for k, v in self.cameras.items()}
+
+        return DatasetRecordConfig(
             repo_id=self.config.hf_repo_id,
             robot_type=self.config.robot_type,
             default_task=self.config.default_task,
             joint_names=self.robot.joint_names,
-            cameras={k: (v.width, v.height) for k, v in self.cameras.items()},
+            cameras=cameras,
+            camera_fps={k: v for k, v in camera_fps.items() if k in cameras and v < self.config.fps},
+            camera_channels={k: v for k, v in self.config.camera_channels.items() if k in cameras},
+            sim_state_names=self.state_buffer.names(self.robot.joint_names) if record_sim_state else None,
+            depth_encoding=self.config.depth_encoding,
+            depth_scale=self.config.depth_scale,
             root=self.config.dataset_path,
             fps=self.config.fps,
             episode_time_s=self.config.episode_time_s,
             reset_time_s=self.config.reset_time_s,
             num_episodes=self.config.num_episodes,
             video=self.config.video,
+            feature_storage=self.config.feature_storage,
             push_to_hub=self.config.push_to_hub,
             tags=self.config.tags,
             num_image_writer_processes=self.config.num_image_writer_processes,
             num_image_writer_threads_per_camera=self.config.num_image_writer_threads_per_camera,
             num_envs=self.config.num_envs,
+            max_buffer_bytes=self.config.max_buffer_bytes,
+            webdataset_dir=self.config.webdataset_dir,
+            webdataset_shard_bytes=self.config.webdataset_shard_bytes,
+            webdataset_num_workers=self.config.webdataset_num_workers,
+            telemetry_dir=self.config.telemetry_dir,
+            progress_interval_s=self.config.progress_interval_s,
+            validate_every=self.config.validate_every,
+            video_encoding=self.config.video_encoding,
         )
+
+    def read_cameras(
+        self, cameras: list[str], rows: slice | torch.Tensor
+    ) -> dict[str, torch.Tensor]:
+        """
+        Observations of the given cameras (and of their `camera_channels`), as passed to `DatasetRecord.step`.
+
+        Args:
+            cameras: Names of the camera sensors to read.
+            rows: Rows to record of the (num_envs, ...) batches (indices on device, or `slice(None)` for all).
+        """
+        cam_obs = {}
+        with self.telemetry.timer("camera.read"):
+            for cam_name in cameras:
+                sensor = self.scene.sensors[cam_name]
+                # Assuming "rgb" is the data type we want
+                if "rgb" in sensor.data.output:
+                    cam_obs[cam_name] = sensor.data.output["rgb"][rows]
+                for channel in self.config.camera_channels.get(cam_name, []):
+                    data_type = CHANNEL_DATA_TYPES[channel]
+                    cam_obs[f"{cam_name}.{channel}"] = sensor.data.output[data_type][rows]
+        return cam_obs
+
+    def record_dataset(self, on_story_end: Callable[[int], int | None] | None = None):
+        """
+        Main loop to run the simulation.
+        Handles both recording and inference loops based on mode.
+
+        Args:
+            on_story_end: Called after each story with the number of episodes saved so far. It can return a
+                new target number of episodes (e.g. when a sharded generation is rebalanced).
+        """
+
+        # Load start poses if available
+        if self.config.start_poses_file:
+            self.loaded_poses = self.config.load_start_poses()
+        else:
+            self.loaded_poses = None
+
+        assert self.simulation_app.is_running()
+
+        # A dataset of the same config is topped up to `num_episodes`: only the missing episodes are generated
+        fingerprint = self.config.fingerprint()
+        existing_episodes = check_fingerprint(self.config.dataset_path, fingerprint)
+        rec_cfg = self._dataset_record_config(state_only=self.config.state_only)
+        rec_cfg.resume_recording = existing_episodes > 0
+        if existing_episodes:
+            print(
+                f"Found {existing_episodes} episodes of this config in {self.config.dataset_path}, "
+                f"generating the {max(self.config.num_episodes - existing_episodes, 0)} missing ones."
+            )
+
         self.dataset = DatasetRecord(rec_cfg)
+        self.dataset.save_metadata(FINGERPRINT_KEY, fingerprint)
+        self.telemetry = self.dataset.telemetry
+        telemetry = self.telemetry
+        if self.config.episode_offset:
+            self.dataset.save_metadata("episode_offset", self.config.episode_offset)
 
         diff_ik_cfg = DifferentialIKControllerCfg(
             command_type="pose", use_relative_mode=False, ik_method="dls"
@@ -428,13 +611,16 @@ class SimulationController:
                     print("Recorded enough episodes. Exiting.")
                     break
 
-                # Start new story (batch of episodes)
-                self.dataset.new_story()
+                # Start new story (batch of episodes). Exactly num_episodes are recorded: envs past it stay idle
+                self.dataset.new_story(episode_limit=self.config.num_episodes)
 
                 # Reset simulation for this story
-                self.reset(success_mask=success_mask)
+                with telemetry.timer("reset"):
+                    self.reset(success_mask=success_mask)
 
-                start_state = self.get_state()
+                self.get_state()
+                start_state = self.state_buffer.snapshot()
+                self.dataset.set_tasks(self.config.get_tasks(start_state))
 
                 # Reset internal state of config
                 # TODO (critical): Make this cleaner (remove config state and save/derive it from controller state in config)
@@ -442,40 +628,47 @@ class SimulationController:
                     self.config._env_states.fill_(0)
                     self.config._state_timers.fill_(0)
 
-                for _ in range(50):
-                    self.sim.step()
-                    self.scene.update(self.sim.get_physics_dt())
+                with telemetry.timer("settle"):
+                    self.settle()
 
-                prev_state = None
-                # We loop until all envs are done (success or max steps)
-                for step in range(500):
+                # Joints at the previous recorded frame, copied out of the state buffer before it is refreshed
+                prev_state = torch.empty_like(self.state_buffer.state.robot_joints)
+                has_prev_state = False
+                # Control steps between two recorded frames
+                record_every = self.config.record_decimation // self.config.control_decimation
+
+                # We loop (over control steps) until all envs are done (success, failure or step budget)
+                for step in range(self.config.max_episode_steps):
+                    record = step % record_every == 0
                     # Get targets (pose + auxiliary/gripper)
                     current_state = self.get_state()
-                    targets_res = self.config.get_targets(current_state)
+                    with telemetry.timer("control.get_targets"):
+                        targets_res = self.config.get_targets(current_state)
                     if isinstance(targets_res, tuple):
                         target_pose, aux_commands = targets_res
                     else:
                         target_pose, aux_commands = targets_res, None
 
-                    diff_ik_controller.set_command(target_pose)
-
-                    # Calculate IK for Arm
-                    jacobian = self.robot.root_physx_view.get_jacobians()[
-                        :, ee_body_id - 1, :, arm_joint_ids
-                    ]
-                    root_pose_w = self.robot.data.root_pose_w
-                    joint_pos_arm = self.robot.data.joint_pos[:, arm_joint_ids]
-                    ee_pose_w = self.robot.data.body_state_w[:, ee_body_id, 0:7]
-                    ee_pos_b, ee_quat_b = subtract_frame_transforms(
-                        root_pose_w[:, 0:3],
-                        root_pose_w[:, 3:7],
-                        ee_pose_w[:, 0:3],
-                        ee_pose_w[:, 3:7],
-                    )
+                    with telemetry.timer("control.ik"):
+                        diff_ik_controller.set_command(target_pose)
+
+                        # Calculate IK for Arm
+                        jacobian = self.robot.root_physx_view.get_jacobians()[
+                            :, ee_body_id - 1, :, arm_joint_ids
+                        ]
+                        root_pose_w = self.robot.data.root_pose_w
+                        joint_pos_arm = self.robot.data.joint_pos[:, arm_joint_ids]
+                        ee_pose_w = self.robot.data.body_state_w[:, ee_body_id, 0:7]
+                        ee_pos_b, ee_quat_b = subtract_frame_transforms(
+                            root_pose_w[:, 0:3],
+                            root_pose_w[:, 3:7],
+                            ee_pose_w[:, 0:3],
+                            ee_pose_w[:, 3:7],
+                        )
 
-                    joint_pos_des_arm = diff_ik_controller.compute(
-                        ee_pos_b, ee_quat_b, jacobian, joint_pos_arm
-                    )
+                        joint_pos_des_arm = diff_ik_controller.compute(
+                            ee_pos_b, ee_quat_b, jacobian, joint_pos_arm
+                        )
 
                     # Apply Arm Targets
                     self.robot.set_joint_position_target(
@@ -497,26 +690,40 @@ class SimulationController:
                     if aux_commands is not None and len(hand_joint_ids) > 0:
                         action[:, hand_joint_ids] = aux_commands
 
-                    # Get camera observations
-                    cam_obs = {}
-                    for cam_name in self.cameras.keys():
-                        # Find sensor object
-                        sensor = self.scene.sensors[cam_name]
-                        # Assuming "rgb" is the data type we want
-                        if "rgb" in sensor.data.output:
-                            cam_obs[cam_name] = sensor.data.output["rgb"]
-
-                    if prev_state is not None:
-                        self.dataset.step(
-                            motor_obs=prev_state,
-                            action=current_state.robot_joints,
-                            cam_obs=cam_obs,
+                    if record:
+                        # Slice the batch to the envs still recording on device, before any host transfer
+                        env_ids = self.dataset.active_env_ids
+                        # A full slice keeps views of the batches when all envs record
+                        rows = (
+                            slice(None)
+                            if len(env_ids) == self.config.num_envs
+                            else torch.tensor(env_ids, device=self.sim.device)
                         )
-                    prev_state = current_state.robot_joints
 
-                    self.scene.write_data_to_sim()
-                    self.sim.step()
-                    self.scene.update(self.sim.get_physics_dt())
+                        # Get camera observations (only of cameras with a fresh frame to record)
+                        cam_obs = self.read_cameras(self.dataset.cameras_due(), rows)
+
+                        if has_prev_state:
+                            self.dataset.step(
+                                motor_obs=prev_state[rows],
+                                action=current_state.robot_joints[rows],
+                                cam_obs=cam_obs,
+                                env_ids=env_ids,
+                                # The state the cameras of this frame are (or would be) rendered at
+                                sim_state=self.state_buffer.data[rows] if self.config.state_only else None,
+                            )
+                        prev_state.copy_(current_state.robot_joints)
+                        has_prev_state = True
+
+                    # Hold the targets for `control_decimation` physics steps. Only render on the last one
+                    # if the next control step is recorded and an env still recording needs a camera frame.
+                    # Isaac Lab cameras render all envs together, so finished envs can't be paused one by one.
+                    render = (step + 1) % record_every == 0 and bool(self.dataset.cameras_due())
+                    for substep in range(self.config.control_decimation):
+                        self.scene.write_data_to_sim()
+                        self.step_sim(
+                            render=render and substep == self.config.control_decimation - 1
+                        )
 
                     # Check success
                     is_success, keys = self.config.is_success(
@@ -527,14 +734,61 @@ class SimulationController:
                         torch.arange(self.config.num_envs)[is_success]  # type: ignore
                     )
 
+                    # Abort hopeless episodes early: their buffered frames are dropped and they are retried.
+                    # Successful envs were just finished, and rerecord skips envs that aren't recording.
+                    is_failure = self.config.is_failure(start_state, self.get_state())
+                    if is_failure is not None:
+                        if isinstance(is_failure, torch.Tensor):
+                            is_failure = is_failure.cpu().numpy()
+                        self.dataset.rerecord(
+                            [int(env_idx) for env_idx in np.flatnonzero(np.asarray(is_failure))]
+                        )
+
                     if not self.dataset.active_episodes:
                         break
 
+                # Envs that used up their step budget are retried in the next story
                 self.dataset.rerecord(list(self.dataset.active_episodes.keys()))
 
+                if on_story_end is not None:
+                    num_episodes = on_story_end(self.dataset.dataset.num_episodes)
+                    if num_episodes is not None:
+                        self.config.num_episodes = num_episodes
+
+        # Written once, instead of rewriting info.json after every story
+        settle_summary = self.settle_summary()
+        if settle_summary is not None:
+            self.dataset.save_metadata("settle_steps", settle_summary)
+
         # doesn't exit the simulation app. have to close it manually using ctrl+c
         # self._close()
 
+    def replay_dataset(self, source_root: str, episodes: list[int] | None = None) -> list[int]:
+        """
+        Render the cameras of a dataset recorded with `state_only` and record them, with its states and actions,
+        in a new dataset at `dataset_path` (see `dataset_builder.replay`). The config is the one of the recorded
+        dataset (without `state_only`), whose fingerprint is saved in its info.json.
+
+        Args:
+            source_root: Root of the state-only dataset.
+            episodes: Episodes to replay. Defaults to all of them.
+
+        Returns:
+            Source episode index of each recorded episode.
+        """
+        if self.config.state_only:
+            raise ValueError("Replay with the config of the dataset with cameras (`state_only = False`).")
+        if Path(self.config.dataset_path).resolve() == Path(source_root).resolve():
+            raise ValueError(f"The replayed dataset can't be recorded over its source ({source_root}).")
+        rec_cfg = self._dataset_record_config(record_sim_state=True)
+        return replay_cameras(
+            source_root,
+            rec_cfg,
+            SimReplayRenderer(self),
+            episodes=episodes,
+            metadata={FINGERPRINT_KEY: self.config.fingerprint()},
+        )
+
     def evaluate():
         pass
 
@@ -545,3 +799,35 @@ class SimulationController:
         if self.simulation_app and self.simulation_app.is_running():
             self.simulation_app.close()
         print("Simulation closed.")
+
+
+class SimReplayRenderer:
+    """
+    `ReplayRenderer` of the scene of a `SimulationController`: logged sim states are written into the scene and
+    rendered, without stepping the physics.
+    """
+
+    def __init__(self, controller: SimulationController):
+        self.controller = controller
+        self.num_envs = controller.config.num_envs
+
+    def render(self, sim_state: torch.Tensor, env_ids: list[int], cameras: list[str]) -> dict[str, torch.Tensor]:
+        controller = self.controller
+        state = controller.state_buffer.views(sim_state.to(controller.sim.device))
+        env_origins = controller.scene.env_origins
+
+        def root_pose(pose: torch.Tensor) -> torch.Tensor:
+            return torch.cat((pose[:, :3] + env_origins, pose[:, 3:]), dim=-1)
+
+        robot = controller.robot
+        robot.write_root_pose_to_sim(root_pose(state.robot_pose))
+        robot.write_joint_state_to_sim(state.robot_joints, torch.zeros_like(state.robot_joints))
+        for name, obj in controller.objects.items():
+            obj.write_root_pose_to_sim(root_pose(state.objs_pose[name]))
+
+        # Propagate the written states to the renderer, then refresh the camera buffers
+        controller.sim.forward()
+        controller.sim.render()
+        controller.scene.update(controller.sim.get_physics_dt())
+        controller._sim_version += 1
+        return controller.read_cameras(cameras, slice(None))
@@ -0,0 +1,82 @@
+# Copyright 2026 Nimit Shah. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import json
+
+from domin.autotune import (
+    Autotuner,
+    Calibration,
+    TuneCandidate,
+    load_overlay,
+    synthetic_workload,
+    write_overlay,
+)
+
+
+def model_workload(candidate: TuneCandidate) -> Calibration:
+    """Throughput grows with num_envs until 16 envs, the writer saves 100 images/s per thread."""
+    sim_frames_per_s = 100 * min(candidate.num_envs, 16)
+    writer_images_per_s = 100 * candidate.num_image_writer_threads_per_camera * (
+        1 + candidate.num_image_writer_processes
+    )
+    frames_per_s = min(sim_frames_per_s, writer_images_per_s)
+    return Calibration(
+        candidate,
+        frames_per_s=frames_per_s,
+        max_queue_size=max(0, sim_frames_per_s - writer_images_per_s) * 10,
+        peak_memory_bytes=candidate.num_envs * 2**20,
+    )
+
+
+def test_search_stops_at_saturation():
+    calls = []
+
+    def workload(candidate):
+        calls.append(candidate)
+        return model_workload(candidate)
+
+    tuner = Autotuner(workload, num_envs_options=[4, 8, 16, 32, 64], writer_options=[(0, 4), (0, 8), (1, 8)])
+    result = tuner.run()
+    # 16 envs need 16 writer threads to keep up; more envs don't help
+    assert result.best == TuneCandidate(16, 1, 8)
+    assert max(c.num_envs for c in calls) == 32
+    # Candidates with a growing backlog are never chosen
+    assert tuner.rejection(model_workload(TuneCandidate(16, 0, 4))) is not None
+
+
+def test_search_respects_memory_limit():
+    tuner = Autotuner(
+        model_workload,
+        num_envs_options=[4, 8, 16, 32],
+        writer_options=[(1, 8)],
+        memory_limit_bytes=10 * 2**20,
+    )
+    result = tuner.run()
+    assert result.best == TuneCandidate(8, 1, 8)
+    assert max(c.candidate.num_envs for c in result.calibrations) == 16
+
+
+def test_synthetic_workload_and_overlay(tmp_path):
+    workload = synthetic_workload({"cam1": (16, 12)}, num_joints=2, steps_per_story=5, step_cost_s=0)
+    tuner = Autotuner(workload, num_envs_options=[1, 2], writer_options=[(0, 1), (0, 2)], max_backlog_s=1e3)
+    result = tuner.run()
+    assert result.best is not None
+    assert all(c.error is None and c.frames_per_s > 0 for c in result.calibrations)
+    assert all(c.save_p50_s is not None for c in result.calibrations)
+
+    path = tmp_path / "overlay.json"
+    write_overlay(result.best, path, result.calibrations)
+    assert load_overlay(path) == result.best.as_overlay()
+    # The synthetic peak memory is an estimate, and recorded as one
+    calibrations = json.loads(path.read_text())["_autotune"]
+    assert all(c["peak_memory_estimated"] and c["peak_memory_bytes"] > 0 for c in calibrations)
@@ -0,0 +1,108 @@
+# Copyright 2026 Nimit Shah. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import av
+import numpy as np
+import pytest
+import torch
+
+from domin.dataset_builder import DatasetRecord, DatasetRecordConfig
+from domin.dataset_builder.camera_channels import channel_feature, decode_channel, encode_channel
+from domin.dataset_builder.streaming_dataset import StreamingLeRobotDataset
+from domin.dataset_builder.utils import load_episodes_stats
+from domin.dataset_builder.video_utils import decode_video_frames_gray16
+
+
+def test_encoding():
+    depth = np.array([[0.5, 1.2345], [np.nan, np.inf]], dtype=np.float32)[..., None]
+
+    channel = channel_feature("depth", (2, 2))["channel"]
+    encoded = encode_channel(depth, channel)
+    assert encoded.dtype == np.uint16 and encoded.shape == (2, 2)
+    np.testing.assert_allclose(decode_channel(encoded, channel), [[0.5, 1.234], [0.0, 65.535]], atol=1e-6)
+
+    channel = channel_feature("depth", (2, 2), depth_encoding="float16")["channel"]
+    decoded = decode_channel(encode_channel(depth, channel), channel)
+    np.testing.assert_allclose(decoded[0], depth[0, :, 0], rtol=1e-3)
+    assert np.isinf(decoded[1, 1])
+
+    channel = channel_feature("segmentation", (2, 2))["channel"]
+    labels = np.array([[0, 7], [300, 65535]], dtype=np.int32)
+    assert decode_channel(encode_channel(labels, channel), channel).tolist() == labels.tolist()
+    with pytest.raises(ValueError):
+        encode_channel(labels + 1, channel)
+
+
+@pytest.mark.parametrize("video", [True, False])
+def test_record_depth_and_segmentation(tmp_path, video):
+    cfg = DatasetRecordConfig(
+        repo_id="test/channels",
+        root=str(tmp_path / "dataset"),
+        num_envs=1,
+        joint_names=["joint1", "joint2"],
+        cameras={"cam1": (32, 24)},
+        camera_channels={"cam1": ["depth", "segmentation"]},
+        default_task="test task",
+        fps=10,
+        video=video,
+        robot_type="SO100",
+    )
+    depths = [torch.full((1, 24, 32, 1), 0.25 * (step + 1)) for step in range(4)]
+    labels = torch.arange(24 * 32, dtype=torch.int32).reshape(1, 24, 32, 1) * 50
+    with DatasetRecord(cfg) as recorder:
+        assert recorder.dataset.features["observation.depth.cam1"]["shape"] == (24, 32, 1)
+        recorder.new_story()
+        for step in range(4):
+            cam_obs = {
+                "cam1": torch.full((1, 24, 32, 3), 100, dtype=torch.uint8),
+                "cam1.depth": depths[step],
+                "cam1.segmentation": labels + step,
+            }
+            recorder.step(torch.randn(1, 2), torch.randn(1, 2), cam_obs)
+        recorder.finish_episodes(0)
+
+    root = tmp_path / "dataset"
+    if video:
+        with av.open(str(root / "videos/chunk-000/observation.depth.cam1/episode_000000.mp4")) as container:
+            assert container.streams.video[0].codec_context.name == "ffv1"
+    else:
+        assert (root / "images/observation.depth.cam1/episode_000000/frame_000000.png").is_file()
+
+    stats = load_episodes_stats(root)[0]
+    np.testing.assert_allclose(stats["observation.depth.cam1"]["mean"].squeeze(), 0.625, atol=1e-6)
+    assert stats["observation.segmentation.cam1"]["max"].squeeze() == labels.max() + 3
+
+    items = list(StreamingLeRobotDataset("test/channels", root=root))
+    depth = items[2]["observation.depth.cam1"]
+    assert depth.shape == (1, 24, 32) and depth.dtype == torch.float32
+    np.testing.assert_allclose(depth, 0.75, atol=1e-6)
+    segmentation = items[3]["observation.segmentation.cam1"]
+    assert segmentation.dtype == torch.int64
+    assert torch.equal(segmentation, labels[0].permute(2, 0, 1).long() + 3)
+    np.testing.assert_allclose(items[0]["observation.images.cam1"].mean() * 255, 100, atol=3)
+
+
+def test_decode_late_gray16_frames(tmp_path):
+    video_path = tmp_path / "depth.mp4"
+    with av.open(str(video_path), "w") as container:
+        stream = container.add_stream("ffv1", rate=10)
+        stream.width, stream.height, stream.pix_fmt = 32, 24, "gray16le"
+        for step in range(40):
+            frame = av.VideoFrame.from_ndarray(np.full((24, 32), 1000 * step, dtype=np.uint16), format="gray16le")
+            container.mux(stream.encode(frame))
+        container.mux(stream.encode())
+
+    # Decoding starts at the first requested frame (FFV1 frames are all key frames), not at the start
+    frames = decode_video_frames_gray16(video_path, [3.6, 3.2, 3.9], tolerance_s=1e-3)
+    assert frames.shape == (3, 1, 24, 32) and frames.dtype == torch.int32
+    assert frames[:, 0, 0, 0].tolist() == [36000, 32000, 39000]
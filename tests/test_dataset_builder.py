@@ -17,6 +17,7 @@ import sys
 from pathlib import Path
 
 import numpy as np
+import pytest
 import torch
 
 from domin.dataset_builder import DatasetRecord, DatasetRecordConfig
@@ -134,5 +135,258 @@ def test_simultaneous_recording():
     print("Verification passed!")
 
 
+def test_stream_to_online_buffer(tmp_path):
+    from domin.dataset_builder.online_buffer import OnlineBuffer
+
+    cfg = DatasetRecordConfig(
+        repo_id="test/stream",
+        root=str(tmp_path / "dataset"),
+        num_envs=2,
+        joint_names=["joint1", "joint2"],
+        cameras={"cam1": (64, 48)},
+        default_task="test task",
+        fps=10,
+        video=False,
+        robot_type="SO100",
+        online_buffer_dir=str(tmp_path / "online"),
+        online_buffer_capacity=100,
+        online_buffer_image_size=(16, 12),
+    )
+
+    with DatasetRecord(cfg) as recorder:
+        reader = OnlineBuffer(cfg.online_buffer_dir, recorder._online_buffer_spec(), 100, fps=cfg.fps)
+        recorder.new_story()
+        for _ in range(3):
+            cam_obs = {"cam1": torch.full((2, 48, 64, 3), 200, dtype=torch.uint8)}
+            recorder.step(torch.randn(2, 2), torch.randn(2, 2), cam_obs)
+
+        # Rerecorded episodes never reach the buffer.
+        recorder.rerecord(0)
+        recorder.finish_episodes(1)
+        assert reader.refresh()
+        assert reader.num_episodes == 1
+        assert reader.num_frames == 3
+
+        item = reader[2]
+        assert item["observation.images.cam1"].shape == (12, 16, 3)
+        assert (item["observation.images.cam1"] == 200).all()
+        assert item["frame_index"].item() == 2
+
+
+def test_rate_decoupled_camera(tmp_path):
+    import av
+
+    from domin.dataset_builder.utils import get_nearest_camera_frames, load_episodes
+
+    cfg = DatasetRecordConfig(
+        repo_id="test/camera_fps",
+        root=str(tmp_path / "dataset"),
+        num_envs=1,
+        joint_names=["joint1", "joint2"],
+        cameras={"slow": (32, 24), "fast": (32, 24)},
+        camera_fps={"slow": 10},
+        default_task="test task",
+        fps=30,
+        video=True,
+        robot_type="SO100",
+    )
+
+    due = []
+    with DatasetRecord(cfg) as recorder:
+        recorder.new_story()
+        for step in range(7):
+            due.append(recorder.cameras_due())
+            cam_obs = {
+                cam: torch.full((1, 24, 32, 3), 10 * step, dtype=torch.uint8) for cam in due[-1]
+            }
+            recorder.step(torch.randn(1, 2), torch.randn(1, 2), cam_obs)
+        recorder.finish_episodes(0)
+
+    assert [("slow" in cams) for cams in due] == [True, False, False, True, False, False, True]
+    assert all("fast" in cams for cams in due)
+
+    root = Path(cfg.root)
+    slow_images = root / "images/observation.images.slow/episode_000000"
+    assert sorted(p.name for p in slow_images.iterdir()) == [
+        "frame_000000.png",
+        "frame_000003.png",
+        "frame_000006.png",
+    ]
+    with av.open(str(root / "videos/chunk-000/observation.images.slow/episode_000000.mp4")) as container:
+        assert sum(1 for _ in container.decode(video=0)) == 3
+
+    episode = load_episodes(root)[0]
+    np.testing.assert_allclose(episode["camera_timestamps"]["observation.images.slow"], [0.0, 0.1, 0.2])
+    assert "observation.images.fast" not in episode["camera_timestamps"]
+
+    state_ts = np.arange(7) / cfg.fps
+    frames = get_nearest_camera_frames(episode["camera_timestamps"]["observation.images.slow"], state_ts)
+    assert frames.tolist() == [0, 0, 1, 1, 1, 2, 2]
+
+
+def test_step_active_env_rows(tmp_path):
+    cfg = DatasetRecordConfig(
+        repo_id="test/active_envs",
+        root=str(tmp_path / "dataset"),
+        num_envs=3,
+        joint_names=["joint1", "joint2"],
+        cameras={"cam1": (16, 12)},
+        default_task="test task",
+        fps=10,
+        video=False,
+        robot_type="SO100",
+    )
+
+    def batch(env_ids):
+        state = torch.tensor(env_ids, dtype=torch.float32)[:, None].repeat(1, 2)
+        frames = torch.tensor(env_ids, dtype=torch.uint8)[:, None, None, None].repeat(1, 12, 16, 3)
+        return state, state.clone(), {"cam1": frames}
+
+    with DatasetRecord(cfg) as recorder:
+        recorder.new_story()
+        recorder.step(*batch([0, 1, 2]))
+        recorder.rerecord(1)
+        assert recorder.active_env_ids == [0, 2]
+
+        # Only the rows of active envs are passed...
+        recorder.step(*batch([0, 2]), env_ids=[0, 2])
+        # ...or the full batch, from which inactive rows are dropped.
+        recorder.step(*batch([0, 1, 2]))
+
+        buffers = recorder.dataset.episode_buffers
+        assert 1 not in buffers
+        for env_idx in [0, 2]:
+            episode_index = recorder.active_episodes[env_idx]
+            assert buffers[episode_index]["size"] == 3
+            assert all(state[0] == env_idx for state in buffers[episode_index]["observation.state"])
+
+        with pytest.raises(ValueError):
+            recorder.step(*batch([0, 2]), env_ids=[0])
+
+
+def test_episode_limit(tmp_path):
+    cfg = DatasetRecordConfig(
+        repo_id="test/episode_limit",
+        root=str(tmp_path / "dataset"),
+        num_envs=3,
+        joint_names=["joint1", "joint2"],
+        default_task="test task",
+        fps=10,
+        video=False,
+        robot_type="SO100",
+    )
+    with DatasetRecord(cfg) as recorder:
+        recorder.new_story(episode_limit=4)
+        assert recorder.active_episodes == {0: 0, 1: 1, 2: 2}
+        recorder.step(torch.randn(3, 2), torch.randn(3, 2))
+        recorder.finish_episodes([0, 2])
+        recorder.rerecord(1)
+
+        # Only the rerecord and one new episode fit below the limit, env 2 stays idle
+        recorder.new_story(episode_limit=4)
+        assert recorder.active_episodes == {0: 3, 1: 1}
+        recorder.step(torch.randn(3, 2), torch.randn(3, 2))
+        recorder.finish_episodes([0, 1])
+
+        recorder.new_story(episode_limit=4)
+        assert recorder.active_episodes == {}
+        # An empty slice of episodes (e.g. an empty replay) records nothing either
+        recorder.new_story(episode_indices=[])
+        assert recorder.active_episodes == {} and recorder.episode_counter == 4
+
+    assert recorder.dataset.meta.total_episodes == 4
+
+
+def test_episode_buffer_lifecycle(tmp_path):
+    import pyarrow.parquet as pq
+
+    from domin.dataset_builder.episode_buffer import SpilledColumn
+
+    cfg = DatasetRecordConfig(
+        repo_id="test/buffers",
+        root=str(tmp_path / "dataset"),
+        num_envs=3,
+        joint_names=["joint1", "joint2"],
+        default_task="test task",
+        fps=10,
+        video=False,
+        robot_type="SO100",
+        max_buffer_bytes=8000,
+        buffer_spill_dir=str(tmp_path / "spill"),
+    )
+    with DatasetRecord(cfg) as recorder:
+        dataset = recorder.dataset
+        recorder.new_story()
+        for step in range(20):
+            state = torch.arange(3, dtype=torch.float32)[:, None].repeat(1, 2) + 10 * step
+            recorder.step(state, state.clone())
+
+        # The oldest buffers were spilled to keep the in-memory total under the cap
+        assert dataset.buffered_bytes <= cfg.max_buffer_bytes
+        assert isinstance(dataset.episode_buffers[0]["observation.state"], SpilledColumn)
+        assert not isinstance(dataset.episode_buffers[2]["observation.state"], SpilledColumn)
+        assert recorder.telemetry.counters["episode_buffers.spills"] >= 1
+        assert any((tmp_path / "spill").iterdir())
+
+        recorder.rerecord(2)
+        recorder.finish_episodes([0, 1])
+        # Saved and rerecorded episodes don't keep their buffers (nor spill files) around
+        assert dataset.episode_buffers == {}
+        assert dataset.buffered_bytes == 0
+        assert recorder.telemetry.gauges["episode_buffers.bytes"] == 0
+        assert not any((tmp_path / "spill").iterdir())
+
+    for episode_index in [0, 1]:
+        table = pq.read_table(tmp_path / f"dataset/data/chunk-000/episode_{episode_index:06d}.parquet")
+        states = np.array(table["observation.state"].to_pylist())
+        np.testing.assert_array_equal(states[:, 0], episode_index + 10 * np.arange(20))
+        assert table["frame_index"].to_pylist() == list(range(20))
+
+
+def test_per_env_tasks(tmp_path):
+    import pyarrow.parquet as pq
+
+    from domin.dataset_builder.utils import load_episodes, load_tasks
+
+    cfg = DatasetRecordConfig(
+        repo_id="test/tasks",
+        root=str(tmp_path / "dataset"),
+        num_envs=3,
+        joint_names=["joint1", "joint2"],
+        default_task="default task",
+        fps=10,
+        video=False,
+        robot_type="SO100",
+    )
+    with DatasetRecord(cfg) as recorder:
+        recorder.new_story(tasks=["pick cube", None])
+        assert recorder.current_task_ids == [0, 1, 1]
+        for step in range(4):
+            if step == 2:
+                # Tasks can change mid-episode, e.g. for a follow-up subtask
+                recorder.set_tasks(["place cube", "pick cube", None])
+            state = torch.randn(3, 2)
+            recorder.step(state, state.clone())
+
+        # One task_index per run of frames, not a string per frame
+        assert recorder.dataset.episode_buffers[0]["task_segments"] == [[0, 0], [2, 2]]
+        assert recorder.dataset.episode_buffers[2]["task_segments"] == [[0, 1]]
+        recorder.finish_episodes([0, 1, 2])
+
+    root = Path(cfg.root)
+    tasks, _ = load_tasks(root)
+    assert tasks == {0: "pick cube", 1: "default task", 2: "place cube"}
+    task_index = {
+        episode_index: pq.read_table(root / f"data/chunk-000/episode_{episode_index:06d}.parquet")[
+            "task_index"
+        ].to_pylist()
+        for episode_index in range(3)
+    }
+    assert task_index == {0: [0, 0, 2, 2], 1: [1, 1, 0, 0], 2: [1, 1, 1, 1]}
+    episodes = load_episodes(root)
+    assert episodes[0]["tasks"] == ["pick cube", "place cube"]
+    assert episodes[2]["tasks"] == ["default task"]
+
+
 if __name__ == "__main__":
     test_simultaneous_recording()
@@ -0,0 +1,134 @@
+# Copyright 2026 Nimit Shah. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import os
+import subprocess
+import sys
+
+import pytest
+
+from domin.dry_run import dry_run
+
+CONFIG = '''
+from dataclasses import dataclass, field
+
+import isaaclab.sim as sim_utils
+from isaaclab.assets import ArticulationCfg
+from isaaclab.scene import InteractiveSceneCfg
+from isaaclab.sensors import CameraCfg
+from isaaclab.utils import configclass
+from isaaclab_assets.robots import KUKA_ALLEGRO_CFG
+
+from domin.base_dataset_config import BaseDatasetConfig
+
+
+@configclass
+class SceneCfg(InteractiveSceneCfg):
+    env_spacing: float = 3.0
+    robot: ArticulationCfg = KUKA_ALLEGRO_CFG.replace(prim_path="{ENV_REGEX_NS}/Robot")
+    camera_front = CameraCfg(
+        prim_path="{ENV_REGEX_NS}/Camera_Front",
+        update_period=0.1,
+        height=HEIGHT,
+        width=64,
+        data_types=["rgb"],
+        spawn=sim_utils.PinholeCameraCfg(focal_length=24.0),
+    )
+    camera_wrist = CameraCfg(prim_path="{ENV_REGEX_NS}/Camera_Wrist", height=32, width=32, data_types=["rgb"])
+
+
+@dataclass
+class TestConfig(BaseDatasetConfig):
+    default_task: str = "pick up the cube"
+    scene_cfg: SceneCfg = field(init=False)
+    robot_cfg: ArticulationCfg = field(default_factory=lambda: KUKA_ALLEGRO_CFG)
+    arm_joint_names: str = ARM_JOINTS
+    hand_joint_names: str = "finger_.*"
+    fps: int = 30
+    physics_dt: float = 1 / 120
+    episode_time_s: float = 10.0
+
+    def __post_init__(self):
+        self.scene_cfg = SceneCfg(num_envs=self.num_envs)
+        super().__post_init__()
+
+    def get_targets(self, start):
+        pass
+
+    def is_success(self, start, end):
+        pass
+'''
+
+
+def write_config(tmp_path, height=48, arm_joints="arm_.*"):
+    path = tmp_path / "test_config.py"
+    path.write_text(CONFIG.replace("HEIGHT", str(height)).replace("ARM_JOINTS", repr(arm_joints)))
+    return str(path)
+
+
+def test_dry_run_estimates(tmp_path):
+    report = dry_run(write_config(tmp_path), {"num_envs": 4, "num_episodes": 10, "dataset_path": str(tmp_path)})
+    assert report.ok, report.errors
+    assert report.config_name == "TestConfig"
+    # The front camera updates every 0.1 s, the wrist camera at every recorded frame
+    assert report.cameras == {"camera_front": (64, 48, 10), "camera_wrist": (32, 32, 30)}
+
+    estimates = report.estimates
+    assert estimates["max_frames"] == 10 * 300
+    assert estimates["max_physics_steps"] == 10 * 300 * 4
+    assert estimates["raw_image_bytes"] == 10 * (100 * 64 * 48 * 3 + 300 * 32 * 32 * 3)
+    assert estimates["camera_batch_bytes"] == 4 * (64 * 48 * 3 + 32 * 32 * 3)
+    assert estimates["encoded_image_bytes"] < estimates["disk_bytes"] < estimates["raw_image_bytes"]
+    assert "max_frames: 3,000" in report.format()
+
+    # Placeholders don't leak out of the dry run
+    assert "isaaclab" not in sys.modules
+    assert "test_config" not in sys.modules
+
+
+@pytest.mark.parametrize(
+    "kwargs, config_kwargs, error",
+    [
+        ({"height": 47}, {}, "must be even"),
+        ({"arm_joints": "arm_(.*"}, {}, "not a valid regex"),
+        ({}, {"camera_fps": {"camera_back": 5}}, "unknown camera 'camera_back'"),
+        ({}, {"fps": 7}, "Could not load the config"),
+    ],
+)
+def test_dry_run_errors(tmp_path, kwargs, config_kwargs, error):
+    report = dry_run(write_config(tmp_path, **kwargs), {"dataset_path": str(tmp_path), **config_kwargs})
+    assert not report.ok
+    assert any(error in e for e in report.errors), report.errors
+
+
+def test_dry_run_cli_skips_isaac_lab(tmp_path):
+    # An installed Isaac Lab whose app bootstrap must not run during a dry run
+    package = tmp_path / "site" / "isaaclab"
+    package.mkdir(parents=True)
+    (package / "__init__.py").write_text("")
+    (package / "app.py").write_text("raise RuntimeError('Isaac Sim was launched')")
+
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join([str(tmp_path / "site"), os.environ.get("PYTHONPATH", "")])}
+    cmd = [
+        sys.executable,
+        "-m",
+        "domin.generate_dataset",
+        write_config(tmp_path),
+        "--dry_run",
+        "--num_episodes",
+        "10",
+        "--headless",
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True, env=env, cwd=tmp_path)
+    assert result.returncode == 0, result.stderr
+    assert "max_frames" in result.stdout
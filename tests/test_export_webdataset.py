@@ -0,0 +1,87 @@
+# Copyright 2026 Nimit Shah. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import io
+import json
+import tarfile
+
+import pyarrow.parquet as pq
+import torch
+
+from domin.dataset_builder import DatasetRecord, DatasetRecordConfig
+from domin.dataset_builder.export_webdataset import export_webdataset
+
+
+def read_shard(path):
+    with tarfile.open(path) as tar:
+        return {member.name: tar.extractfile(member).read() for member in tar.getmembers()}
+
+
+def test_export_webdataset(tmp_path):
+    cfg = DatasetRecordConfig(
+        repo_id="test/webdataset",
+        root=str(tmp_path / "dataset"),
+        num_envs=2,
+        joint_names=["joint1", "joint2"],
+        cameras={"cam1": (32, 24)},
+        default_task="test task",
+        fps=10,
+        video=True,
+        robot_type="SO100",
+        webdataset_dir=str(tmp_path / "sink"),
+        webdataset_shard_bytes=1,
+        webdataset_num_workers=1,
+    )
+    with DatasetRecord(cfg) as recorder:
+        meta = recorder.dataset.meta
+        for story in range(2):
+            recorder.new_story()
+            for _ in range(4 + story):
+                cam_obs = {"cam1": torch.randint(0, 255, (2, 24, 32, 3), dtype=torch.uint8)}
+                recorder.step(torch.randn(2, 2), torch.randn(2, 2), cam_obs)
+            recorder.finish_episodes([0, 1])
+
+    # Every episode is bigger than the shard size, so each got its own shard
+    index = json.loads((tmp_path / "sink/index.json").read_text())
+    assert index["total_episodes"] == 4
+    assert index["total_frames"] == 18
+    assert [shard["episodes"] for shard in index["shards"]] == [[0], [1], [2], [3]]
+
+    members = read_shard(tmp_path / "sink" / index["shards"][2]["name"])
+    assert sorted(members) == [
+        "episode_000002.json",
+        "episode_000002.observation.images.cam1.mp4",
+        "episode_000002.parquet",
+    ]
+    table = pq.read_table(io.BytesIO(members["episode_000002.parquet"]))
+    assert table["episode_index"].to_pylist() == [2] * 5
+    metadata = json.loads(members["episode_000002.json"])
+    assert metadata["length"] == 5
+    assert metadata["tasks"] == ["test task"]
+    assert metadata["fps"] == 10
+    assert len(metadata["stats"]["observation.state"]["mean"]) == 2
+
+    # A batch export of the same dataset packs several episodes per shard
+    index = export_webdataset(meta, tmp_path / "batch", max_shard_bytes=100_000, num_workers=2)
+    assert sorted(ep_idx for shard in index["shards"] for ep_idx in shard["episodes"]) == [0, 1, 2, 3]
+    assert all(shard["num_bytes"] == (tmp_path / "batch" / shard["name"]).stat().st_size for shard in index["shards"])
+    batch_members = {}
+    for shard in index["shards"]:
+        batch_members.update(read_shard(tmp_path / "batch" / shard["name"]))
+    assert batch_members["episode_000002.parquet"] == members["episode_000002.parquet"]
+
+    # Exports are incremental
+    num_shards = len(index["shards"])
+    index = export_webdataset(meta, tmp_path / "batch", max_shard_bytes=100_000)
+    assert len(index["shards"]) == num_shards
+    assert index["total_episodes"] == 4
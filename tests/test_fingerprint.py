@@ -0,0 +1,161 @@
+# Copyright 2026 Nimit Shah. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import json
+from dataclasses import dataclass, field
+
+import numpy as np
+import pytest
+import torch
+
+from domin.dataset_builder import DatasetRecord, DatasetRecordConfig
+from domin.dataset_builder.utils import load_episodes
+from domin.fingerprint import FINGERPRINT_KEY, canonical, check_fingerprint, config_fingerprint
+
+
+@dataclass
+class ObjectCfg:
+    pos_range: np.ndarray
+    spawn: object = None
+    tags: set = field(default_factory=set)
+
+
+def test_config_fingerprint():
+    def values(pos_range, spawn=np.zeros):
+        return {
+            "task": "pick cube",
+            "fps": 30,
+            "object": ObjectCfg(np.array(pos_range), spawn=spawn, tags={"b", "a"}),
+            "range": torch.tensor([0.1, 0.2]),
+        }
+
+    fingerprint = config_fingerprint(values([0.0, 0.5]))
+    assert fingerprint == config_fingerprint(values([0.0, 0.5]))
+    assert len(fingerprint) == 16
+    # Randomization ranges and functions are part of the fingerprint
+    assert fingerprint != config_fingerprint(values([0.0, 0.6]))
+    assert fingerprint != config_fingerprint(values([0.0, 0.5], spawn=np.ones))
+
+    assert canonical(values([0.0, 0.5])["object"]) == {
+        "__type__": f"{__name__}.ObjectCfg",
+        "pos_range": [0.0, 0.5],
+        "spawn": "numpy.zeros",
+        "tags": ["a", "b"],
+    }
+
+
+def record(root, num_episodes, fingerprint, resume=False):
+    cfg = DatasetRecordConfig(
+        repo_id="test/top_up",
+        root=str(root),
+        num_envs=1,
+        joint_names=["joint1", "joint2"],
+        default_task="test task",
+        fps=10,
+        video=False,
+        robot_type="SO100",
+        num_episodes=num_episodes,
+        resume_recording=resume,
+    )
+    with DatasetRecord(cfg) as recorder:
+        recorder.save_metadata(FINGERPRINT_KEY, fingerprint)
+        while recorder.dataset.num_episodes < num_episodes:
+            # Every episode is rerecorded once
+            for attempt in range(2):
+                recorder.new_story()
+                for step in range(3):
+                    state = torch.full((1, 2), float(recorder.dataset.num_episodes + step))
+                    recorder.step(state, state.clone())
+                if attempt == 0:
+                    recorder.rerecord(0)
+            recorder.finish_episodes(0)
+    return recorder
+
+
+def test_top_up(tmp_path):
+    root = tmp_path / "dataset"
+    assert check_fingerprint(root, "a" * 16) == 0
+
+    record(root, 2, "a" * 16)
+    with pytest.raises(ValueError, match="another config"):
+        check_fingerprint(root, "b" * 16)
+    existing = check_fingerprint(root, "a" * 16)
+    assert existing == 2
+
+    # Only the missing episodes are recorded, after the existing ones
+    recorder = record(root, 4, "a" * 16, resume=existing > 0)
+    assert recorder.dataset.meta.total_episodes == 4
+    episodes = load_episodes(root)
+    assert sorted(episodes) == [0, 1, 2, 3]
+    assert sorted(p.name for p in (root / "data/chunk-000").iterdir()) == [
+        f"episode_{i:06d}.parquet" for i in range(4)
+    ]
+
+    info = json.loads((root / "meta/info.json").read_text())
+    assert info["total_frames"] == 12
+    assert info["total_rerecords"] == 4
+    assert info[FINGERPRINT_KEY] == "a" * 16
+    # Stats aggregate the episodes of both runs
+    stats = recorder.dataset.meta.stats["observation.state"]
+    np.testing.assert_array_equal(stats["min"], [0.0, 0.0])
+    np.testing.assert_array_equal(stats["max"], [5.0, 5.0])
+
+
+@dataclass
+class SceneCfg:
+    num_envs: int
+    env_spacing: float = 2.5
+    lazy_sensor_update: bool = True
+    replicate_physics: bool = True
+    cube_size: float = 0.05
+    robot: object = None
+
+
+def test_dataset_config_fingerprint(tmp_path):
+    from domin.dry_run import lazy_isaac_imports
+
+    # BaseDatasetConfig imports Isaac Lab, which only exists as placeholders here
+    with lazy_isaac_imports():
+        from domin.base_dataset_config import BaseDatasetConfig
+
+    @dataclass
+    class Config(BaseDatasetConfig):
+        default_task: str = "pick up the cube"
+        scene_cfg: SceneCfg = field(init=False)
+        robot_cfg: object = None
+        cube_size: float = 0.05
+        target: str = "object_cube"
+        # Per-env state, sized by num_envs
+        _timers: torch.Tensor = field(init=False)
+
+        def __post_init__(self):
+            self.scene_cfg = SceneCfg(self.num_envs, env_spacing=2.5 * self.num_envs, cube_size=self.cube_size)
+            self.robot_cfg = SceneCfg(0)
+            self.robot_cfg.replace = lambda **kwargs: None
+            super().__post_init__()
+            self._timers = torch.zeros(self.num_envs)
+
+        def get_targets(self, start):
+            pass
+
+        def is_success(self, start, end):
+            pass
+
+    config = Config(num_envs=1)
+    # Env counts, layout and performance knobs don't change the dataset, so the default dataset_path is shared
+    assert config.fingerprint() == Config(num_envs=64, num_image_writer_processes=4).fingerprint()
+    assert config.dataset_path == Config(num_envs=64).dataset_path
+    # The contents of the scene, the base fields and the fields of the subclass do
+    assert config.fingerprint() != Config(num_envs=1, episode_time_s=30.0).fingerprint()
+    assert config.fingerprint() != Config(num_envs=1, cube_size=0.06).fingerprint()
+    assert config.fingerprint() != Config(num_envs=1, target="object_sphere").fingerprint()
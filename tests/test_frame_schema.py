@@ -0,0 +1,86 @@
+# Copyright 2026 Nimit Shah. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import numpy as np
+import pytest
+import torch
+
+from domin.dataset_builder import DatasetRecord, DatasetRecordConfig
+from domin.dataset_builder.frame_schema import FrameSchema
+
+FEATURES = {
+    "observation.state": {"dtype": "float32", "shape": (2,), "names": ["a", "b"]},
+    "observation.images.front": {"dtype": "video", "shape": (12, 16, 3), "names": ["height", "width", "channels"]},
+    "observation.images.slow": {"dtype": "video", "shape": (12, 16, 3), "names": None, "fps": 5},
+    "frame_index": {"dtype": "int64", "shape": (1,), "names": None},
+}
+
+
+def test_validate_frame():
+    schema = FrameSchema(FEATURES)
+    frame = {"observation.state": np.zeros(2, dtype=np.float32), "observation.images.front": np.zeros((3, 12, 16))}
+    schema.validate_frame(frame)
+    schema.validate_frame({**frame, "observation.images.slow": np.zeros((12, 16, 3)), "task": "task"})
+
+    with pytest.raises(ValueError, match="dtype"):
+        schema.validate_frame({**frame, "observation.state": np.zeros(2)})
+    with pytest.raises(ValueError, match="Missing features"):
+        schema.validate_frame({"observation.state": frame["observation.state"]})
+    with pytest.raises(ValueError, match="Extra features"):
+        schema.validate_frame({**frame, "observation.images.back": frame["observation.images.front"]})
+    # Accepted by the legacy `validate_frame`, which reads the (h, w, c) feature shape as (c, h, w)
+    with pytest.raises(ValueError, match="observation.images.front"):
+        schema.validate_frame({**frame, "observation.images.front": np.zeros((16, 3, 12))})
+
+
+def test_validate_batch():
+    schema = FrameSchema(FEATURES)
+    batch = {"observation.state": np.zeros((4, 2), dtype=np.float32), "observation.images.front": np.zeros((4, 12, 16, 3))}
+    schema.validate_batch(batch)
+    # Rate-decoupled cameras only hold the rows they are due in
+    schema.validate_batch({**batch, "observation.images.slow": np.zeros((1, 12, 16, 3))})
+
+    with pytest.raises(ValueError, match="observation.state"):
+        schema.validate_batch({**batch, "observation.state": np.zeros((4, 3), dtype=np.float32)})
+    with pytest.raises(ValueError, match="observation.images.front"):
+        schema.validate_batch({**batch, "observation.images.front": np.zeros((4, 16, 12, 3))})
+    with pytest.raises(ValueError, match="Missing"):
+        schema.validate_batch({"observation.state": batch["observation.state"]})
+
+
+def test_sampled_validation(tmp_path):
+    cfg = DatasetRecordConfig(
+        repo_id="test/schema",
+        root=str(tmp_path / "dataset"),
+        num_envs=2,
+        joint_names=["joint1", "joint2"],
+        cameras={"cam1": (16, 12)},
+        default_task="test task",
+        fps=10,
+        video=False,
+        robot_type="SO100",
+        validate_every=3,
+    )
+    schema = FrameSchema(FEATURES, validate_every=3)
+    assert [schema.sample() for _ in range(7)] == [True, False, False, True, False, False, True]
+
+    with DatasetRecord(cfg) as recorder:
+        recorder.new_story()
+        frames = {"cam1": torch.zeros((2, 12, 16, 3), dtype=torch.uint8)}
+        with pytest.raises(ValueError, match="observation.images.cam1"):
+            recorder.step(torch.randn(2, 2), torch.randn(2, 2), {"cam1": torch.zeros((2, 16, 12, 3))})
+        # Float64 inputs are recorded as float32
+        recorder.step(torch.randn(2, 2, dtype=torch.float64), torch.randn(2, 2), frames)
+        recorder.step(torch.randn(2, 2), torch.randn(2, 2), frames)
+        assert recorder.frame_schema.num_batches == 3
+        assert recorder.dataset.episode_buffers[0]["observation.state"][0].dtype == np.float32
@@ -0,0 +1,109 @@
+# Copyright 2026 Nimit Shah. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import os
+
+import numpy as np
+import pyarrow.parquet as pq
+import pytest
+import torch
+
+from domin.dataset_builder import DatasetRecord, DatasetRecordConfig
+from domin.dataset_builder.merge_datasets import merge_datasets
+from domin.dataset_builder.utils import load_episodes, load_info, load_stats, load_tasks
+from domin.dataset_builder.video_utils import VIDEO_ENCODING_KEY
+from domin.fingerprint import FINGERPRINT_KEY
+
+
+def record_shard(root, tasks, num_stories, episode_offset, fingerprint="0123456789abcdef", crf=30):
+    cfg = DatasetRecordConfig(
+        repo_id="test/shard",
+        root=str(root),
+        num_envs=2,
+        joint_names=["joint1", "joint2"],
+        cameras={"cam1": (32, 24)},
+        default_task=tasks[0],
+        fps=10,
+        video=True,
+        robot_type="SO100",
+        video_encoding={"vcodec": "libsvtav1", "crf": crf},
+    )
+    with DatasetRecord(cfg) as recorder:
+        recorder.save_metadata(FINGERPRINT_KEY, fingerprint)
+        for story in range(num_stories):
+            recorder.new_story(tasks=tasks)
+            for step in range(3 + story):
+                state = torch.full((2, 2), float(episode_offset + step))
+                cam_obs = {"cam1": torch.full((2, 24, 32, 3), 10 * step, dtype=torch.uint8)}
+                recorder.step(state, state.clone(), cam_obs)
+            recorder.finish_episodes([0, 1])
+        recorder.save_metadata("episode_offset", episode_offset)
+    return cfg
+
+
+def test_merge_shards(tmp_path):
+    # Listed out of order: shards are concatenated by episode_offset.
+    second = record_shard(tmp_path / "shard-001", ["place cube", "pick cube"], 1, episode_offset=100)
+    first = record_shard(tmp_path / "shard-000", ["pick cube", "stack cubes"], 2, episode_offset=0)
+    output = tmp_path / "merged"
+    info = merge_datasets([second.root, first.root], output)
+
+    assert info["total_episodes"] == 6
+    assert info["total_frames"] == 2 * 3 + 2 * 4 + 2 * 3
+    assert info["total_videos"] == 6
+    assert info["total_rerecords"] == 0
+    assert "episode_offset" not in info
+    # Entries shared by all the shards are kept: the merged dataset can be topped up and encodes alike
+    assert info[FINGERPRINT_KEY] == "0123456789abcdef"
+    assert info[VIDEO_ENCODING_KEY] == {"vcodec": "libsvtav1", "crf": 30}
+    assert load_info(output)["total_frames"] == info["total_frames"]
+
+    tasks, task_to_index = load_tasks(output)
+    assert sorted(tasks.values()) == ["pick cube", "place cube", "stack cubes"]
+
+    episodes = load_episodes(output)
+    assert list(episodes) == list(range(6))
+    assert [ep["length"] for ep in episodes.values()] == [3, 3, 4, 4, 3, 3]
+
+    index = 0
+    for episode_index, episode in episodes.items():
+        table = pq.read_table(output / f"data/chunk-000/episode_{episode_index:06d}.parquet").to_pydict()
+        assert set(table["episode_index"]) == {episode_index}
+        assert table["index"] == list(range(index, index + episode["length"]))
+        index += episode["length"]
+        task_indices = set(table["task_index"])
+        assert len(task_indices) == 1
+        assert tasks[task_indices.pop()] == episode["tasks"][0]
+        # States of the second shard start at its episode offset.
+        assert table["observation.state"][0][0] == (100 if episode_index >= 4 else 0)
+
+    # Videos are hardlinked, not copied.
+    merged_video = output / "videos/chunk-000/observation.images.cam1/episode_000004.mp4"
+    source_video = os.path.join(second.root, "videos/chunk-000/observation.images.cam1/episode_000000.mp4")
+    assert os.path.samefile(merged_video, source_video)
+
+    stats = load_stats(output)
+    assert stats["observation.state"]["count"].item() == info["total_frames"]
+    np.testing.assert_allclose(stats["observation.state"]["max"], [102.0, 102.0])
+
+    with pytest.raises(FileExistsError):
+        merge_datasets([first.root], output)
+
+
+@pytest.mark.parametrize("key", [FINGERPRINT_KEY, VIDEO_ENCODING_KEY])
+def test_merge_mismatched_shards(tmp_path, key):
+    kwargs = {"fingerprint": "fedcba9876543210"} if key == FINGERPRINT_KEY else {"crf": 40}
+    first = record_shard(tmp_path / "shard-000", ["pick cube"], 1, episode_offset=0)
+    second = record_shard(tmp_path / "shard-001", ["pick cube"], 1, episode_offset=2, **kwargs)
+    with pytest.raises(ValueError, match=key):
+        merge_datasets([first.root, second.root], tmp_path / "merged")
@@ -0,0 +1,94 @@
+# Copyright 2026 Nimit Shah. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from types import SimpleNamespace
+
+import pytest
+import torch
+
+from domin.dataset_builder import lerobot_dataset
+from domin.dataset_builder.lerobot_dataset import MultiLeRobotDataset
+
+SIZES = {"test/a": 3, "test/b": 0, "test/c": 5, "test/d": 2}
+
+
+class FakeDataset:
+    """Stands in for a LeRobotDataset of `SIZES[repo_id]` frames."""
+
+    def __init__(self, repo_id, **kwargs):
+        self.repo_id = repo_id
+        self.num_frames = SIZES[repo_id]
+        self.num_episodes = 1
+        self.features = {"index": {}, "action": {}}
+        self.meta = SimpleNamespace(stats={})
+        self.calls = 0
+
+    def __getitem__(self, idx):
+        assert 0 <= idx < self.num_frames
+        self.calls += 1
+        return {"repo_id": self.repo_id, "index": torch.tensor(idx)}
+
+
+@pytest.fixture
+def make_multi_dataset(monkeypatch, tmp_path):
+    monkeypatch.setattr(lerobot_dataset, "LeRobotDataset", FakeDataset)
+    return lambda **kwargs: MultiLeRobotDataset(list(SIZES), root=tmp_path, **kwargs)
+
+
+def test_index_resolution(make_multi_dataset):
+    dataset = make_multi_dataset()
+    assert len(dataset) == 10
+
+    expected = [("test/a", i) for i in range(3)] + [("test/c", i) for i in range(5)]
+    expected += [("test/d", i) for i in range(2)]
+    for idx, (repo_id, local_idx) in enumerate(expected):
+        item = dataset[idx]
+        assert (item["repo_id"], item["index"].item()) == (repo_id, local_idx)
+        assert item["dataset_index"].item() == dataset.repo_ids.index(repo_id)
+
+    with pytest.raises(IndexError):
+        dataset[10]
+
+
+def test_getitems_routes_batches(make_multi_dataset):
+    dataset = make_multi_dataset()
+    indices = [9, 0, 4, 3, 8, 2]
+    items = dataset.__getitems__(indices)
+    assert [(it["repo_id"], it["index"].item()) for it in items] == [
+        ("test/d", 1),
+        ("test/a", 0),
+        ("test/c", 1),
+        ("test/c", 0),
+        ("test/d", 0),
+        ("test/a", 2),
+    ]
+    assert [ds.calls for ds in dataset._datasets] == [2, 0, 2, 2]
+
+
+def test_weighted_sampling(make_multi_dataset):
+    dataset = make_multi_dataset(sampling_weights={"test/a": 1.0, "test/c": 3.0})
+    weights = dataset.get_sampler_weights()
+    torch.testing.assert_close(weights[:3].sum(), torch.tensor(0.25, dtype=weights.dtype))
+    torch.testing.assert_close(weights[3:8].sum(), torch.tensor(0.75, dtype=weights.dtype))
+    assert (weights[8:] == 0).all()
+
+    first = list(dataset.make_weighted_sampler(num_samples=20, seed=0))
+    second = list(dataset.make_weighted_sampler(num_samples=20, seed=0))
+    assert first == second
+    assert all(idx < 8 for idx in first)
+
+    uniform = make_multi_dataset().get_sampler_weights()
+    torch.testing.assert_close(uniform, torch.full((10,), 0.1, dtype=uniform.dtype))
+
+    with pytest.raises(ValueError):
+        make_multi_dataset(sampling_weights={"test/unknown": 1.0})
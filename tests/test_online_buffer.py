@@ -0,0 +1,145 @@
+# Copyright 2026 Nimit Shah. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import threading
+
+import numpy as np
+import torch
+
+from domin.dataset_builder.online_buffer import OnlineBuffer, compute_sampler_weights
+
+FPS = 10
+DATA_SPEC = {"observation.state": {"shape": (2,), "dtype": np.dtype("float32")}}
+
+
+def make_episodes(lengths: list[int]) -> dict[str, np.ndarray]:
+    """Data for consecutive episodes, with indices starting from 0 as `add_data` expects."""
+    episode_index = np.concatenate([np.full(n, i) for i, n in enumerate(lengths)])
+    frame_index = np.concatenate([np.arange(n) for n in lengths])
+    return {
+        OnlineBuffer.INDEX_KEY: np.arange(len(episode_index)),
+        OnlineBuffer.EPISODE_INDEX_KEY: episode_index,
+        OnlineBuffer.FRAME_INDEX_KEY: frame_index,
+        OnlineBuffer.TIMESTAMP_KEY: frame_index / FPS,
+        "observation.state": np.stack([episode_index, frame_index], axis=-1).astype(np.float32),
+    }
+
+
+def test_episode_index_with_wraparound(tmp_path):
+    buffer = OnlineBuffer(tmp_path / "buffer", DATA_SPEC, buffer_capacity=10, fps=FPS)
+    buffer.add_data(make_episodes([4, 3]))
+    assert buffer.episode_bounds == {0: (0, 4), 1: (4, 3)}
+    assert buffer.num_episodes == 2
+    assert buffer.num_frames == 7
+
+    # 5 new frames: 2 of them wrap around and overwrite the two oldest frames of episode 0.
+    buffer.add_data(make_episodes([5]))
+    assert buffer.episode_bounds == {0: (2, 2), 1: (4, 3), 2: (7, 5)}
+    assert buffer.num_frames == len(buffer) == 10
+    np.testing.assert_array_equal(buffer.get_episode_data_indices(2), [7, 8, 9, 0, 1])
+
+    # Episode 0 is fully evicted and episode 1 loses its first frame.
+    buffer.add_data(make_episodes([3]))
+    assert list(buffer.episode_bounds) == [1, 2, 3]
+    assert buffer.episode_bounds[1] == (5, 2)
+    assert buffer.num_episodes == 3
+
+    # Reopening the buffer rebuilds the same index from the memmaps.
+    reopened = OnlineBuffer(tmp_path / "buffer", DATA_SPEC, buffer_capacity=10, fps=FPS)
+    assert reopened.episode_bounds == buffer.episode_bounds
+    assert reopened.num_frames == buffer.num_frames
+
+
+def test_delta_timestamps_across_wraparound(tmp_path):
+    buffer = OnlineBuffer(
+        tmp_path / "buffer",
+        DATA_SPEC,
+        buffer_capacity=10,
+        fps=FPS,
+        delta_timestamps={"observation.state": [-0.2, -0.1, 0.0, 0.1]},
+    )
+    buffer.add_data(make_episodes([4, 3]))
+    buffer.add_data(make_episodes([5]))
+
+    # Position 0 holds frame 3 of episode 2, whose first frames are stored at the end of the buffer.
+    item = buffer[0]
+    assert item["episode_index"].item() == 2
+    torch.testing.assert_close(item["observation.state"][:, 1], torch.tensor([1.0, 2.0, 3.0, 4.0]))
+    assert not item["observation.state_is_pad"].any()
+
+    item = buffer[1]
+    torch.testing.assert_close(item["observation.state"][:, 1], torch.tensor([2.0, 3.0, 4.0, 4.0]))
+    assert item["observation.state_is_pad"].tolist() == [False, False, False, True]
+
+
+def test_sampler_weights_use_episode_index(tmp_path):
+    class EmptyOfflineDataset:
+        def __len__(self):
+            return 0
+
+    buffer = OnlineBuffer(tmp_path / "buffer", DATA_SPEC, buffer_capacity=10, fps=FPS)
+    buffer.add_data(make_episodes([4, 3]))
+    buffer.add_data(make_episodes([5]))
+
+    weights = compute_sampler_weights(
+        EmptyOfflineDataset(),
+        online_dataset=buffer,
+        online_sampling_ratio=1.0,
+        online_drop_n_last_frames=1,
+    )
+    # The last frame of every episode is dropped, including the wrapped-around one at position 1.
+    expected_mask = torch.ones(10, dtype=torch.bool)
+    expected_mask[[3, 6, 1]] = False
+    assert torch.equal(weights > 0, expected_mask)
+    torch.testing.assert_close(weights.sum(), torch.tensor(1.0))
+
+
+def test_reader_tails_writer(tmp_path):
+    writer = OnlineBuffer(tmp_path / "buffer", DATA_SPEC, buffer_capacity=10, fps=FPS)
+    reader = OnlineBuffer(tmp_path / "buffer", DATA_SPEC, buffer_capacity=10, fps=FPS)
+    assert len(reader) == 0
+    assert not reader.refresh()
+
+    writer.add_data(make_episodes([4, 3]))
+    assert reader.refresh()
+    assert reader.episode_bounds == writer.episode_bounds
+    assert not reader.refresh()
+
+    # The writer wraps around twice before the reader looks again.
+    writer.add_data(make_episodes([5]))
+    writer.add_data(make_episodes([3]))
+    assert reader.refresh()
+    assert reader.episode_bounds == writer.episode_bounds
+    assert reader.num_frames == writer.num_frames
+
+    # Reads pick up new data on their own, without an explicit refresh.
+    writer.add_data(make_episodes([6]))
+    assert reader[0]["episode_index"].item() == 4
+    assert reader.episode_bounds == writer.episode_bounds
+
+
+def test_reader_waits_for_write_in_progress(tmp_path):
+    writer = OnlineBuffer(tmp_path / "buffer", DATA_SPEC, buffer_capacity=10, fps=FPS)
+    reader = OnlineBuffer(tmp_path / "buffer", DATA_SPEC, buffer_capacity=10, fps=FPS)
+    writer.add_data(make_episodes([4]))
+
+    # Simulate a writer paused in the middle of `add_data`: the odd counter makes readers wait.
+    writer._data[OnlineBuffer.SEQUENCE_KEY][...] = writer._sequence + 1
+    done = threading.Event()
+    thread = threading.Thread(target=lambda: (reader.refresh(), done.set()))
+    thread.start()
+    assert not done.wait(0.05)
+    writer._data[OnlineBuffer.SEQUENCE_KEY][...] = writer._sequence
+    thread.join(timeout=5)
+    assert done.is_set()
+    assert reader.num_frames == 4
@@ -0,0 +1,83 @@
+# Copyright 2026 Nimit Shah. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import numpy as np
+import pyarrow.parquet as pq
+import pytest
+import torch
+
+from domin.dataset_builder import DatasetRecord, DatasetRecordConfig
+from domin.dataset_builder.quantization import decode_storage, encode_storage, int16_storage
+from domin.dataset_builder.streaming_dataset import StreamingLeRobotDataset
+from domin.dataset_builder.utils import load_episodes_stats
+
+
+@pytest.mark.parametrize(
+    "storage, dtype, atol",
+    [
+        ({"dtype": "float16"}, np.float16, 2e-3),
+        ({"dtype": "bfloat16"}, np.uint16, 1.6e-2),
+        (int16_storage(-4.0, 4.0), np.int16, 8.0 / 65535),
+    ],
+)
+def test_round_trip(storage, dtype, atol):
+    values = np.linspace(-3.9, 3.9, 101, dtype=np.float32).reshape(-1, 1)
+    encoded = encode_storage(values, storage)
+    assert encoded.dtype == dtype
+    decoded = decode_storage(encoded, storage)
+    assert decoded.dtype == np.float32
+    np.testing.assert_allclose(decoded, values, atol=atol)
+    # Tensors built from parquet rows (int64 or float32) are decoded the same way
+    as_read = encoded.astype(np.int64 if np.issubdtype(dtype, np.integer) else np.float32)
+    np.testing.assert_array_equal(decode_storage(torch.from_numpy(as_read), storage), decoded)
+
+
+def test_int16_clipping():
+    storage = int16_storage(-1.0, 1.0)
+    decoded = decode_storage(encode_storage(np.array([-5.0, 5.0]), storage), storage)
+    np.testing.assert_allclose(decoded, [-1.0, 1.0], atol=1e-4)
+
+
+def test_compact_dataset(tmp_path):
+    cfg = DatasetRecordConfig(
+        repo_id="test/compact",
+        root=str(tmp_path / "dataset"),
+        num_envs=1,
+        joint_names=["joint1", "joint2"],
+        default_task="test task",
+        fps=10,
+        video=False,
+        robot_type="SO100",
+        feature_storage={"observation.state": {"dtype": "bfloat16"}, "action": int16_storage(-1.0, 1.0)},
+    )
+    states = torch.rand(12, 1, 2) * 2 - 1
+    with DatasetRecord(cfg) as recorder:
+        recorder.new_story()
+        for state in states:
+            recorder.step(state, state.clone())
+        recorder.finish_episodes(0)
+
+    table = pq.read_table(tmp_path / "dataset/data/chunk-000/episode_000000.parquet")
+    assert str(table.schema.field("observation.state").type.value_type) == "uint16"
+    assert str(table.schema.field("action").type.value_type) == "int16"
+
+    # Stats are computed from the recorded values, not from the stored ones
+    stats = load_episodes_stats(tmp_path / "dataset")[0]
+    np.testing.assert_allclose(stats["action"]["mean"], states[:, 0].mean(0).numpy(), rtol=1e-5)
+
+    items = list(StreamingLeRobotDataset("test/compact", root=tmp_path / "dataset"))
+    state = torch.stack([item["observation.state"] for item in items])
+    action = torch.stack([item["action"] for item in items])
+    assert state.dtype == action.dtype == torch.float32
+    np.testing.assert_allclose(state, states[:, 0], atol=1e-2)
+    np.testing.assert_allclose(action, states[:, 0], atol=2 / 65535)
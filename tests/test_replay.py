@@ -0,0 +1,112 @@
+# Copyright 2026 Nimit Shah. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import json
+from pathlib import Path
+
+import numpy as np
+import torch
+
+from domin.dataset_builder import DatasetRecord, DatasetRecordConfig
+from domin.dataset_builder.replay import SOURCE_EPISODES_KEY, replay_cameras, schedule_replay
+from domin.dataset_builder.streaming_dataset import StreamingLeRobotDataset
+from domin.sim_state import SimStateBuffer
+
+LENGTHS = [3, 6, 4, 5]
+JOINTS = ["joint1", "joint2"]
+
+
+class StubRenderer:
+    """Renders a camera frame filled with the first sim state value of each env."""
+
+    def __init__(self, num_envs: int):
+        self.num_envs = num_envs
+        self.calls = []
+
+    def render(self, sim_state, env_ids, cameras):
+        self.calls.append((list(env_ids), list(cameras)))
+        values = sim_state[:, 0].to(torch.uint8)
+        return {cam: values[:, None, None, None].repeat(1, 12, 16, 3) for cam in cameras}
+
+
+def record_states(root) -> list[str]:
+    names = SimStateBuffer(2, len(JOINTS), ["object"]).names(JOINTS)
+    cfg = DatasetRecordConfig(
+        repo_id="test/replay",
+        root=str(root),
+        num_envs=2,
+        joint_names=JOINTS,
+        default_task="pick cube",
+        fps=10,
+        video=False,
+        robot_type="SO100",
+        sim_state_names=names,
+    )
+    with DatasetRecord(cfg) as recorder:
+        for story in range(2):
+            recorder.new_story(tasks=["pick cube", "place cube"])
+            lengths = LENGTHS[2 * story : 2 * story + 2]
+            for step in range(max(lengths)):
+                # Sim states encode (episode, step), to check which frame each camera image was rendered at
+                sim_state = torch.zeros(2, len(names))
+                sim_state[:, 0] = torch.tensor([20 * (2 * story) + step, 20 * (2 * story + 1) + step])
+                state = sim_state[:, : len(JOINTS)]
+                recorder.step(state, state.clone(), sim_state=sim_state)
+                recorder.finish_episodes([env_idx for env_idx in range(2) if lengths[env_idx] == step + 1])
+    return names
+
+
+def test_schedule_replay():
+    stories = schedule_replay({0: 3, 1: 6, 2: 4, 3: 5, 4: 6}, num_envs=2)
+    assert stories == [[1, 4], [3, 2], [0]]
+
+
+def test_replay_cameras(tmp_path):
+    names = record_states(tmp_path / "states")
+    assert not (tmp_path / "states/images").exists()
+
+    cfg = DatasetRecordConfig(
+        repo_id="test/replay",
+        root=str(tmp_path / "replayed"),
+        num_envs=3,
+        joint_names=JOINTS,
+        cameras={"cam1": (16, 12)},
+        default_task="pick cube",
+        fps=10,
+        video=False,
+        robot_type="SO100",
+        sim_state_names=names,
+    )
+    renderer = StubRenderer(num_envs=3)
+    # Episode 2 was rejected
+    replayed = replay_cameras(tmp_path / "states", cfg, renderer, episodes=[3, 0, 1], metadata={"fingerprint": "abc"})
+    assert replayed == [0, 1, 3]
+
+    # One story of 3 envs (longest first): envs stop being rendered as their episode ends
+    assert [env_ids for env_ids, _ in renderer.calls] == [[0, 1, 2]] * 3 + [[0, 1]] * 2 + [[0]]
+    info = json.loads(Path(cfg.root, "meta/info.json").read_text())
+    assert info[SOURCE_EPISODES_KEY] == [0, 1, 3]
+    assert info["fingerprint"] == "abc"
+    assert info["total_episodes"] == 3
+
+    items = list(StreamingLeRobotDataset("test/replay", root=cfg.root))
+    for episode_index, source_index in enumerate([0, 1, 3]):
+        episode = [item for item in items if item["episode_index"].item() == episode_index]
+        assert len(episode) == LENGTHS[source_index]
+        values = 20 * source_index + np.arange(len(episode))
+        frames = torch.stack([item["observation.images.cam1"] for item in episode])
+        # Images are read back as (C, H, W) floats in [0, 1]
+        np.testing.assert_allclose(frames[:, 0, 0, 0].numpy() * 255, values, atol=1e-3)
+        states = torch.stack([item["observation.state"] for item in episode])
+        np.testing.assert_array_equal(states[:, 0].numpy(), values)
+        assert {item["task"] for item in episode} == {["pick cube", "place cube"][source_index % 2]}
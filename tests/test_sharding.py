@@ -0,0 +1,103 @@
+# Copyright 2026 Nimit Shah. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import json
+import os
+import time
+
+import pytest
+
+from domin.sharding import MANIFEST_NAME, ShardCoordinator, reserve_next_story
+
+
+def stub_worker(spec, quota, reserved, progress):
+    """
+    Fakes a simulator: every story saves `num_envs` episodes (fewer for the last one), 10x slower on the "slow"
+    device.
+    """
+    story_time_s = 0.05 if spec.device == "slow" else 0.005
+    num_saved = 0
+    num_episodes = quota.value
+    while num_saved < num_episodes:
+        time.sleep(story_time_s)
+        if spec.device == "crash" and spec.shard_id == 0 and num_saved:
+            # Crash in the middle of the second story
+            os._exit(1)
+        num_saved = min(num_saved + spec.num_envs, num_episodes)
+        num_episodes = reserve_next_story(quota, reserved, num_saved, spec.num_envs)
+        progress.put((spec.shard_id, num_saved, False))
+    progress.put((spec.shard_id, num_saved, True))
+
+
+def check_shards(shards, num_episodes):
+    assert sum(n for _, n in shards) == num_episodes
+    # Episode ranges of the shards are disjoint
+    ranges = sorted((spec.episode_start, spec.episode_start + spec.num_episodes) for spec, _ in shards)
+    assert all(end <= next_start for (_, end), (next_start, _) in zip(ranges, ranges[1:]))
+    # A shard never records more than its (possibly lowered) quota
+    assert all(n <= spec.num_episodes for spec, n in shards)
+
+
+def test_rebalances_when_a_shard_finishes_early(tmp_path):
+    coordinator = ShardCoordinator(
+        num_episodes=40,
+        slots=[("fast", 2), ("slow", 2)],
+        output_root=tmp_path,
+        worker=stub_worker,
+        mp_context="fork",
+    )
+    shards = coordinator.run(poll_interval_s=0.05)
+
+    check_shards(shards, 40)
+    # The fast slot took over part of the slow shard's episodes
+    assert len(shards) > 2
+    assert sum(n for spec, n in shards if spec.device == "fast") > 20
+    # Episode indices are dense
+    assert sorted(i for spec, n in shards for i in range(spec.episode_start, spec.episode_start + n)) == list(
+        range(40)
+    )
+
+    manifest = json.loads((tmp_path / MANIFEST_NAME).read_text())
+    assert [shard["root"] for shard in manifest] == [spec.root for spec, _ in shards]
+
+
+def test_reassigns_episodes_of_crashed_shard(tmp_path):
+    coordinator = ShardCoordinator(
+        num_episodes=12,
+        slots=[("crash", 3)],
+        output_root=tmp_path,
+        worker=stub_worker,
+        max_failures=1,
+        mp_context="fork",
+    )
+    shards = coordinator.run(poll_interval_s=0.05)
+
+    check_shards(shards, 12)
+    assert shards[0][1] == 3
+    # The untouched tail of the crashed shard's range is reused. Only the episodes it had in flight are
+    # replaced past num_episodes
+    assert (shards[1][0].episode_start, shards[1][0].num_episodes) == (6, 6)
+    assert (shards[2][0].episode_start, shards[2][0].num_episodes) == (12, 3)
+
+
+def test_gives_up_after_max_failures(tmp_path):
+    coordinator = ShardCoordinator(
+        num_episodes=12,
+        slots=[("crash", 3)],
+        output_root=tmp_path,
+        worker=stub_worker,
+        max_failures=0,
+        mp_context="fork",
+    )
+    with pytest.raises(RuntimeError):
+        coordinator.run(poll_interval_s=0.05)
@@ -0,0 +1,62 @@
+# Copyright 2026 Nimit Shah. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import torch
+
+from domin.sim_state import SimStateBuffer
+
+
+def test_state_buffer_updates_views_in_place():
+    buffer = SimStateBuffer(num_envs=2, num_joints=3, obj_names=["object_a", "object_b"])
+    state = buffer.state
+    assert buffer.data.shape == (2, 3 + 7 * 3)
+
+    env_origins = torch.tensor([[0.0, 0.0, 0.0], [10.0, 0.0, 0.0]])
+    quat = torch.tensor([[1.0, 0.0, 0.0, 0.0]]).repeat(2, 1)
+    objs_pos_w = {
+        "object_a": env_origins + torch.tensor([0.5, 0.0, 0.1]),
+        "object_b": env_origins + torch.tensor([0.0, 0.5, 0.2]),
+    }
+    buffer.update(
+        torch.arange(6.0).view(2, 3),
+        env_origins.clone(),
+        quat,
+        objs_pos_w,
+        {"object_a": quat, "object_b": quat},
+        env_origins,
+    )
+    start = buffer.snapshot()
+
+    # Views are refreshed in place: the state and its storage are reused from one step to the next.
+    objs_pos_w["object_a"] = objs_pos_w["object_a"] + torch.tensor([0.0, 0.0, 1.0])
+    data_ptr = buffer.data.data_ptr()
+    buffer.update(
+        torch.ones(2, 3),
+        env_origins.clone(),
+        quat,
+        objs_pos_w,
+        {"object_a": quat, "object_b": quat},
+        env_origins,
+    )
+    assert buffer.state is state
+    assert buffer.data.data_ptr() == data_ptr
+    assert state.robot_joints.data_ptr() == data_ptr
+
+    torch.testing.assert_close(state.robot_joints, torch.ones(2, 3))
+    torch.testing.assert_close(state.robot_pose, torch.tensor([[0.0, 0, 0, 1, 0, 0, 0]]).repeat(2, 1))
+    torch.testing.assert_close(state.objs_pose["object_a"][:, :3], torch.tensor([[0.5, 0.0, 1.1]] * 2))
+    torch.testing.assert_close(state.objs_pose["object_b"][:, :3], torch.tensor([[0.0, 0.5, 0.2]] * 2))
+
+    # The snapshot keeps the values from before the refresh.
+    torch.testing.assert_close(start.robot_joints, torch.arange(6.0).view(2, 3))
+    torch.testing.assert_close(start.objs_pose["object_a"][:, :3], torch.tensor([[0.5, 0.0, 0.1]] * 2))
@@ -0,0 +1,118 @@
+# Copyright 2026 Nimit Shah. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import numpy as np
+import pytest
+import torch
+
+from domin.dataset_builder import DatasetRecord, DatasetRecordConfig
+from domin.dataset_builder.streaming_dataset import FrameRing, StreamingLeRobotDataset
+
+LENGTHS = [4, 5, 6]
+
+
+@pytest.fixture(scope="module")
+def dataset_root(tmp_path_factory):
+    root = tmp_path_factory.mktemp("streaming") / "dataset"
+    cfg = DatasetRecordConfig(
+        repo_id="test/streaming",
+        root=str(root),
+        num_envs=1,
+        joint_names=["joint1", "joint2"],
+        cameras={"cam1": (32, 24)},
+        default_task="test task",
+        fps=10,
+        video=True,
+        robot_type="SO100",
+    )
+    with DatasetRecord(cfg) as recorder:
+        for episode_index, length in enumerate(LENGTHS):
+            recorder.new_story()
+            for step in range(length):
+                # Frames and actions encode (episode, step), to check what is read back
+                value = 100 * episode_index + step
+                action = torch.full((1, 2), float(value))
+                cam_obs = {"cam1": torch.full((1, 24, 32, 3), 40 * episode_index + 10 * step, dtype=torch.uint8)}
+                recorder.step(action.clone(), action, cam_obs)
+            recorder.finish_episodes(0)
+    return root
+
+
+def test_sequential_read(dataset_root):
+    dataset = StreamingLeRobotDataset(
+        "test/streaming",
+        root=dataset_root,
+        delta_timestamps={"action": [-0.1, 0.0], "observation.images.cam1": [-0.1, 0.0, 0.1]},
+    )
+    assert dataset.num_frames == sum(LENGTHS)
+
+    items = list(dataset)
+    assert len(items) == sum(LENGTHS)
+    assert [item["episode_index"].item() for item in items] == [0] * 4 + [1] * 5 + [2] * 6
+    assert all(item["task"] == "test task" for item in items)
+
+    item = items[4]  # First frame of episode 1
+    assert item["frame_index"].item() == 0
+    assert item["observation.state"].tolist() == [100.0, 100.0]
+    assert item["action"][:, 0].tolist() == [100.0, 100.0]
+    assert item["action_is_pad"].tolist() == [True, False]
+
+    frames = item["observation.images.cam1"]
+    assert frames.shape == (3, 3, 24, 32)
+    assert item["observation.images.cam1_is_pad"].tolist() == [True, False, False]
+    np.testing.assert_allclose(frames.mean(dim=(1, 2, 3)) * 255, [40, 40, 50], atol=3)
+
+    item = items[8]  # Last frame of episode 1
+    assert item["observation.images.cam1_is_pad"].tolist() == [False, False, True]
+    np.testing.assert_allclose(item["observation.images.cam1"].mean(dim=(1, 2, 3)) * 255, [70, 80, 80], atol=3)
+
+
+def test_sharding_and_shuffling(dataset_root):
+    def frames(**kwargs):
+        dataset = StreamingLeRobotDataset("test/streaming", root=dataset_root, **kwargs)
+        return [item["index"].item() for item in dataset]
+
+    # Ranks read disjoint episodes
+    rank0, rank1 = frames(rank=0, world_size=2), frames(rank=1, world_size=2)
+    assert not set(rank0) & set(rank1)
+    assert sorted(rank0 + rank1) == list(range(sum(LENGTHS)))
+
+    shuffled = frames(shuffle_buffer_size=4, seed=1)
+    assert sorted(shuffled) == list(range(sum(LENGTHS)))
+    assert shuffled != list(range(sum(LENGTHS)))
+    assert frames(shuffle_buffer_size=4, seed=1) == shuffled
+
+    # So do dataloader workers
+    dataset = StreamingLeRobotDataset("test/streaming", root=dataset_root)
+    loader = torch.utils.data.DataLoader(dataset, batch_size=None, num_workers=2)
+    assert sorted(item["index"].item() for item in loader) == list(range(sum(LENGTHS)))
+
+
+def test_frame_ring():
+    decoded = []
+
+    def frames():
+        for i in range(10):
+            decoded.append(i)
+            yield torch.tensor(i)
+
+    ring = FrameRing(frames())
+    assert ring[2].item() == 2
+    assert decoded == [0, 1, 2]
+    ring.release(2)
+    assert len(ring) == 1
+    assert ring[4].item() == 4
+    with pytest.raises(IndexError):
+        ring[1]
+    with pytest.raises(IndexError):
+        ring[10]
@@ -0,0 +1,101 @@
+# Copyright 2026 Nimit Shah. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import json
+
+import torch
+
+from domin.dataset_builder import DatasetRecord, DatasetRecordConfig
+from domin.dataset_builder.telemetry import RollingHistogram, Telemetry
+
+
+def test_rolling_histogram():
+    histogram = RollingHistogram(window=4)
+    for value in range(10):
+        histogram.add(float(value))
+    summary = histogram.summary()
+    # The window only holds the last 4 values, the count and sum cover all of them.
+    assert summary["count"] == 10
+    assert summary["sum"] == 45
+    assert summary["max"] == 9
+    assert summary["mean"] == 7.5
+    assert summary["p50"] == 7.5
+
+
+def test_export(tmp_path):
+    telemetry = Telemetry(tmp_path, export_interval_s=3600)
+    with telemetry.timer("sim.step"):
+        pass
+    telemetry.observe("settle.steps", 12)
+    telemetry.count("episodes_saved", 2)
+    telemetry.gauge("image_writer.queue_size", 5)
+
+    # Not due yet
+    assert not telemetry.maybe_export()
+    telemetry.export()
+    telemetry.export()
+
+    lines = (tmp_path / "telemetry.jsonl").read_text().splitlines()
+    assert len(lines) == 2
+    summary = json.loads(lines[-1])
+    assert summary["histograms"]["settle.steps"]["p50"] == 12
+    assert summary["histograms"]["sim.step"]["count"] == 1
+    assert summary["counters"] == {"episodes_saved": 2}
+
+    prom = (tmp_path / "telemetry.prom").read_text()
+    assert 'domin_settle_steps{quantile="0.5"} 12.0' in prom
+    assert "domin_episodes_saved_total 2" in prom
+    assert "domin_image_writer_queue_size 5" in prom
+
+    disabled = Telemetry(tmp_path / "disabled", enabled=False)
+    with disabled.timer("sim.step"):
+        pass
+    disabled.export()
+    assert not disabled.histograms
+    assert not (tmp_path / "disabled").exists()
+
+
+def test_recorder_telemetry(tmp_path, capsys):
+    cfg = DatasetRecordConfig(
+        repo_id="test/telemetry",
+        root=str(tmp_path / "dataset"),
+        num_envs=2,
+        joint_names=["joint1", "joint2"],
+        cameras={"cam1": (16, 12)},
+        default_task="test task",
+        fps=10,
+        video=True,
+        robot_type="SO100",
+        telemetry_dir=str(tmp_path / "telemetry"),
+        progress_interval_s=3600,
+    )
+    with DatasetRecord(cfg) as recorder:
+        recorder.new_story()
+        for _ in range(3):
+            cam_obs = {"cam1": torch.zeros(2, 12, 16, 3, dtype=torch.uint8)}
+            recorder.step(torch.randn(2, 2), torch.randn(2, 2), cam_obs)
+        recorder.rerecord(1)
+        recorder.finish_episodes(0)
+
+    counters = recorder.telemetry.counters
+    assert counters["frames"] == 6
+    assert counters["episodes_saved"] == 1
+    assert counters["rerecords"] == 1
+    for stage in ["save_episode", "save_episode.parquet", "save_episode.videos", "dataset.step"]:
+        assert stage in recorder.telemetry.histograms
+
+    # Only the final progress summary is printed, and the telemetry is exported on exit.
+    progress = [line for line in capsys.readouterr().out.splitlines() if "episodes," in line]
+    assert len(progress) == 1
+    assert "1/50 episodes, 1 rerecords" in progress[0]
+    assert (tmp_path / "telemetry/telemetry.prom").exists()
@@ -0,0 +1,138 @@
+# Copyright 2026 Nimit Shah. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import importlib.util
+
+import av
+import numpy as np
+import torch
+
+from domin.dataset_builder import DatasetRecord, DatasetRecordConfig
+from domin.dataset_builder.utils import load_info
+from domin.dataset_builder.video_benchmark import (
+    BenchmarkResult,
+    EncodingSetting,
+    encoding_grid,
+    recommend,
+    run_benchmark,
+    sample_queries,
+    write_preset,
+)
+from domin.dataset_builder.video_utils import decode_video_frames, iter_video_frames
+
+
+def test_sample_queries():
+    queries = sample_queries(20, fps=10, delta_timestamps=[-0.2, 0.0, 0.1], num_queries=50)
+    assert len(queries) == 50
+    for timestamps in queries:
+        assert timestamps[0] >= 0 and timestamps[-1] <= 1.9
+        np.testing.assert_allclose(np.diff(timestamps), [0.2, 0.1])
+
+
+def test_pyav_random_access(tmp_path):
+    results = run_benchmark(
+        encoding_grid(["h264"], [5], [20], [0]),
+        num_frames=20,
+        width=64,
+        height=48,
+        fps=10,
+        num_queries=5,
+        backends=["pyav"],
+        work_dir=tmp_path,
+    )
+    video_path = tmp_path / f"{results[0].setting.name}.mp4"
+    # Frames across key frames decode to the same frames as a sequential pass
+    frames = decode_video_frames(video_path, [0.3, 0.7, 1.1], 1e-4, "pyav")
+    sequential = list(iter_video_frames(video_path))
+    assert frames.shape == (3, 3, 48, 64)
+    for frame, frame_index in zip(frames, [3, 7, 11]):
+        torch.testing.assert_close(frame, sequential[frame_index].float() / 255)
+
+
+def test_run_benchmark(tmp_path):
+    settings = encoding_grid(["libsvtav1", "h264"], [2, 10], [30], [0])
+    results = run_benchmark(
+        settings,
+        num_frames=20,
+        width=64,
+        height=48,
+        fps=10,
+        delta_timestamps=[-0.1, 0.0],
+        num_queries=10,
+        backends=["torchcodec", "pyav"],
+        work_dir=tmp_path,
+    )
+    assert [result.setting for result in results] == settings
+    for result in results:
+        assert "encode" not in result.errors
+        assert result.bytes_per_frame > 0 and result.psnr_db > 20
+        latency = result.latency_ms["pyav"]
+        assert 0 < latency["p50_ms"] <= latency["p99_ms"]
+        # Backends that can't be imported are skipped
+        assert ("torchcodec" in result.latency_ms) == (importlib.util.find_spec("torchcodec") is not None)
+
+    assert recommend(results, min_psnr_db=20) in results
+    assert recommend(results, min_psnr_db=1000) is None
+
+
+def test_recommend():
+    def result(g, p99, size, psnr=40.0):
+        return BenchmarkResult(
+            EncodingSetting(g=g),
+            bytes_per_frame=size,
+            psnr_db=psnr,
+            latency_ms={"pyav": {"p50_ms": p99 / 2, "p99_ms": p99, "mean_ms": p99 / 2}},
+        )
+
+    results = [result(2, 5.0, 900), result(5, 5.0, 400), result(10, 3.0, 300, psnr=25.0), result(30, 8.0, 100)]
+    # Lowest p99, then smallest
+    assert recommend(results).setting.g == 5
+    assert recommend(results, min_psnr_db=20).setting.g == 10
+    assert recommend(results, max_bytes_per_frame=200).setting.g == 30
+    assert recommend(results, backend="torchcodec") is None
+
+
+def test_recorded_videos_use_preset(tmp_path):
+    def record(root, video_encoding=None):
+        cfg = DatasetRecordConfig(
+            repo_id="test/preset",
+            root=str(root),
+            num_envs=1,
+            joint_names=["joint1", "joint2"],
+            cameras={"cam1": (32, 24)},
+            default_task="test task",
+            fps=10,
+            robot_type="SO100",
+            video_encoding=video_encoding,
+        )
+        with DatasetRecord(cfg) as recorder:
+            recorder.new_story()
+            for _ in range(4):
+                recorder.step(torch.randn(1, 2), torch.randn(1, 2), {"cam1": torch.zeros(1, 24, 32, 3, dtype=torch.uint8)})
+            recorder.finish_episodes(0)
+
+    def codec(root):
+        with av.open(str(root / "videos/chunk-000/observation.images.cam1/episode_000000.mp4")) as container:
+            return container.streams.video[0].codec_context.name
+
+    record(tmp_path / "default")
+    assert codec(tmp_path / "default") == "libdav1d"
+
+    preset = EncodingSetting(vcodec="h264", g=10, crf=23, fast_decode=0)
+    record(tmp_path / "configured", video_encoding=preset.as_kwargs())
+    assert codec(tmp_path / "configured") == "h264"
+    assert load_info(tmp_path / "configured")["video_encoding"] == preset.as_kwargs()
+
+    info = write_preset(tmp_path / "default", BenchmarkResult(preset, bytes_per_frame=100.0, psnr_db=40.0))
+    assert info["video_encoding"]["vcodec"] == "h264"
+    assert load_info(tmp_path / "default")["video_encoding_benchmark"]["bytes_per_frame"] == 100.0
@@ -0,0 +1,138 @@
+# Copyright 2026 Nimit Shah. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from pathlib import Path
+
+import numpy as np
+import pytest
+import rerun as rr
+import torch
+
+from domin.dataset_builder import DatasetRecord, DatasetRecordConfig
+from domin.dataset_builder.lerobot_dataset import LeRobotDatasetMetadata
+from domin.dataset_builder.quantization import int16_storage
+from domin.dataset_builder.visualize_dataset import (
+    load_episode_columns,
+    save_episodes_columnar,
+    visualize_episode_columnar,
+)
+
+
+def record(root: Path, lengths: list[int], **kwargs) -> list[dict]:
+    """Record one episode per length (sequentially, with one env) and return the frames passed to `step`."""
+    cfg = DatasetRecordConfig(
+        repo_id="test/visualize",
+        root=str(root),
+        num_envs=1,
+        joint_names=["joint1", "joint2"],
+        cameras={"cam1": (32, 24)},
+        default_task="test task",
+        robot_type="SO100",
+        **{"fps": 10, **kwargs},
+    )
+    episodes = []
+    with DatasetRecord(cfg) as recorder:
+        for length in lengths:
+            recorder.new_story()
+            episode = {"action": [], "observation.state": [], "cam1": []}
+            for step in range(length):
+                cam_obs = {
+                    cam: torch.full((1, 24, 32, 3), 20 * step, dtype=torch.uint8) for cam in recorder.cameras_due()
+                }
+                if "camera_channels" in kwargs:
+                    cam_obs["cam1.depth"] = torch.full((1, 24, 32, 1), 0.5 * (step + 1))
+                    cam_obs["cam1.segmentation"] = torch.full((1, 24, 32, 1), 300 + step, dtype=torch.int32)
+                state, action = torch.randn(1, 2), torch.randn(1, 2)
+                recorder.step(state, action, cam_obs)
+                episode["observation.state"].append(state[0].numpy())
+                episode["action"].append(action[0].numpy())
+                episode["cam1"].append(20 * step)
+            recorder.finish_episodes(0)
+            episodes.append({key: np.array(values) for key, values in episode.items()})
+    return episodes
+
+
+def test_load_episode_columns(tmp_path):
+    episodes = record(tmp_path / "dataset", [5, 8])
+    meta = LeRobotDatasetMetadata("test/visualize", root=tmp_path / "dataset")
+
+    for ep_idx, episode in enumerate(episodes):
+        columns = load_episode_columns(meta, ep_idx)
+        length = len(episode["action"])
+        assert columns["frame_index"].tolist() == list(range(length))
+        np.testing.assert_allclose(columns["timestamp"], np.arange(length) / meta.fps, atol=1e-6)
+        np.testing.assert_allclose(columns["action"], episode["action"], rtol=1e-6)
+        np.testing.assert_allclose(columns["observation.state"], episode["observation.state"], rtol=1e-6)
+
+        frames = columns["observation.images.cam1"]
+        assert frames.shape == (length, 24, 32, 3) and frames.dtype == np.uint8
+        # Lossy encoding of flat images
+        np.testing.assert_allclose(frames.mean(axis=(1, 2, 3)), episode["cam1"], atol=3)
+
+
+def test_load_stored_features(tmp_path):
+    storage = {"action": int16_storage(-5.0, 5.0), "observation.state": {"dtype": "bfloat16"}}
+    episodes = record(tmp_path / "dataset", [5], feature_storage=storage)
+    meta = LeRobotDatasetMetadata("test/visualize", root=tmp_path / "dataset")
+
+    columns = load_episode_columns(meta, 0)
+    assert columns["action"].dtype == columns["observation.state"].dtype == np.float32
+    np.testing.assert_allclose(columns["action"], episodes[0]["action"], atol=1e-3)
+    np.testing.assert_allclose(columns["observation.state"], episodes[0]["observation.state"], rtol=1e-2)
+
+
+def test_load_rate_decoupled_camera(tmp_path):
+    # cam1 is fresh every 3rd frame, each row shows the camera frame captured nearest to it
+    record(tmp_path / "dataset", [7], fps=30, camera_fps={"cam1": 10})
+    meta = LeRobotDatasetMetadata("test/visualize", root=tmp_path / "dataset")
+
+    frames = load_episode_columns(meta, 0)["observation.images.cam1"]
+    assert frames.shape == (7, 24, 32, 3)
+    np.testing.assert_allclose(frames.mean(axis=(1, 2, 3)), [0, 0, 60, 60, 60, 120, 120], atol=3)
+
+
+@pytest.mark.parametrize("video", [True, False])
+def test_depth_and_segmentation(tmp_path, video):
+    record(tmp_path / "dataset", [4], camera_channels={"cam1": ["depth", "segmentation"]}, video=video)
+    meta = LeRobotDatasetMetadata("test/visualize", root=tmp_path / "dataset")
+
+    columns = load_episode_columns(meta, 0)
+    depth = columns["observation.depth.cam1"]
+    assert depth.shape == (4, 24, 32) and depth.dtype == np.float32
+    np.testing.assert_allclose(depth[:, 0, 0], [0.5, 1.0, 1.5, 2.0])
+    assert columns["observation.segmentation.cam1"][:, 0, 0].tolist() == [300, 301, 302, 303]
+
+    rrd_path = visualize_episode_columnar(meta, 0, save=True, output_dir=tmp_path / "rrd")
+    schema = [str(column) for column in rr.dataframe.load_recording(rrd_path).schema().component_columns()]
+    assert any("/observation.depth.cam1:DepthMeter" in column for column in schema)
+    assert read_rrd(rrd_path, "/observation.segmentation.cam1") == 4
+
+
+def read_rrd(path: Path, entity: str) -> int:
+    """Number of logged rows of an entity of a .rrd file."""
+    recording = rr.dataframe.load_recording(path)
+    return recording.view(index="frame_index", contents=entity).select().read_all().num_rows
+
+
+def test_save_episodes_columnar(tmp_path):
+    episodes = record(tmp_path / "dataset", [5, 8, 6])
+    rrd_paths = save_episodes_columnar(
+        "test/visualize", tmp_path / "dataset", [0, 1, 2], tmp_path / "rrd", num_processes=2
+    )
+
+    assert [path.name for path in rrd_paths] == [f"test_visualize_episode_{i}.rrd" for i in range(3)]
+    for path, episode in zip(rrd_paths, episodes):
+        length = len(episode["action"])
+        assert read_rrd(path, "/observation.images.cam1") == length
+        assert read_rrd(path, "/action/1") == length
+        assert read_rrd(path, "/state/0") == length